@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+`AsyncLHUCalenAPI` against the local stub of the LHU API.
+
+Checks, each printed with ok/FAILED:
+    results      same items as `LHUCalenAPI` for several ranges, fetched and then from cache
+    throughput   many students at once on one event loop, against the synchronous client
+                 one student after the other
+    concurrency  the server never sees more requests at a time than `max_concurrency`
+    coalescing   concurrent calls for one uncached student send the requests of a single fetch
+    timeout      `asyncio.wait_for` on a slow server gives up on time, leaves no task behind,
+                 and the same client works afterwards
+
+Exits with status 1 if a check fails.
+
+Usage:
+    python benchmarks/async_client.py [--students 50] [--day-range 30] [--latency-ms 50]
+                                      [--max-concurrency 8] [--backend json]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from stub_server import StubServer
+
+APP_NAME = "lhu-calendar-async"
+# Fixed, so that every client asks for the same days
+QUERY_TIME = datetime(2026, 1, 5, 9)
+
+
+def report(name: str, ok: bool, detail: str) -> bool:
+    print(f"  {name:<12} {detail}  {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+async def check_results(stub: StubServer, cache_manager, reference_cache_manager, ranges: list[int]) -> bool:
+    from src.core.async_api import AsyncLHUCalenAPI
+    from src.core.lhu_calen_api import LHUCalenAPI
+
+    # The stub's sessions depend on the first requested day, so the reference client goes
+    # through the same calls on a cache of its own
+    reference = LHUCalenAPI(stub.url, "200000001", reference_cache_manager, clean_expired=False)
+    mismatched = []
+    async with AsyncLHUCalenAPI(stub.url, "200000001", cache_manager, clean_expired=False) as api:
+        for day_range in ranges:
+            expected = await asyncio.to_thread(reference.get_data, day_range, QUERY_TIME)
+            fetched = await api.get_data(day_range, QUERY_TIME)
+            before = stub.requests
+            cached = await api.get_data(day_range, QUERY_TIME)
+            streamed = [item async for item in api.iter_data(day_range, QUERY_TIME)]
+            if not (fetched == cached == streamed == expected) or stub.requests != before:
+                mismatched.append(day_range)
+    return report("results", not mismatched, f"ranges {ranges}, mismatched {mismatched}")
+
+
+async def check_throughput(stub: StubServer, students: int, day_range: int, max_concurrency: int) -> bool:
+    from src.core.async_api import AsyncLHUCalenAPI
+    from src.core.async_transport import AsyncHTTPTransport
+    from src.core.lhu_calen_api import LHUCalenAPI
+
+    def sync_all() -> list[int]:
+        return [len(LHUCalenAPI(stub.url, f"3{i:08d}").get_data(day_range, QUERY_TIME)) for i in range(students)]
+
+    started = time.perf_counter()
+    expected = await asyncio.to_thread(sync_all)
+    sync_elapsed = time.perf_counter() - started
+
+    transport = AsyncHTTPTransport(max_concurrency=max_concurrency)
+    stub.peak_active = 0
+    started = time.perf_counter()
+    counts = await asyncio.gather(*(
+        AsyncLHUCalenAPI(stub.url, f"3{i:08d}", transport=transport).get_data(day_range, QUERY_TIME)
+        for i in range(students)
+    ))
+    async_elapsed = time.perf_counter() - started
+    await transport.aclose()
+
+    ok = [len(items) for items in counts] == expected
+    ok = report("throughput", ok, f"{students} students, sync {sync_elapsed:.2f}s, async {async_elapsed:.2f}s "
+                                  f"({sync_elapsed / async_elapsed:.1f}x)")
+    return report("concurrency", 0 < stub.peak_active <= max_concurrency,
+                  f"peak {stub.peak_active} request(s) at a time, limit {max_concurrency}") and ok
+
+
+async def check_coalescing(stub: StubServer, cache_manager, day_range: int, callers: int) -> bool:
+    from src.core.async_api import AsyncLHUCalenAPI
+    from src.core.async_transport import AsyncHTTPTransport
+
+    async with AsyncLHUCalenAPI(stub.url, "400000001", transport=AsyncHTTPTransport()) as api:
+        before = stub.requests
+        expected = await api.get_data(day_range, QUERY_TIME)
+        expected_requests = stub.requests - before
+
+    transport = AsyncHTTPTransport()
+    before = stub.requests
+    results = await asyncio.gather(*(
+        AsyncLHUCalenAPI(stub.url, "400000002", cache_manager, transport, clean_expired=False).get_data(day_range, QUERY_TIME)
+        for _ in range(callers)
+    ))
+    requests = stub.requests - before
+    await transport.aclose()
+
+    ok = requests == expected_requests and all(len(items) == len(expected) for items in results)
+    return report("coalescing", ok, f"{callers} callers, {requests} request(s) (expected {expected_requests})")
+
+
+async def check_timeout(stub: StubServer, cache_manager, day_range: int) -> bool:
+    from src.core.async_api import AsyncLHUCalenAPI
+
+    latency = stub.latency
+    ok = True
+    async with AsyncLHUCalenAPI(stub.url, "500000001", cache_manager, clean_expired=False) as api:
+        stub.latency = 2
+        timeout = 0.2
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(api.get_data(day_range, QUERY_TIME), timeout)
+            ok = False
+        except asyncio.TimeoutError:
+            pass
+        elapsed = time.perf_counter() - started
+        ok &= elapsed < timeout + 0.1
+        # Every page task was cancelled with the call
+        await asyncio.sleep(0)
+        leftover = len(asyncio.all_tasks()) - 1
+        ok &= leftover == 0
+
+        stub.latency = latency
+        items = await asyncio.wait_for(api.get_data(day_range, QUERY_TIME), 30)
+        ok &= len(items) > 0
+    return report("timeout", ok, f"gave up after {elapsed * 1000:.0f}ms (limit {timeout * 1000:.0f}ms), "
+                                 f"{leftover} task(s) left, then {len(items)} items")
+
+
+async def run(stub: StubServer, args) -> bool:
+    from src.core.cache import create_cache_manager
+
+    ok = True
+    with tempfile.TemporaryDirectory() as cache_home:
+        os.environ["XDG_CACHE_HOME"] = cache_home
+        cache_manager = create_cache_manager(APP_NAME, 24, backend=args.backend)
+        reference_cache_manager = create_cache_manager(f"{APP_NAME}-reference", 24, backend=args.backend)
+        ok &= await check_results(stub, cache_manager, reference_cache_manager, [1, 7, args.day_range, 100])
+        ok &= await check_throughput(stub, args.students, args.day_range, args.max_concurrency)
+        ok &= await check_coalescing(stub, cache_manager, args.day_range, args.students)
+        ok &= await check_timeout(stub, cache_manager, args.day_range)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async client against the local stub")
+    parser.add_argument("--students", type=int, default=50)
+    parser.add_argument("--day-range", type=int, default=30)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--backend", default="json", choices=["json", "binary", "sqlite"])
+    args = parser.parse_args()
+
+    with StubServer(latency_ms=args.latency_ms) as stub:
+        ok = asyncio.run(run(stub, args))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Size and load-time comparison of the cache backends.
+
+Every backend stores the same synthetic semester for a number of students, then
+`get` is timed for a short window (what `view` asks for) and for the whole
+semester.
+
+Usage:
+    python benchmarks/cache_formats.py [--students 200] [--days 120] [--per-day 4] [--window 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.cache import create_cache_manager, iter_days
+from src.core.lhu_calen_api import CalenItem
+
+API_URL = "https://tapi.lhu.edu.vn/calen/auth/XemLich_LichSinhVien"
+BACKENDS = ("json", "sqlite", "binary")
+
+
+def make_semester(first_day: date, days: int, per_day: int, seed: int) -> dict[date, list]:
+    data: dict[date, list] = {}
+    for i, day in enumerate(iter_days(first_day, first_day + timedelta(days=days - 1))):
+        start = datetime(day.year, day.month, day.day, 7, tzinfo=timezone.utc)
+        data[day] = [
+            CalenItem(
+                start_time=start + timedelta(hours=2 * j),
+                end_time=start + timedelta(hours=2 * j + 2),
+                room_name=f"Phòng A{(seed + i + j) % 30:02d}",
+                subject_name=f"Môn học số {(seed + j) % 12}",
+                facility_name=f"Cơ sở {(i + j) % 3 + 1}",
+                is_cancelled=(seed + i + j) % 23 == 0
+            ).to_row()
+            for j in range(per_day)
+        ]
+    return data
+
+
+def directory_size(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.iterdir() if file.is_file())
+
+
+def bench_backend(backend: str, students: list[str], first_day: date, days: int, per_day: int, window: int) -> dict:
+    cache_manager = create_cache_manager("lhu-calendar-bench", 24, backend=backend)
+    for seed, student_id in enumerate(students):
+        cache_manager.set(API_URL, student_id, make_semester(first_day, days, per_day, seed))
+
+    last_day = first_day + timedelta(days=days - 1)
+    window_first = first_day + timedelta(days=days // 2)
+    window_last = window_first + timedelta(days=window - 1)
+
+    started = time.perf_counter()
+    for student_id in students:
+        cache_manager.get(API_URL, student_id, window_first, window_last)
+    window_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for student_id in students:
+        cache_manager.get(API_URL, student_id, first_day, last_day)
+    full_s = time.perf_counter() - started
+
+    return {
+        "backend": backend,
+        "bytes_per_student": directory_size(cache_manager.cache_dir) / len(students),
+        "window_get_ms": window_s / len(students) * 1000,
+        "full_get_ms": full_s / len(students) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache backend size and load-time comparison")
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--days", type=int, default=120, help="Days stored per student (default: a 120-day semester)")
+    parser.add_argument("--per-day", type=int, default=4, help="Sessions per day")
+    parser.add_argument("--window", type=int, default=5, help="Days read by the window lookup (default: 5, like view -r 4)")
+    args = parser.parse_args()
+
+    students = [f"1240{i:05d}" for i in range(args.students)]
+    first_day = date(2025, 9, 1)
+    results = []
+    for backend in BACKENDS:
+        with tempfile.TemporaryDirectory() as home:
+            # Point every platform's cache directory at the throwaway home
+            os.environ["XDG_CACHE_HOME"] = os.environ["HOME"] = home
+            os.environ["LOCALAPPDATA"] = home
+            results.append(bench_backend(backend, students, first_day, args.days, args.per_day, args.window))
+
+    print(f"{args.students} students, {args.days} days x {args.per_day} sessions, window of {args.window} days")
+    print(f"{'backend':<8} {'bytes/student':>14} {'window get':>12} {'full get':>12}")
+    for result in results:
+        print(
+            f"{result['backend']:<8} {result['bytes_per_student']:>14,.0f} "
+            f"{result['window_get_ms']:>9.3f} ms {result['full_get_ms']:>9.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
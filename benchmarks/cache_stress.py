@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Many invocations sharing one cache at the same time, against the local stub of the LHU API.
+
+Two checks per cache backend, each process started fresh and released together:
+    single_flight  every process asks for the same student that is not cached yet,
+                   the API must see the requests of a single fetch and every process
+                   the same schedule
+    writers        every process stores its own days of one student, again and again,
+                   no day may be lost and the store must stay readable
+
+Exits with status 1 if a check fails.
+
+Usage:
+    python benchmarks/cache_stress.py [--processes 32] [--rounds 20] [--latency-ms 200]
+                                      [--backend json binary sqlite]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from stub_server import StubServer
+
+APP_NAME = "lhu-calendar-stress"
+DAY_RANGE = 7
+
+
+def _fetch(cache_home: str, backend: str, api_url: str, student_id: str, results, barrier) -> None:
+    os.environ["XDG_CACHE_HOME"] = cache_home
+    from src.core.cache import create_cache_manager
+    from src.core.lhu_calen_api import LHUCalenAPI
+
+    api = LHUCalenAPI(api_url, student_id, create_cache_manager(APP_NAME, 24, backend=backend), clean_expired=False)
+    barrier.wait()
+    results.put(len(api.get_data(DAY_RANGE)))
+
+
+def _write(cache_home: str, backend: str, api_url: str, student_id: str, days: list[date], rounds: int, barrier) -> None:
+    os.environ["XDG_CACHE_HOME"] = cache_home
+    from src.core.cache import create_cache_manager
+
+    cache_manager = create_cache_manager(APP_NAME, 24, backend=backend)
+    barrier.wait()
+    for i in range(rounds):
+        for day in days:
+            start = int(time.mktime(day.timetuple())) + 7 * 3600
+            cache_manager.set(api_url, student_id, {day: [[start, start + 7200, f"A{i}", "Môn học", "Cơ sở 1", False]]})
+
+
+def run_processes(context, target, args_list: list[tuple]) -> float:
+    """Start one process per argument tuple, released together, and wait for all of them"""
+    barrier = context.Barrier(len(args_list))
+    processes = [context.Process(target=target, args=(*args, barrier)) for args in args_list]
+    for process in processes:
+        process.start()
+    started = time.perf_counter()
+    for process in processes:
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"A worker exited with status {process.exitcode}")
+    return time.perf_counter() - started
+
+
+def check_single_flight(context, stub: StubServer, cache_home: str, backend: str, processes: int) -> bool:
+    # Requests of a single fetch, measured on a student of its own
+    from src.core.lhu_calen_api import LHUCalenAPI
+    before = stub.requests
+    expected_items = len(LHUCalenAPI(stub.url, "100000001").get_data(DAY_RANGE))
+    expected_requests = stub.requests - before
+
+    results = context.Queue()
+    before = stub.requests
+    elapsed = run_processes(context, _fetch, [(cache_home, backend, stub.url, "100000002", results)] * processes)
+    requests = stub.requests - before
+    counts = [results.get() for _ in range(processes)]
+
+    ok = requests == expected_requests and all(count == expected_items for count in counts)
+    print(f"  single_flight  {processes} processes, {requests} request(s) (expected {expected_requests}), "
+          f"{len(set(counts))} distinct result(s), {elapsed:.2f}s  {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def check_writers(context, stub: StubServer, cache_home: str, backend: str, processes: int, rounds: int) -> bool:
+    student_id = "100000003"
+    first_day = date.today()
+    days_of = [[first_day + timedelta(days=i * 2 + j) for j in range(2)] for i in range(processes)]
+    elapsed = run_processes(
+        context, _write,
+        [(cache_home, backend, stub.url, student_id, days, rounds) for days in days_of]
+    )
+
+    os.environ["XDG_CACHE_HOME"] = cache_home
+    from src.core.cache import create_cache_manager
+    stored = create_cache_manager(APP_NAME, 24, backend=backend).get(stub.url, student_id, first_day, days_of[-1][-1])
+    expected = [day for days in days_of for day in days]
+    lost = [day for day in expected if day not in stored or len(stored[day].items) != 1]
+
+    ok = not lost
+    print(f"  writers        {processes} processes x {rounds} rounds, {len(expected) - len(lost)}/{len(expected)} days kept, "
+          f"{elapsed:.2f}s  {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent invocations sharing one cache")
+    parser.add_argument("--processes", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=20, help="Writes per day and process in the writers check")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Latency of the stub, keeps the processes overlapping")
+    parser.add_argument("--backend", nargs="+", default=["json", "binary", "sqlite"])
+    args = parser.parse_args()
+
+    # Fresh interpreters, like separate invocations of the CLI
+    context = multiprocessing.get_context("spawn")
+    ok = True
+    with StubServer(latency_ms=args.latency_ms) as stub:
+        for backend in args.backend:
+            print(backend)
+            with tempfile.TemporaryDirectory() as cache_home:
+                ok &= check_single_flight(context, stub, cache_home, backend, args.processes)
+            with tempfile.TemporaryDirectory() as cache_home:
+                ok &= check_writers(context, stub, cache_home, backend, args.processes, args.rounds)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of CalenItem encoding and decoding.
+
+Compares the pydantic model that `CalenItem` used to be (`model_validate` from
+cached dicts, `model_dump(mode='json')` before storing) against the slotted
+dataclass path (`from_row` and the batched `from_rows` / `to_row`).
+
+Usage:
+    python benchmarks/calen_item.py [--sizes 10000 1000000]
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pydantic import BaseModel
+from src.core.lhu_calen_api import CalenItem
+
+
+class PydanticCalenItem(BaseModel):
+    """The previous pydantic definition of CalenItem"""
+    start_time: datetime
+    end_time: datetime
+    room_name: str
+    subject_name: str
+    facility_name: str
+    is_cancelled: bool
+
+
+def make_items(count: int) -> list[CalenItem]:
+    start = datetime(2025, 9, 1, 7, tzinfo=timezone.utc)
+    return [
+        CalenItem(
+            start_time=start + timedelta(hours=i),
+            end_time=start + timedelta(hours=i + 2),
+            room_name=f"A{i % 40}",
+            subject_name=f"Môn học {i % 25}",
+            facility_name=f"Cơ sở {i % 3}",
+            is_cancelled=i % 17 == 0
+        )
+        for i in range(count)
+    ]
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def bench(count: int) -> None:
+    items = make_items(count)
+    pydantic_items = [PydanticCalenItem.model_validate(item.model_dump()) for item in items]
+    dicts = [item.model_dump(mode='json') for item in pydantic_items]
+    rows = [item.to_row() for item in items]
+
+    results = [
+        ("decode  pydantic model_validate", timed(lambda: [PydanticCalenItem.model_validate(d) for d in dicts])),
+        ("decode  CalenItem.from_row", timed(lambda: [CalenItem.from_row(row) for row in rows])),
+        ("decode  CalenItem.from_rows", timed(lambda: CalenItem.from_rows(rows))),
+        ("encode  pydantic model_dump(json)", timed(lambda: [item.model_dump(mode='json') for item in pydantic_items])),
+        ("encode  CalenItem.to_row", timed(lambda: [item.to_row() for item in items])),
+    ]
+
+    print(f"{count:,} items")
+    for name, seconds in results:
+        print(f"  {name:<36} {seconds * 1000:10.1f} ms  {seconds / count * 1e9:8.0f} ns/item")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CalenItem encode/decode microbenchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000], help="Item counts (default: 10000 1000000)")
+    args = parser.parse_args()
+
+    for count in args.sizes:
+        bench(count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Time to first output and peak memory of `view` rendering, one table for the whole
+range against one table per week (`CalendarDisplay.display_schedule_paged`).
+
+Items come from a generator in start order, like from `LHUCalenAPI.iter_data`, and
+are printed into an off-screen console. Paged peak memory still grows slowly with the
+range while the bounded caches of rich fill up.
+
+Usage:
+    python benchmarks/paged_render.py [--ranges 7 30 120 365] [--per-day 4] [--width 120]
+"""
+
+import argparse
+import gc
+import io
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rich.console import Console
+
+from src.core.lhu_calen_api import CalenItem
+from src.ui.calendar_display import CalendarDisplay
+
+
+class FirstWriteFile(io.StringIO):
+    """Off-screen output remembering when it was first written to"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.first_write: float | None = None
+
+    def write(self, text: str) -> int:
+        if self.first_write is None:
+            self.first_write = time.perf_counter()
+        # The output itself is not kept, it is not what is measured
+        return len(text)
+
+
+def iter_items(start: datetime, day_range: int, per_day: int):
+    for day in range(day_range):
+        for i in range(per_day):
+            begin = start + timedelta(days=day, hours=7 + 2 * i)
+            yield CalenItem(begin, begin + timedelta(hours=2), f"A{i}01", f"Môn học {(day + i) % 9}", "Cơ sở 1", (day + i) % 17 == 0)
+
+
+def measure(render, width: int) -> tuple[float, float, int]:
+    """Time to first output and total time in ms, and peak memory in bytes of one rendering"""
+    output = FirstWriteFile()
+    console = Console(file=output, width=width, force_terminal=True, color_system="truecolor")
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    render(CalendarDisplay(console))
+    total = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (output.first_write - started) * 1000, total * 1000, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whole-range against week-by-week rendering")
+    parser.add_argument("--ranges", type=int, nargs="+", default=[7, 30, 120, 365])
+    parser.add_argument("--per-day", type=int, default=4)
+    parser.add_argument("--width", type=int, default=120)
+    args = parser.parse_args()
+
+    start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0).replace(tzinfo=None)
+    # Fill the caches of rich first, they would be counted in the first measurement only
+    measure(lambda display: display.display_schedule(list(iter_items(start, 7, args.per_day)), start, 7), args.width)
+    print(f"  {'days':>5} {'mode':<7} {'first output (ms)':>18} {'total (ms)':>11} {'peak (KiB)':>11}")
+    for day_range in args.ranges:
+        modes = {
+            "whole": lambda display: display.display_schedule(list(iter_items(start, day_range, args.per_day)), start, day_range),
+            "paged": lambda display: display.display_schedule_paged(iter_items(start, day_range, args.per_day), start, day_range),
+        }
+        for mode, render in modes.items():
+            first, total, peak = measure(render, args.width)
+            print(f"  {day_range:>5} {mode:<7} {first:>18.1f} {total:>11.1f} {peak / 1024:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite, against the local stub of the LHU API.
+
+Measures:
+    cold_start     a cached `view` in a fresh interpreter (see startup.py)
+    cache_hit      `LHUCalenAPI.get_data` answered from the cache
+    cache_miss     `LHUCalenAPI.get_data` of a student that is not cached
+    batch          `LHUCalenBatchAPI` throughput on cold students
+    render         `CalendarDisplay.display_schedule` into an off-screen console
+
+Results are written as JSON (with the commit they were measured on), and can be
+compared with an earlier run to spot regressions.
+
+Usage:
+    python benchmarks/run.py [--output bench.json] [--compare previous.json] [--latency-ms 50]
+                             [--backend sqlite] [--only cache_hit render]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from startup import measure_startup
+from stub_server import StubServer
+
+BENCHMARKS = ("cold_start", "cache_hit", "cache_miss", "batch", "render")
+DAY_RANGE = 4
+
+
+def summarize(samples_s: list[float]) -> dict:
+    """Median, p95 and min of timings in seconds, in milliseconds"""
+    samples_ms = sorted(sample * 1000 for sample in samples_s)
+    return {
+        "runs": len(samples_ms),
+        "median_ms": round(statistics.median(samples_ms), 3),
+        "p95_ms": round(samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.95))], 3),
+        "min_ms": round(samples_ms[0], 3),
+    }
+
+
+def student_ids(prefix: int, count: int) -> list[str]:
+    return [f"1{prefix:02d}{i:06d}" for i in range(count)]
+
+
+def bench_cache_hit(stub: StubServer, backend: str, runs: int) -> dict:
+    from src.core.cache import create_cache_manager
+    from src.core.lhu_calen_api import LHUCalenAPI
+
+    api = LHUCalenAPI(stub.url, student_ids(10, 1)[0], create_cache_manager("lhu-calendar-bench", 24, backend=backend), clean_expired=False)
+    api.get_data(DAY_RANGE)
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        api.get_data(DAY_RANGE)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def bench_cache_miss(stub: StubServer, backend: str, runs: int) -> dict:
+    from src.core.cache import create_cache_manager
+    from src.core.lhu_calen_api import LHUCalenAPI
+    from src.core.transport import HTTPTransport
+
+    cache_manager = create_cache_manager("lhu-calendar-bench", 24, backend=backend)
+    transport = HTTPTransport()
+    samples = []
+    for student_id in student_ids(20, runs):
+        api = LHUCalenAPI(stub.url, student_id, cache_manager, transport, clean_expired=False)
+        started = time.perf_counter()
+        api.get_data(DAY_RANGE)
+        samples.append(time.perf_counter() - started)
+    transport.close()
+    return {**summarize(samples), "stub_latency_ms": stub.latency * 1000}
+
+
+def bench_batch(stub: StubServer, backend: str, students: int, workers: int) -> dict:
+    from src.core.batch import LHUCalenBatchAPI
+    from src.core.cache import create_cache_manager
+
+    batch_api = LHUCalenBatchAPI(stub.url, create_cache_manager("lhu-calendar-bench", 24, backend=backend), max_workers=workers)
+    started = time.perf_counter()
+    results = batch_api.get_data(student_ids(30, students), DAY_RANGE)
+    elapsed = time.perf_counter() - started
+    batch_api.close()
+    return {
+        "students": students,
+        "workers": workers,
+        "failed": sum(1 for result in results if not result.ok),
+        "elapsed_ms": round(elapsed * 1000, 3),
+        "students_per_s": round(students / elapsed, 2),
+    }
+
+
+def bench_render(stub: StubServer, runs: int, day_range: int = 7) -> dict:
+    from rich.console import Console
+    from src.core.lhu_calen_api import LHUCalenAPI
+    from src.ui.calendar_display import CalendarDisplay
+
+    items = LHUCalenAPI(stub.url, student_ids(40, 1)[0]).get_data(day_range)
+    display = CalendarDisplay(Console(file=io.StringIO(), width=160, force_terminal=True, color_system="truecolor"))
+    samples = []
+    for _ in range(runs):
+        display.console.file = io.StringIO()
+        started = time.perf_counter()
+        display.display_schedule(items, day_range=day_range)
+        samples.append(time.perf_counter() - started)
+    return {**summarize(samples), "items": len(items), "day_range": day_range}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, previous: dict) -> None:
+    """Print the change of every headline number against a previous run"""
+    headline = {
+        "cold_start": "import_ms_median",
+        "cache_hit": "median_ms",
+        "cache_miss": "median_ms",
+        "batch": "students_per_s",
+        "render": "median_ms",
+    }
+    print(f"\ncompared with {previous.get('commit') or 'previous run'}:")
+    for name, key in headline.items():
+        if name not in current["results"] or name not in previous.get("results", {}):
+            continue
+        now, before = current["results"][name][key], previous["results"][name][key]
+        change = (now - before) / before * 100 if before else 0.0
+        print(f"  {name:<11} {key:<18} {before:>10.3f} -> {now:>10.3f}  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite against a local API stub")
+    parser.add_argument("--output", default="bench-results.json", help="Where to write the JSON results (default: bench-results.json)")
+    parser.add_argument("--compare", help="Earlier results to compare with")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="Run only these benchmarks")
+    parser.add_argument("--backend", choices=["sqlite", "json", "binary"], default="sqlite", help="Cache backend (default: sqlite)")
+    parser.add_argument("--runs", type=int, default=50, help="Samples per latency benchmark (default: 50)")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Stub latency (default: 50)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of stub requests answered with a 503")
+    parser.add_argument("--per-day", type=int, default=4, help="Sessions per day served by the stub (default: 4)")
+    parser.add_argument("--pad-bytes", type=int, default=0, help="Extra bytes per session served by the stub")
+    parser.add_argument("--record", help="Recorded API response for the stub to serve")
+    parser.add_argument("--batch-students", type=int, default=200)
+    parser.add_argument("--batch-workers", type=int, default=16)
+    args = parser.parse_args()
+    selected = args.only or BENCHMARKS
+
+    results: dict[str, dict] = {}
+    if "cold_start" in selected:
+        results["cold_start"] = measure_startup(runs=min(args.runs, 7))
+
+    with tempfile.TemporaryDirectory() as home, StubServer(
+        latency_ms=args.latency_ms, per_day=args.per_day, failure_rate=args.failure_rate,
+        pad_bytes=args.pad_bytes, record=args.record
+    ) as stub:
+        # Point every platform's cache directory at the throwaway home
+        os.environ["XDG_CACHE_HOME"] = os.environ["HOME"] = home
+        os.environ["LOCALAPPDATA"] = home
+
+        if "cache_hit" in selected:
+            results["cache_hit"] = bench_cache_hit(stub, args.backend, args.runs)
+        if "cache_miss" in selected:
+            results["cache_miss"] = bench_cache_miss(stub, args.backend, args.runs)
+        if "batch" in selected:
+            results["batch"] = bench_batch(stub, args.backend, args.batch_students, args.batch_workers)
+        if "render" in selected:
+            results["render"] = bench_render(stub, args.runs)
+
+    report = {
+        "commit": git_commit(),
+        "measured_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "backend": args.backend,
+            "latency_ms": args.latency_ms,
+            "failure_rate": args.failure_rate,
+            "per_day": args.per_day,
+            "pad_bytes": args.pad_bytes,
+            "record": args.record,
+        },
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    for name, result in results.items():
+        print(f"{name:<11} " + ", ".join(f"{key}={value}" for key, value in result.items()))
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
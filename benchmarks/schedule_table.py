@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Memory and speed of `ScheduleTable` against `list[CalenItem]`.
+
+The items are decoded from JSON cache rows, like on a cache hit, so every item holds
+its own string objects. Measures memory per session (tracemalloc), a time-range
+filter, grouping by day and grouping by student.
+
+Usage:
+    python benchmarks/schedule_table.py [--students 500] [--days 60] [--per-day 4]
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.lhu_calen_api import CalenItem
+from src.core.schedule_table import ScheduleTableBuilder
+
+
+def cached_rows(student: int, days: int, per_day: int) -> str:
+    """One student's schedule as stored in the cache"""
+    start = int(datetime(2025, 9, 1, tzinfo=timezone.utc).timestamp())
+    rows = []
+    for day in range(days):
+        for i in range(per_day):
+            begin = start + day * 86400 + (7 + 2 * i) * 3600
+            rows.append([begin, begin + 7200, f"A{(student + i) % 40}", f"Môn học {(student + day) % 25}", f"Cơ sở {i % 3}", (day + i) % 17 == 0])
+    return json.dumps(rows, ensure_ascii=False)
+
+
+def measured(build):
+    """The result of `build` and the memory it holds on to"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def timed(fn, runs: int = 5) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ScheduleTable against list[CalenItem]")
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--per-day", type=int, default=4)
+    args = parser.parse_args()
+
+    stores = {f"1{student:08d}": cached_rows(student, args.days, args.per_day) for student in range(args.students)}
+
+    def build_items() -> dict[str, list[CalenItem]]:
+        return {student_id: CalenItem.from_rows(json.loads(rows)) for student_id, rows in stores.items()}
+
+    def build_table():
+        builder = ScheduleTableBuilder()
+        for student_id, rows in stores.items():
+            builder.extend(student_id, CalenItem.from_rows(json.loads(rows)))
+        return builder.build()
+
+    items_by_student, items_bytes = measured(build_items)
+    table, table_bytes = measured(build_table)
+    items = [item for student_items in items_by_student.values() for item in student_items]
+    count = len(items)
+
+    first = datetime(2025, 9, 10, tzinfo=timezone.utc)
+    last = first + timedelta(days=7)
+
+    def filter_items():
+        return [item for item in items if first <= item.start_time < last]
+
+    def group_items_by_day():
+        groups = {}
+        for item in items:
+            groups.setdefault(item.start_time.date(), []).append(item)
+        return groups
+
+    print(f"{count} sessions of {args.students} students over {args.days} days")
+    print(f"  {'':<22} {'list[CalenItem]':>16} {'ScheduleTable':>16}")
+    print(f"  {'bytes per session':<22} {items_bytes / count:>16.1f} {table_bytes / count:>16.1f}")
+    print(f"  {'filter one week (ms)':<22} {timed(filter_items) * 1000:>16.3f} {timed(lambda: table.between(first, last)) * 1000:>16.3f}")
+    print(f"  {'group by day (ms)':<22} {timed(group_items_by_day) * 1000:>16.3f} {timed(table.group_by_day) * 1000:>16.3f}")
+    print(f"  {'group by student (ms)':<22} {'-':>16} {timed(table.group_by_student) * 1000:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark of a cached `view`.
+
+The cache of a throwaway home directory is seeded with a schedule, then
+`python -X importtime -m src.main view` is run several times against it. The
+import time of the application in every run is read from `-X importtime` and the
+median is checked against a budget. Modules that only belong to the cache-miss path must not be
+imported at all.
+
+Usage:
+    python benchmarks/startup.py [--runs 7] [--budget-ms 150]
+
+The exit code is 1 when the budget is exceeded or a forbidden module is imported.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+STUDENT_ID = "124000095"
+DAY_RANGE = 4
+# Modules of the network stack, of validation and of --help, a cache hit must not import them
+FORBIDDEN_MODULES = ("requests", "urllib3", "pydantic", "rich_argparse", "rich.live")
+DEFAULT_BUDGET_MS = 150
+
+
+def isolated_env(home: Path) -> dict[str, str]:
+    """Environment pointing every platform's cache directory into `home`"""
+    env = dict(os.environ)
+    env["HOME"] = str(home)
+    env["XDG_CACHE_HOME"] = str(home / ".cache")
+    env["LOCALAPPDATA"] = str(home / "AppData" / "Local")
+    return env
+
+
+def seed_cache(env: dict[str, str], student_id: str = STUDENT_ID, day_range: int = DAY_RANGE, items_per_day: int = 4) -> None:
+    """Fill the cache of `env` with a synthetic schedule for today's range"""
+    script = f"""
+from datetime import datetime, timedelta, timezone
+from src.core.cache import create_cache_manager, iter_days
+from src.core.configurations import APIConfigs, CacheConfigs
+from src.core.lhu_calen_api import CalenItem
+
+cache_manager = create_cache_manager(CacheConfigs.APP_NAME, CacheConfigs.TTL_HOURS, backend=CacheConfigs.BACKEND)
+today = datetime.now(timezone.utc).date()
+data = {{}}
+for day in iter_days(today, today + timedelta(days={day_range + 1})):
+    start = datetime(day.year, day.month, day.day, 7, tzinfo=timezone.utc)
+    data[day] = [
+        CalenItem(
+            start_time=start + timedelta(hours=2 * i),
+            end_time=start + timedelta(hours=2 * i + 2),
+            room_name=f"A{{i}}01",
+            subject_name=f"Môn học {{i}}",
+            facility_name="Cơ sở 1",
+            is_cancelled=False
+        ).to_row()
+        for i in range({items_per_day})
+    ]
+cache_manager.set(APIConfigs.LHU_API_URL, "{student_id}", data)
+"""
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT_DIR, env=env, check=True)
+
+
+def parse_importtime(stderr: str) -> tuple[float, set[str]]:
+    """Import time of the application in milliseconds and the set of imported modules
+
+    Interpreter startup (everything up to and including `site`, which also runs the
+    `.pth` files of the environment) is not counted.
+    """
+    total_us = 0
+    after_site = False
+    modules: set[str] = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        # Only top-level imports are summed, their cumulative time includes nested ones
+        if name.startswith("  "):
+            continue
+        if after_site:
+            total_us += int(cumulative_us)
+        elif name.strip() == "site":
+            after_site = True
+    return total_us / 1000, modules
+
+
+def measure_startup(runs: int = 7, args: list[str] | None = None) -> dict:
+    """Run a cached `view` `runs` times in a fresh cache and collect its startup numbers"""
+    if args is None:
+        args = ["view", STUDENT_ID, "-r", str(DAY_RANGE)]
+
+    import_ms: list[float] = []
+    wall_ms: list[float] = []
+    forbidden: set[str] = set()
+    with tempfile.TemporaryDirectory() as home:
+        env = isolated_env(Path(home))
+        seed_cache(env)
+        # First run warms the bytecode cache, it is not measured
+        subprocess.run([sys.executable, "-m", "src.main", *args], cwd=ROOT_DIR, env=env, capture_output=True)
+
+        for _ in range(runs):
+            started = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-m", "src.main", *args],
+                cwd=ROOT_DIR, env=env, capture_output=True, text=True
+            )
+            wall_ms.append((time.perf_counter() - started) * 1000)
+            total, modules = parse_importtime(proc.stderr)
+            import_ms.append(total)
+            forbidden |= {name for name in modules if name in FORBIDDEN_MODULES}
+
+    return {
+        "runs": runs,
+        "import_ms_median": round(statistics.median(import_ms), 2),
+        "wall_ms_median": round(statistics.median(wall_ms), 2),
+        "wall_ms_min": round(min(wall_ms), 2),
+        "forbidden_modules": sorted(forbidden),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark of a cached view")
+    parser.add_argument("--runs", type=int, default=7, help="Number of measured runs (default: 7)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help=f"Import time budget in ms (default: {DEFAULT_BUDGET_MS})")
+    args = parser.parse_args()
+
+    result = measure_startup(args.runs)
+    print(f"import time (median): {result['import_ms_median']:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"wall time (median):   {result['wall_ms_median']:.1f} ms, min {result['wall_ms_min']:.1f} ms")
+
+    failed = False
+    if result["forbidden_modules"]:
+        print(f"FAIL: the cache-hit path imported {', '.join(result['forbidden_modules'])}")
+        failed = True
+    if result["import_ms_median"] > args.budget_ms:
+        print("FAIL: import time is over budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
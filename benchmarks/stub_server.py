@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Local stub of the `XemLich_LichSinhVien` endpoint.
+
+It answers the same form payload (`StudentID`, `Ngay`, `PageIndex`, `PageSize`)
+with synthetic sessions, or with the sessions of a recorded response, shifted so
+they start on the requested day. Latency, payload size and failure rate are
+configurable, so benchmarks never depend on the live API.
+
+Usage:
+    python benchmarks/stub_server.py [--port 8765] [--latency-ms 50] [--days 120] [--per-day 4]
+                                     [--failure-rate 0] [--pad-bytes 0] [--record response.json]
+
+`record` is a response saved from the live API (e.g. the output of `test.py`).
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+API_PATH = "/calen/auth/XemLich_LichSinhVien"
+
+
+def synthetic_sessions(student_id: str, days: int, per_day: int, pad_bytes: int) -> list[dict]:
+    """Sessions of `days` days from day 0, as offsets in seconds from the requested day"""
+    sessions = []
+    for day in range(days):
+        for i in range(per_day):
+            start = day * 86400 + (7 + 2 * i) * 3600
+            sessions.append({
+                "start": start,
+                "end": start + 2 * 3600,
+                "TenPhong": f"A{(day + i) % 30:02d}",
+                "TenMonHoc": f"Môn học {student_id[-2:]}-{i}" + " " * pad_bytes,
+                "TenCoSo": f"Cơ sở {i % 3 + 1}",
+                "TinhTrang": 1 if (day + i) % 23 == 0 else 0,
+            })
+    return sessions
+
+
+def recorded_sessions(path: str) -> list[dict]:
+    """Sessions of a recorded response, as offsets in seconds from the day of its first session"""
+    with open(path, "r", encoding="utf-8") as f:
+        rows = json.load(f)["data"][2]
+    starts = [datetime.fromisoformat(row["ThoiGianBD"]) for row in rows]
+    if not starts:
+        return []
+    origin = min(starts).replace(hour=0, minute=0, second=0, microsecond=0)
+    sessions = []
+    for row, start in zip(rows, starts):
+        end = datetime.fromisoformat(row["ThoiGianKT"])
+        sessions.append({
+            **{key: value for key, value in row.items() if key not in ("ThoiGianBD", "ThoiGianKT")},
+            "start": int((start - origin).total_seconds()),
+            "end": int((end - origin).total_seconds()),
+        })
+    return sorted(sessions, key=lambda session: session["start"])
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open many connections at once
+    request_queue_size = 512
+
+
+class StubServer:
+    """
+    The stub running in a background thread, for use from benchmarks.
+
+    with StubServer(latency_ms=50) as stub:
+        LHUCalenAPI(stub.url, ...)
+    """
+
+    def __init__(
+            self,
+            port: int = 0,
+            latency_ms: float = 50,
+            days: int = 120,
+            per_day: int = 4,
+            failure_rate: float = 0.0,
+            pad_bytes: int = 0,
+            record: str | None = None
+        ) -> None:
+        """
+        Args:
+            port: Port to listen on, 0 for any free port
+            latency_ms: Delay before every response
+            days: Days of synthetic sessions from the requested day
+            per_day: Synthetic sessions per day
+            failure_rate: Fraction of requests answered with a 503
+            pad_bytes: Extra bytes in every synthetic subject name, to grow the payload
+            record: Recorded response to serve instead of synthetic sessions
+        """
+        self.latency: float = latency_ms / 1000
+        self.failure_rate: float = failure_rate
+        self.requests: int = 0
+        # Requests being answered right now, and the most at any time
+        self.active: int = 0
+        self.peak_active: int = 0
+        self._recorded: list[dict] | None = recorded_sessions(record) if record else None
+        self._days: int = days
+        self._per_day: int = per_day
+        self._pad_bytes: int = pad_bytes
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", port), self._handler_class())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PATH}"
+
+    def sessions(self, student_id: str) -> list[dict]:
+        if self._recorded is not None:
+            return self._recorded
+        return synthetic_sessions(student_id, self._days, self._per_day, self._pad_bytes)
+
+    def response(self, form: dict[str, str]) -> dict:
+        """The body answering a request"""
+        ngay = datetime.fromisoformat(form["Ngay"].replace(" ", "T")).replace(tzinfo=None)
+        origin = ngay.replace(hour=0, minute=0, second=0, microsecond=0)
+        sessions = self.sessions(form["StudentID"])
+        page_size = int(form.get("PageSize", 30))
+        page_index = int(form.get("PageIndex", 1))
+
+        page = []
+        for session in sessions[(page_index - 1) * page_size:page_index * page_size]:
+            row = {key: value for key, value in session.items() if key not in ("start", "end")}
+            row["ThoiGianBD"] = (origin + timedelta(seconds=session["start"])).isoformat()
+            row["ThoiGianKT"] = (origin + timedelta(seconds=session["end"])).isoformat()
+            page.append(row)
+        return {"data": [[{"Total": 1}], [{"TotalRecord": len(sessions)}], page]}
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, do not let Nagle delay the body
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+                with stub._lock:
+                    stub.requests += 1
+                    stub.active += 1
+                    stub.peak_active = max(stub.peak_active, stub.active)
+                try:
+                    time.sleep(stub.latency)
+                finally:
+                    with stub._lock:
+                        stub.active -= 1
+
+                if self.path != API_PATH or random.random() < stub.failure_rate:
+                    status, body = (404 if self.path != API_PATH else 503), b"{}"
+                else:
+                    status, body = 200, json.dumps(stub.response(form), ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="lhu-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub of the LHU calendar API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50, help="Delay before every response (default: 50)")
+    parser.add_argument("--days", type=int, default=120, help="Days of synthetic sessions (default: 120)")
+    parser.add_argument("--per-day", type=int, default=4, help="Synthetic sessions per day (default: 4)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with a 503")
+    parser.add_argument("--pad-bytes", type=int, default=0, help="Extra bytes per synthetic session")
+    parser.add_argument("--record", help="Recorded API response to serve instead of synthetic sessions")
+    args = parser.parse_args()
+
+    stub = StubServer(args.port, args.latency_ms, args.days, args.per_day, args.failure_rate, args.pad_bytes, args.record)
+    print(f"Serving {stub.url}")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,77 +2,229 @@
 """
 Build script for LHU Calendar application using Nuitka.
 
-This script creates a standalone executable for the LHU Calendar application.
+This script creates a standalone executable for the LHU Calendar application,
+in one of several profiles:
+
+    onefile         single file, unpacked into a new temporary directory on every launch
+    onefile-cached  single file, unpacked once into the user cache directory and reused
+    standalone      directory with the executable and its libraries, nothing to unpack
+    slim            like onefile-cached, without the rich/pydantic modules the app never uses
+
+`--bench` runs the built executables against a pre-seeded cache and reports their
+cold and warm startup time and size.
 """
 
 import sys
 from pathlib import Path
 import subprocess
 import argparse
+import shutil
+import statistics
+import tempfile
+import time
+import tomllib
 
+# Modules the app never imports (checked by running every subcommand with them blocked),
+# left out of the slim profile
+SLIM_EXCLUDED_MODULES = [
+    'pygments',
+    'markdown_it',
+    'rich.syntax',
+    'rich.markdown',
+    'rich.traceback',
+    'rich.progress',
+    'rich.progress_bar',
+    'rich.prompt',
+    'rich.logging',
+    'rich.tree',
+    'rich.json',
+    'rich._inspect',
+    'pydantic.v1',
+    'pydantic.mypy',
+    'pydantic.experimental',
+]
 
-def main():
-    parser = argparse.ArgumentParser(description='Build LHU Calendar application with Nuitka')
-    parser.add_argument('--output-dir', default='dist', help='Output directory for executables (default: dist)')
-    parser.add_argument('--clean', action='store_true', help='Clean output directory before building')
-    parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose output')
+PROFILES = ('onefile', 'onefile-cached', 'standalone', 'slim')
 
-    args = parser.parse_args()
 
-    # Define paths
-    output_dir = Path(args.output_dir)
-    main_script = Path('src/main.py')
+def extraction_dir_spec(profile: str) -> str:
+    """Where a cached profile unpacks itself, a new directory for every profile, version and commit"""
+    with open('pyproject.toml', 'rb') as f:
+        version = tomllib.load(f)['project']['version']
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = 'dev'
+    return f'{{CACHE_DIR}}/lhu-calendar/{profile}-{version}-{commit}'
 
-    # Check if main script exists
-    if not main_script.exists():
-        print(f"Error: {main_script} not found!")
-        sys.exit(1)
 
-    # Clean output directory if requested
-    if args.clean and output_dir.exists():
-        print(f"Cleaning output directory: {output_dir}")
-        import shutil
-        shutil.rmtree(output_dir)
+def artifact_path(output_dir: Path, profile: str) -> Path:
+    """The executable a profile builds"""
+    if profile == 'standalone':
+        return output_dir / 'calen.dist' / 'calen'
+    if profile == 'onefile':
+        return output_dir / 'calen'
+    return output_dir / f'calen-{profile.removeprefix("onefile-")}'
+
+
+def artifact_size(path: Path) -> int:
+    """Bytes of the executable, or of its whole directory for the standalone profile"""
+    if path.parent.name.endswith('.dist'):
+        return sum(entry.stat().st_size for entry in path.parent.rglob('*') if entry.is_file())
+    return path.stat().st_size
+
+
+def profile_options(profile: str) -> list[str]:
+    if profile == 'standalone':
+        return ['--standalone']
+
+    options = ['--onefile']  # Create a single executable file instead of standalone directory
+    if profile in ('onefile-cached', 'slim'):
+        # Unpack once and reuse the files on later launches
+        options += [f'--onefile-tempdir-spec={extraction_dir_spec(profile)}', '--onefile-cache-mode=cached']
+    if profile == 'slim':
+        options += [f'--nofollow-import-to={module}' for module in SLIM_EXCLUDED_MODULES]
+        options += [
+            '--noinclude-pytest-mode=nofollow',
+            '--noinclude-setuptools-mode=nofollow',
+            '--noinclude-unittest-mode=nofollow',
+        ]
+    return options
+
+
+def build(profile: str, output_dir: Path, main_script: Path, verbose: bool) -> None:
+    artifact = artifact_path(output_dir, profile)
 
-    # Create output directory
-    output_dir.mkdir(exist_ok=True)
-    
     # Build command
     cmd = [
         sys.executable,
         '-m', 'nuitka',
-        '--onefile',  # Create a single executable file instead of standalone directory
+        *profile_options(profile),
         f'--output-dir={output_dir}',
-        '--output-filename=calen',  # Set the executable name
+        f'--output-filename={artifact.name}',  # Set the executable name
         '--remove-output',
     ]
 
-    if args.verbose:
+    if verbose:
         cmd.append('--verbose')
     else:
         cmd.append('--quiet')
 
     cmd.append(str(main_script))
-    
-    print(f"Building LHU Calendar application...")
+
+    print(f"Building LHU Calendar application ({profile})...")
     print(f"Command: {' '.join(cmd)}")
-    
-    try:
-        subprocess.run(cmd, check=True)
-        print(f"Build completed successfully! Executable is in {output_dir}/")
-        
-        # List the output files
-        for file_path in output_dir.rglob('*'):
-            if file_path.is_file():
-                print(f"  - {file_path}")
-                
-    except subprocess.CalledProcessError as e:
-        print(f"Build failed with return code {e.returncode}")
-        sys.exit(e.returncode)
-    except FileNotFoundError:
-        print("Error: Nuitka is not installed. Please install it with 'pip install nuitka'")
+    subprocess.run(cmd, check=True)
+
+    if profile == 'standalone':
+        # Nuitka names the directory after the script
+        built_dir = output_dir / f'{main_script.stem}.dist'
+        if artifact.parent.exists():
+            shutil.rmtree(artifact.parent)
+        built_dir.rename(artifact.parent)
+
+
+def timed_run(cmd: list[str], env: dict[str, str]) -> float:
+    """Wall time of one run in milliseconds"""
+    started = time.perf_counter()
+    proc = subprocess.run(cmd, env=env, capture_output=True)
+    elapsed = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0 or not proc.stdout:
+        raise RuntimeError(f"{cmd[0]} failed: {proc.stderr.decode(errors='replace').strip()}")
+    return elapsed
+
+
+def bench(artifacts: dict[str, Path], runs: int) -> None:
+    """
+    Cold (first launch in a fresh home, unpacking included) and warm (later launches)
+    startup of a cached `view` for every artifact, with the interpreter as reference.
+    """
+    sys.path.insert(0, str(Path('benchmarks').resolve()))
+    from startup import DAY_RANGE, STUDENT_ID, isolated_env, seed_cache
+
+    args = ['view', STUDENT_ID, '-r', str(DAY_RANGE), '--no-daemon']
+    commands = {'python -m src.main': [sys.executable, '-m', 'src.main']}
+    commands.update({profile: [str(path.resolve())] for profile, path in artifacts.items()})
+
+    print(f"\n{'artifact':<20} {'size (MB)':>10} {'cold (ms)':>10} {'warm (ms)':>10}")
+    for name, cmd in commands.items():
+        cold: list[float] = []
+        warm: list[float] = []
+        try:
+            for _ in range(runs):
+                with tempfile.TemporaryDirectory() as home:
+                    env = isolated_env(Path(home))
+                    seed_cache(env)
+                    cold.append(timed_run(cmd + args, env))
+                    warm.append(timed_run(cmd + args, env))
+                    warm.append(timed_run(cmd + args, env))
+        except RuntimeError as e:
+            print(f"{name:<20} {e}")
+            continue
+        size = f"{artifact_size(artifacts[name]) / 1024 / 1024:.1f}" if name in artifacts else '-'
+        print(f"{name:<20} {size:>10} {statistics.median(cold):>10.1f} {statistics.median(warm):>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build LHU Calendar application with Nuitka')
+    parser.add_argument('--output-dir', default='dist', help='Output directory for executables (default: dist)')
+    parser.add_argument('--clean', action='store_true', help='Clean output directory before building')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose output')
+    parser.add_argument(
+        '--profile', nargs='+', choices=[*PROFILES, 'all'], default=['onefile'],
+        help='Build profiles (default: onefile), "all" for every profile'
+    )
+    parser.add_argument('--bench', action='store_true', help='Benchmark startup time and size of the built executables')
+    parser.add_argument('--bench-runs', type=int, default=5, help='Cold and warm runs per executable (default: 5)')
+    parser.add_argument('--no-build', action='store_true', help='Only benchmark executables built earlier')
+
+    args = parser.parse_args()
+    profiles = list(PROFILES) if 'all' in args.profile else list(dict.fromkeys(args.profile))
+
+    # Define paths
+    output_dir = Path(args.output_dir)
+    main_script = Path('src/main.py')
+
+    # Check if main script exists
+    if not main_script.exists():
+        print(f"Error: {main_script} not found!")
         sys.exit(1)
 
+    if not args.no_build:
+        # Clean output directory if requested
+        if args.clean and output_dir.exists():
+            print(f"Cleaning output directory: {output_dir}")
+            shutil.rmtree(output_dir)
+
+        # Create output directory
+        output_dir.mkdir(exist_ok=True)
+
+        try:
+            for profile in profiles:
+                build(profile, output_dir, main_script, args.verbose)
+            print(f"Build completed successfully! Executables are in {output_dir}/")
+
+            # List the executables
+            for profile in profiles:
+                print(f"  - {artifact_path(output_dir, profile)} ({profile})")
+
+        except subprocess.CalledProcessError as e:
+            print(f"Build failed with return code {e.returncode}")
+            sys.exit(e.returncode)
+        except FileNotFoundError:
+            print("Error: Nuitka is not installed. Please install it with 'pip install nuitka'")
+            sys.exit(1)
+
+    if args.bench:
+        artifacts = {profile: artifact_path(output_dir, profile) for profile in profiles}
+        missing = [str(path) for path in artifacts.values() if not path.exists()]
+        if missing:
+            print(f"Error: not built: {', '.join(missing)}")
+            sys.exit(1)
+        bench(artifacts, args.bench_runs)
+
 
 if __name__ == '__main__':
     main()
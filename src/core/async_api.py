@@ -0,0 +1,339 @@
+import asyncio
+import random
+import weakref
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+
+from src.core.cache import CacheManager, iter_days
+from src.core.configurations import APIConfigs
+from src.core.async_transport import AsyncHTTPTransport, HTTPConnectionError, HTTPTimeoutError, HTTPStatusError
+from src.core.lhu_calen_api import (
+    CachedSchedule,
+    CalenItem,
+    CircuitOpenError,
+    ConnectionError,
+    LHUCalenAPI,
+    PagedDays,
+    TimeoutError,
+    page_payload,
+    parse_page,
+)
+from src.utils import profiling
+
+# In-process side of the single flight, per event loop and student, see `AsyncLHUCalenAPI._single_flight`
+_flight_locks: weakref.WeakValueDictionary[tuple, asyncio.Lock] = weakref.WeakValueDictionary()
+
+class AsyncLHUCalenAPI:
+    """
+    asyncio counterpart of `LHUCalenAPI`, for embedding schedules in async services.
+
+    Same cache, same parsing and same results; requests go through an `AsyncHTTPTransport`
+    and the cache (file or database I/O) is read and written in worker threads, so the
+    event loop is never blocked. Every call can be cancelled or bounded with
+    `asyncio.wait_for` / `asyncio.timeout`.
+
+    async with AsyncLHUCalenAPI(api_url, student_id, cache_manager) as api:
+        items = await api.get_data(7)
+
+    Stopping `iter_data` early should close it right away:
+
+    async with contextlib.aclosing(api.iter_data(30)) as items:
+        async for item in items:
+            ...
+    """
+
+    def __init__(
+            self,
+            api_url: str,
+            student_id: str,
+            cache_manager: CacheManager | None = None,
+            transport: AsyncHTTPTransport | None = None,
+            clean_expired: bool = True
+        ) -> None:
+        """
+        Args:
+            transport: Shared async HTTP transport, a new one (closed by `aclose`) is created if not provided
+            clean_expired: Whether `get_data` should periodically clean expired cache entries itself
+        """
+        self._api_url: str = api_url
+        self._student_id: str = student_id
+        self._cache_manager: CacheManager | None = cache_manager
+        self._owns_transport: bool = transport is None
+        self._transport: AsyncHTTPTransport = transport if transport is not None else AsyncHTTPTransport()
+        self._clean_expired: bool = clean_expired
+        # Cache reading and decoding are the synchronous client's, run in worker threads
+        self._sync: LHUCalenAPI = LHUCalenAPI(api_url, student_id, cache_manager, clean_expired=False)
+
+    @property
+    def student_id(self) -> str:
+        return self._student_id
+
+    @property
+    def transport(self) -> AsyncHTTPTransport:
+        return self._transport
+
+    async def aclose(self) -> None:
+        """Close the transport, unless it was provided by the caller"""
+        if self._owns_transport:
+            await self._transport.aclose()
+
+    async def __aenter__(self) -> "AsyncLHUCalenAPI":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    @asynccontextmanager
+    async def _single_flight(self) -> AsyncIterator[bool]:
+        """`LHUCalenAPI._single_flight`, the lock being waited for in a worker thread
+
+        Tasks of this process take turns on an `asyncio.Lock` first, so that only one of them
+        holds a worker thread waiting for the file lock.
+        """
+        if self._cache_manager is None:
+            yield False
+            return
+
+        key = (asyncio.get_running_loop(), self._api_url, self._student_id)
+        flight_lock = _flight_locks.get(key)
+        if flight_lock is None:
+            flight_lock = _flight_locks[key] = asyncio.Lock()
+
+        waited_here = flight_lock.locked()
+        async with flight_lock:
+            context = self._cache_manager.single_flight(self._api_url, self._student_id)
+            entering = asyncio.ensure_future(asyncio.to_thread(context.__enter__))
+            try:
+                waited = await asyncio.shield(entering)
+            except asyncio.CancelledError:
+                # The thread still waits for the lock, release it as soon as it is taken
+                def release(done: asyncio.Future) -> None:
+                    if not done.cancelled() and done.exception() is None:
+                        context.__exit__(None, None, None)
+
+                entering.add_done_callback(release)
+                raise
+            try:
+                yield waited_here or waited
+            finally:
+                # Unlocking does not block
+                context.__exit__(None, None, None)
+
+    async def _read_cache(self, first_day: date, last_day: date, max_age: timedelta | None = None) -> dict[date, tuple[list[CalenItem], datetime]]:
+        if self._cache_manager is None:
+            return {}
+        return await asyncio.to_thread(self._sync._read_cache, first_day, last_day, max_age)
+
+    async def _iter_fetch_and_store(self, first_day: date, last_day: date) -> AsyncIterator[dict[date, list[CalenItem]]]:
+        """Request the days from `first_day` to `last_day`, yielding them as they arrive (in day order)
+        after storing the fully covered ones in cache"""
+        async for fetched_days, complete in self._fetch_days(first_day, last_day):
+            if self._cache_manager is not None and complete and fetched_days:
+                await asyncio.to_thread(
+                    self._cache_manager.set,
+                    self._api_url,
+                    self._student_id,
+                    {day: [item.to_row() for item in items] for day, items in fetched_days.items()}
+                )
+            yield fetched_days
+
+    async def get_data(self, day_range: int, dt: datetime | None = None) -> list[CalenItem]:
+        """Fetch data from the API, use current time if `dt` is not provided
+
+        Days already covered by the cache are answered from it, only the missing days are requested.
+
+        Raises:
+            `ConnectionError` : When having network errors
+            `TimeoutError` : When the request have not responsed within 10s
+            `HTTPStatusError` : When the API responds with an error status
+        """
+        return [item async for item in self.iter_data(day_range, dt)]
+
+    async def iter_data(self, day_range: int, dt: datetime | None = None) -> AsyncIterator[CalenItem]:
+        """Same as `get_data`, but items are yielded in order as soon as the page holding their day arrives
+
+        Raises:
+            `ConnectionError` : When having network errors
+            `TimeoutError` : When the request have not responsed within 10s
+            `HTTPStatusError` : When the API responds with an error status
+        """
+        dt = LHUCalenAPI._normalize_dt(dt)
+        end_date = dt + timedelta(days=day_range)
+        first_day = dt.date()
+        last_day = end_date.date()
+
+        # Periodically clean expired cache entries (about 10% of the time)
+        if self._cache_manager is not None and self._clean_expired and random.random() < 0.1:
+            await asyncio.to_thread(self._cache_manager.clear_expired)
+
+        cached: dict[date, list[CalenItem]] = {
+            day: items
+            for day, (items, _) in (await self._read_cache(first_day, last_day)).items()
+        }
+
+        def in_range(items: list[CalenItem]) -> list[CalenItem]:
+            return [item for item in items if item.end_time <= end_date and item.start_time >= dt]
+
+        missing_days = [day for day in iter_days(first_day, last_day) if day not in cached]
+        if not missing_days:
+            for day in iter_days(first_day, last_day):
+                for item in in_range(cached[day]):
+                    yield item
+            return
+
+        async with self._single_flight() as waited:
+            if waited:
+                # Another invocation fetched this student meanwhile, only fetch what it did not store
+                cached.update(
+                    (day, items)
+                    for day, (items, _) in (await self._read_cache(missing_days[0], missing_days[-1])).items()
+                )
+                missing_days = [day for day in missing_days if day not in cached]
+                if not missing_days:
+                    for day in iter_days(first_day, last_day):
+                        for item in in_range(cached[day]):
+                            yield item
+                    return
+
+            for day in iter_days(first_day, missing_days[0] - timedelta(days=1)):
+                for item in in_range(cached[day]):
+                    yield item
+            # One request covering the span of missing days, page by page
+            async for fetched_days in self._iter_fetch_and_store(missing_days[0], missing_days[-1]):
+                for day in sorted(fetched_days):
+                    for item in in_range(fetched_days[day]):
+                        yield item
+        for day in iter_days(missing_days[-1] + timedelta(days=1), last_day):
+            for item in in_range(cached[day]):
+                yield item
+
+    async def get_cached_data(self, day_range: int, dt: datetime | None = None) -> CachedSchedule | None:
+        """Answer from the cache only, see `LHUCalenAPI.get_cached_data`
+
+        Returns:
+            The cached schedule, `None` if some day of the range is not cached
+        """
+        if self._cache_manager is None:
+            return None
+        return await asyncio.to_thread(self._sync.get_cached_data, day_range, dt)
+
+    async def refresh(self, day_range: int, dt: datetime | None = None) -> list[CalenItem]:
+        """Fetch the whole range from the API, ignoring and then updating the cache
+
+        Raises:
+            `ConnectionError` : When having network errors
+            `TimeoutError` : When the request have not responsed within 10s
+            `HTTPStatusError` : When the API responds with an error status
+        """
+        dt = LHUCalenAPI._normalize_dt(dt)
+        end_date = dt + timedelta(days=day_range)
+        items_by_day: dict[date, list[CalenItem]] = {}
+        async for fetched_days in self._iter_fetch_and_store(dt.date(), end_date.date()):
+            items_by_day.update(fetched_days)
+        return LHUCalenAPI._select_items(items_by_day, dt, end_date)
+
+    async def _fetch_page(self, first_day: date, page_index: int) -> tuple[list[CalenItem], int | None]:
+        """Request one page of the schedule starting at `first_day`
+
+        Returns:
+            The items of the page, and the total number of items if the response reports it
+        """
+        breaker = self._cache_manager.circuit_breaker if self._cache_manager is not None else None
+        if breaker is not None:
+            retry_at = await asyncio.to_thread(breaker.check, self._api_url)
+            if retry_at is not None:
+                profiling.count("circuit.rejected")
+                raise CircuitOpenError(datetime.fromtimestamp(retry_at))
+
+        try:
+            # Concurrent callers asking for the same student, date and page share one request
+            body = await self._transport.post_json(
+                self._api_url,
+                page_payload(self._student_id, first_day, page_index),
+                coalesce_key=(self._api_url, self._student_id, first_day, page_index)
+            )
+        except HTTPConnectionError:
+            await self._record_failure()
+            raise ConnectionError()
+        except HTTPTimeoutError:
+            await self._record_failure()
+            raise TimeoutError()
+        except HTTPStatusError as e:
+            # Server errors (still failing after the retries) mean the API is down, client errors do not
+            if e.status_code >= 500:
+                await self._record_failure()
+            elif breaker is not None:
+                await asyncio.to_thread(breaker.record_success, self._api_url)
+            raise
+        except Exception:
+            await self._record_failure()
+            raise
+        except BaseException:
+            # Cancelled (another page ended the range) or interrupted, there is no outcome but a
+            # probe must not stay taken. Not awaited, the task is being cancelled
+            if breaker is not None:
+                breaker.release_probe(self._api_url)
+            raise
+        if breaker is not None:
+            await asyncio.to_thread(breaker.record_success, self._api_url)
+
+        return parse_page(body)
+
+    async def _record_failure(self) -> None:
+        profiling.count("circuit.failures")
+        breaker = self._cache_manager.circuit_breaker if self._cache_manager is not None else None
+        if breaker is not None:
+            await asyncio.to_thread(breaker.record_failure, self._api_url)
+
+    async def _fetch_days(self, first_day: date, last_day: date) -> AsyncIterator[tuple[dict[date, list[CalenItem]], bool]]:
+        """Request the schedule starting at `first_day` page by page and group the items by day,
+        like `LHUCalenAPI._fetch_days` with tasks instead of threads
+
+        Yields:
+            Items of consecutive days from `first_day` to `last_day` as soon as they are complete,
+            and whether they are (`False` only for the days left when `APIConfigs.MAX_PAGES` is reached)
+        """
+        days = PagedDays(first_day, last_day)
+        first_page, total = await self._fetch_page(first_day, 1)
+        if days.consume(first_page):
+            yield days.take_until(last_day), True
+            return
+        yield days.complete_days(first_page), True
+
+        total_pages, last_page, needed_page = days.plan(first_page, total)
+
+        next_page = 2
+        consumed_page = 1
+        arrived: dict[int, list[CalenItem]] = {}
+        in_flight: dict[asyncio.Task, int] = {}
+        try:
+            while consumed_page < last_page:
+                if next_page > needed_page and not in_flight:
+                    # The guess was short, keep going
+                    needed_page = min(last_page, needed_page + APIConfigs.PAGE_WORKERS)
+                while next_page <= needed_page and len(in_flight) < APIConfigs.PAGE_WORKERS:
+                    in_flight[asyncio.ensure_future(self._fetch_page(first_day, next_page))] = next_page
+                    next_page += 1
+
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    arrived[in_flight.pop(task)] = task.result()[0]
+
+                # Pages are consumed in order, a page that arrives early waits for the previous ones
+                while consumed_page + 1 in arrived:
+                    consumed_page += 1
+                    page = arrived.pop(consumed_page)
+                    if days.consume(page):
+                        yield days.take_until(last_day), True
+                        return
+                    yield days.complete_days(page), True
+        finally:
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                # No page outlives the request, and their errors are not reported as unhandled
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+        # Every page was read (the total was a multiple of the page size), unless the page limit was hit first
+        yield days.take_until(last_day), total_pages is not None and total_pages <= APIConfigs.MAX_PAGES
@@ -0,0 +1,330 @@
+import asyncio
+import gzip
+import json
+import random
+import ssl
+import time
+import zlib
+from collections.abc import Hashable
+from typing import Any
+from urllib.parse import urlencode, urlsplit
+
+from src.core.configurations import TransportConfigs
+from src.core.transport import RETRYABLE_STATUS_CODES
+from src.utils import profiling
+
+class HTTPConnectionError(Exception):
+    """The server could not be reached, or closed the connection before responding"""
+
+class HTTPTimeoutError(Exception):
+    """The server did not connect or respond in time"""
+
+class HTTPStatusError(Exception):
+    """The server responded with an error status"""
+
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code: int = status_code
+
+class _StaleConnection(Exception):
+    """A kept-alive connection was closed by the server before it answered, the request can be sent again"""
+
+class _Connection:
+    __slots__ = ("reader", "writer", "reused")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader: asyncio.StreamReader = reader
+        self.writer: asyncio.StreamWriter = writer
+        self.reused: bool = False
+
+    @property
+    def is_open(self) -> bool:
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self) -> None:
+        self.writer.close()
+
+class _SharedCall:
+    """A request shared by every caller asking for the same key."""
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task: asyncio.Task = task
+        self.waiters: int = 0
+
+class _AsyncRateLimiter:
+    """Spaces requests at least `1 / rate` seconds apart, across every task."""
+
+    def __init__(self, rate: float) -> None:
+        self._interval: float = 1 / rate
+        self._next_slot: float = 0.0
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class AsyncHTTPTransport:
+    """
+    asyncio counterpart of `HTTPTransport`, on the standard library's streams only.
+
+    HTTP/1.1 over kept-alive connections pooled per host, the same retries with jittered
+    exponential backoff and the same coalescing of concurrent identical requests. A
+    semaphore bounds the requests in flight. Connect and read timeouts are enforced with
+    `asyncio.timeout`; cancelling a caller (e.g. from `asyncio.wait_for`) is immediate and
+    never leaves a half-read connection in the pool.
+
+    A transport belongs to the event loop it is first used in.
+    """
+
+    def __init__(
+            self,
+            pool_size: int = TransportConfigs.POOL_SIZE,
+            connect_timeout: float = TransportConfigs.CONNECT_TIMEOUT,
+            read_timeout: float = TransportConfigs.READ_TIMEOUT,
+            max_retries: int = TransportConfigs.MAX_RETRIES,
+            backoff_base: float = TransportConfigs.BACKOFF_BASE,
+            backoff_max: float = TransportConfigs.BACKOFF_MAX,
+            max_rate: float = 0,
+            max_concurrency: int | None = None
+        ) -> None:
+        """
+        Args:
+            pool_size: Maximum number of kept-alive idle connections per host
+            connect_timeout: Seconds to wait for the connection to be established
+            read_timeout: Seconds to wait for the whole response once the request is sent
+            max_retries: Number of retries after the first attempt
+            backoff_base: Upper bound in seconds of the first retry delay, doubled on every retry
+            backoff_max: Upper bound in seconds of any retry delay
+            max_rate: Requests per second at most, 0 for no limit
+            max_concurrency: Requests in flight at most, `pool_size` if not provided
+        """
+        self._pool_size: int = max(1, pool_size)
+        self._connect_timeout: float = connect_timeout
+        self._read_timeout: float = read_timeout
+        self._max_retries: int = max(0, max_retries)
+        self._backoff_base: float = backoff_base
+        self._backoff_max: float = backoff_max
+        self._rate_limiter: _AsyncRateLimiter | None = _AsyncRateLimiter(max_rate) if max_rate > 0 else None
+        self._semaphore: asyncio.Semaphore = asyncio.Semaphore(max(1, max_concurrency or pool_size))
+        self._ssl_context: ssl.SSLContext | None = None
+
+        self._idle: dict[tuple[str, str, int], list[_Connection]] = {}
+        self._in_flight: dict[Hashable, _SharedCall] = {}
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full jitter: a random delay up to the exponential bound of `attempt`"""
+        return random.uniform(0, min(self._backoff_max, self._backoff_base * (2 ** attempt)))
+
+    async def _connect(self, scheme: str, host: str, port: int) -> _Connection:
+        idle = self._idle.get((scheme, host, port))
+        while idle:
+            connection = idle.pop()
+            if connection.is_open:
+                connection.reused = True
+                return connection
+            connection.close()
+
+        if scheme == "https" and self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+        try:
+            async with asyncio.timeout(self._connect_timeout):
+                reader, writer = await asyncio.open_connection(
+                    host, port, ssl=self._ssl_context if scheme == "https" else None
+                )
+        except TimeoutError:
+            raise HTTPTimeoutError(f"Connecting to {host}:{port} timed out")
+        except OSError as e:
+            raise HTTPConnectionError(str(e))
+        return _Connection(reader, writer)
+
+    def _release(self, key: tuple[str, str, int], connection: _Connection) -> None:
+        idle = self._idle.setdefault(key, [])
+        if connection.is_open and len(idle) < self._pool_size:
+            idle.append(connection)
+        else:
+            connection.close()
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> tuple[int, bytes, bool]:
+        """
+        Returns:
+            The status code, the decoded body and whether the connection can be kept alive
+
+        Raises:
+            `ValueError` : When the response is malformed or truncated
+        """
+        status_line = await reader.readline()
+        if not status_line:
+            raise _StaleConnection()
+        if not status_line.endswith(b"\n"):
+            raise ValueError(f"Truncated status line: {status_line!r}")
+        version, status, *_ = status_line.decode("latin-1").split(" ", 2)
+        status_code = int(status)
+
+        headers: dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            chunks: list[bytes] = []
+            while True:
+                size = int((await reader.readline()).split(b";", 1)[0], 16)
+                if size == 0:
+                    # Trailers, up to the blank line
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            # Delimited by the end of the connection
+            body = await reader.read()
+            keep_alive = False
+
+        encoding = headers.get("content-encoding", "").lower()
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            body = zlib.decompress(body)
+        return status_code, body, keep_alive
+
+    async def _send(self, url: str, payload: bytes) -> tuple[int, bytes]:
+        """Send one request, on a pooled connection if there is one"""
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "", port)
+        target = parts.path or "/"
+        if parts.query:
+            target += f"?{parts.query}"
+        request = (
+            f"POST {target} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            "Content-Type: application/x-www-form-urlencoded\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Accept: application/json\r\n"
+            "Accept-Encoding: gzip, deflate\r\n"
+            "Connection: keep-alive\r\n"
+            "\r\n"
+        ).encode("latin-1") + payload
+
+        while True:
+            connection = await self._connect(*key)
+            try:
+                async with asyncio.timeout(self._read_timeout):
+                    connection.writer.write(request)
+                    await connection.writer.drain()
+                    status, body, keep_alive = await self._read_response(connection.reader)
+            except (_StaleConnection, ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError) as e:
+                connection.close()
+                if connection.reused:
+                    # The server dropped the idle connection, send again on a new one
+                    continue
+                raise HTTPConnectionError(str(e) or "Connection closed by the server")
+            except TimeoutError:
+                connection.close()
+                raise HTTPTimeoutError(f"No response from {key[1]}:{key[2]} in time")
+            except (ValueError, zlib.error) as e:
+                # Like a dropped connection, retried and reported as a connection error
+                connection.close()
+                raise HTTPConnectionError(f"Malformed response from {key[1]}:{key[2]}: {e}")
+            except OSError as e:
+                connection.close()
+                raise HTTPConnectionError(str(e))
+            except BaseException:
+                # Cancelled: the connection is in an unknown state
+                connection.close()
+                raise
+
+            if keep_alive:
+                self._release(key, connection)
+            else:
+                connection.close()
+            if profiling.is_enabled():
+                profiling.count("http.requests")
+                profiling.count("http.bytes_sent", len(request))
+                profiling.count("http.bytes_received", len(body))
+            return status, body
+
+    async def _post_with_retries(self, url: str, data: dict[str, Any]) -> Any:
+        payload = urlencode(data).encode("utf-8")
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire()
+            try:
+                async with self._semaphore:
+                    status, body = await self._send(url, payload)
+                if status not in RETRYABLE_STATUS_CODES or attempt >= self._max_retries:
+                    if status >= 400:
+                        raise HTTPStatusError(status)
+                    return json.loads(body)
+            except (HTTPConnectionError, HTTPTimeoutError):
+                if attempt >= self._max_retries:
+                    raise
+
+            await asyncio.sleep(self._backoff_delay(attempt))
+            attempt += 1
+
+    async def post_json(self, url: str, data: dict[str, Any], coalesce_key: Hashable | None = None) -> Any:
+        """POST form data and return the decoded JSON body
+
+        Args:
+            coalesce_key: Concurrent calls with the same key share one request and its result.
+                A caller that is cancelled stops waiting, the shared request goes on for the
+                others and is cancelled with the last one.
+
+        Raises:
+            `HTTPConnectionError` : When the server can not be reached after every retry
+            `HTTPTimeoutError` : When the server does not respond in time after every retry
+            `HTTPStatusError` : When the server responds with an error status
+        """
+        if coalesce_key is None:
+            return await self._post_with_retries(url, data)
+
+        call = self._in_flight.get(coalesce_key)
+        if call is None:
+            call = _SharedCall(asyncio.ensure_future(self._post_with_retries(url, data)))
+            self._in_flight[coalesce_key] = call
+
+            def forget(done: asyncio.Future) -> None:
+                del self._in_flight[coalesce_key]
+                # Retrieved here so that a request nobody waits for anymore is not reported as unhandled
+                if not done.cancelled():
+                    done.exception()
+
+            call.task.add_done_callback(forget)
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1:
+                # The last caller gave up, nobody needs the response anymore
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    async def aclose(self) -> None:
+        """Close the idle connections, requests still in flight close theirs when done"""
+        connections = [connection for idle in self._idle.values() for connection in idle]
+        self._idle.clear()
+        for connection in connections:
+            connection.close()
+        for connection in connections:
+            try:
+                await connection.writer.wait_closed()
+            except OSError:
+                pass
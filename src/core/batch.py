@@ -0,0 +1,146 @@
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from src.core.cache import CacheManager
+from src.core.configurations import BatchConfigs
+from src.core.lhu_calen_api import LHUCalenAPI, CalenItem
+from src.core.schedule_table import ScheduleTable, ScheduleTableBuilder
+from src.core.transport import HTTPTransport
+
+@dataclass
+class BatchResult:
+    """Outcome of fetching the schedule of a single student in a batch."""
+    student_id: str
+    items: list[CalenItem] = field(default_factory=list)
+    error: Exception | None = None
+    # Wall-clock time spent on this student, in seconds
+    elapsed: float = 0.0
+    # Whether the student was skipped because its cached schedule is still fresh (see `warm`)
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class LHUCalenBatchAPI:
+    """
+    Fetch schedules of many students concurrently.
+
+    All workers share one `HTTPTransport` and the same `CacheManager`, so the TLS
+    handshake is paid once per pooled connection instead of once per student.
+    """
+
+    def __init__(
+            self,
+            api_url: str,
+            cache_manager: CacheManager | None = None,
+            max_workers: int = BatchConfigs.MAX_WORKERS,
+            transport: HTTPTransport | None = None,
+            max_rate: float = 0
+        ) -> None:
+        """
+        Args:
+            transport: Shared HTTP transport, a new one with a pool of `max_workers` connections if not provided
+            max_rate: Requests per second at most of the transport created when none is provided, 0 for no limit
+        """
+        self._api_url: str = api_url
+        self._cache_manager: CacheManager | None = cache_manager
+        self._max_workers: int = max(1, max_workers)
+        self._owns_transport: bool = transport is None
+        self._transport: HTTPTransport = transport if transport is not None else HTTPTransport(pool_size=self._max_workers, max_rate=max_rate)
+
+    def _api(self, student_id: str) -> LHUCalenAPI:
+        return LHUCalenAPI(
+            api_url=self._api_url,
+            student_id=student_id,
+            cache_manager=self._cache_manager,
+            transport=self._transport,
+            clean_expired=False
+        )
+
+    @staticmethod
+    def _normalize_dt(dt: datetime | None) -> datetime:
+        if dt is None:
+            return datetime.now(timezone.utc)
+        if dt.tzinfo is None:
+            return dt.replace(tzinfo=timezone.utc)
+        return dt
+
+    def _fetch_one(self, student_id: str, day_range: int, dt: datetime) -> BatchResult:
+        api = self._api(student_id)
+        started = time.perf_counter()
+        try:
+            items = api.get_data(day_range, dt)
+        except Exception as e:
+            return BatchResult(student_id, error=e, elapsed=time.perf_counter() - started)
+        return BatchResult(student_id, items=items, elapsed=time.perf_counter() - started)
+
+    def iter_data(self, student_ids: Iterable[str], day_range: int, dt: datetime | None = None) -> Iterator[BatchResult]:
+        """Fetch data for every student, yielding results as soon as each one completes"""
+
+        # Use one query time for the whole batch so every student covers the same window
+        dt = self._normalize_dt(dt)
+
+        # Clean once up front instead of letting every worker scan the cache directory
+        if self._cache_manager is not None:
+            self._cache_manager.clear_expired()
+
+        executor = ThreadPoolExecutor(max_workers=self._max_workers)
+        try:
+            futures = [
+                executor.submit(self._fetch_one, student_id, day_range, dt)
+                for student_id in student_ids
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # When interrupted, students that have not started are dropped, running ones still finish
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def warm(self, student_ids: Iterable[str], day_range: int, dt: datetime | None = None) -> Iterator[BatchResult]:
+        """Fill the cache for every student, skipping those whose cached range is still fresh
+
+        Completed students stay cached, so an interrupted warm-up resumes where it stopped when run again.
+        """
+        dt = self._normalize_dt(dt)
+        pending: list[str] = []
+        for student_id in student_ids:
+            cached = self._api(student_id).get_cached_data(day_range, dt)
+            if cached is not None and not cached.is_stale:
+                yield BatchResult(student_id, skipped=True)
+            else:
+                pending.append(student_id)
+        yield from self.iter_data(pending, day_range, dt)
+
+    def get_data(self, student_ids: Iterable[str], day_range: int, dt: datetime | None = None) -> list[BatchResult]:
+        """Fetch data for every student, results are returned in the order of `student_ids`"""
+        student_ids = list(dict.fromkeys(student_ids))
+        order = {student_id: i for i, student_id in enumerate(student_ids)}
+        results = list(self.iter_data(student_ids, day_range, dt))
+        results.sort(key=lambda result: order[result.student_id])
+        return results
+
+    def get_table(self, student_ids: Iterable[str], day_range: int, dt: datetime | None = None) -> tuple[ScheduleTable, list[BatchResult]]:
+        """Fetch data for every student into one columnar table, see `ScheduleTable`
+
+        Each student's items are added as soon as it completes, so they never all live as `CalenItem`s at once.
+
+        Returns:
+            The sessions of every student fetched successfully, and the results of the students that failed
+        """
+        builder = ScheduleTableBuilder()
+        failed: list[BatchResult] = []
+        for result in self.iter_data(dict.fromkeys(student_ids), day_range, dt):
+            if result.ok:
+                builder.extend(result.student_id, result.items)
+                result.items = []
+            else:
+                failed.append(result)
+        return builder.build(), failed
+
+    def close(self) -> None:
+        if self._owns_transport:
+            self._transport.close()
@@ -0,0 +1,269 @@
+import mmap
+import struct
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from src.core.cache import CacheManager, CachedDay
+from src.utils.files import atomic_write
+
+# Layout of a store file, all integers little-endian:
+#
+#   header     magic, version, coverage count, record count, string count
+#   coverage   (first day ordinal, last day ordinal, fetched_at epoch) per covered interval
+#   records    (start epoch, end epoch, room, subject, facility, flags) sorted by start,
+#              names are indexes into the string table
+#   strings    end offset of every string, then the UTF-8 blob; strings 0 and 1 are
+#              the API URL and the student ID
+_MAGIC = b"LHUC"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHxxIII")
+_COVERAGE = struct.Struct("<iid")
+_RECORD = struct.Struct("<qqIIIB3x")
+_OFFSET = struct.Struct("<I")
+_START = struct.Struct("<q")
+
+_FLAG_CANCELLED = 1
+_SECONDS_PER_DAY = 86400
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+class _StartTimes:
+    """Read-only sequence over the start times of the records, for `bisect`"""
+
+    def __init__(self, buffer: mmap.mmap, offset: int, count: int) -> None:
+        self._buffer = buffer
+        self._offset = offset
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> int:
+        return _START.unpack_from(self._buffer, self._offset + i * _RECORD.size)[0]
+
+class _StoreView:
+    """A store file mapped in memory, records and strings are decoded on demand"""
+
+    def __init__(self, buffer: mmap.mmap) -> None:
+        magic, version, coverage_count, record_count, string_count = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a cache store")
+
+        self._buffer = buffer
+        self.coverage: list[tuple[int, int, float]] = [
+            _COVERAGE.unpack_from(buffer, _HEADER.size + i * _COVERAGE.size)
+            for i in range(coverage_count)
+        ]
+        self._records_offset = _HEADER.size + coverage_count * _COVERAGE.size
+        self.record_count = record_count
+        self._string_offsets_offset = self._records_offset + record_count * _RECORD.size
+        self._string_count = string_count
+        self._blob_offset = self._string_offsets_offset + string_count * _OFFSET.size
+        self._strings: list[str] | None = None
+
+        if self._blob_offset > len(buffer):
+            raise ValueError("Truncated cache store")
+
+    @property
+    def strings(self) -> list[str]:
+        """The string table, decoded once on first use (it only holds distinct names)"""
+        if self._strings is None:
+            end_offsets = [
+                offset for (offset,) in
+                _OFFSET.iter_unpack(self._buffer[self._string_offsets_offset:self._blob_offset])
+            ]
+            blob = self._buffer[self._blob_offset:self._blob_offset + (end_offsets[-1] if end_offsets else 0)]
+            start_offsets = [0, *end_offsets[:-1]]
+            self._strings = [blob[start:end].decode("utf-8") for start, end in zip(start_offsets, end_offsets)]
+        return self._strings
+
+    def find(self, start: int) -> int:
+        """Index of the first record starting at or after `start`"""
+        return bisect_left(_StartTimes(self._buffer, self._records_offset, self.record_count), start)
+
+    def rows(self, first: int, last: int) -> list[tuple[int, int, str, str, str, bool]]:
+        """Records `first` to `last` (exclusive) as `CalenItem.to_row` rows"""
+        if last <= first:
+            return []
+        chunk = self._buffer[self._records_offset + first * _RECORD.size:self._records_offset + last * _RECORD.size]
+        strings = self.strings
+        try:
+            return [
+                (start, end, strings[room], strings[subject], strings[facility], bool(flags & _FLAG_CANCELLED))
+                for start, end, room, subject, facility, flags in _RECORD.iter_unpack(chunk)
+            ]
+        except IndexError:
+            raise ValueError("Invalid string index")
+
+def _day_of(epoch: int) -> date:
+    return date.fromordinal(_EPOCH_ORDINAL + epoch // _SECONDS_PER_DAY)
+
+def _day_start(day: date) -> int:
+    return (day.toordinal() - _EPOCH_ORDINAL) * _SECONDS_PER_DAY
+
+class BinaryCacheManager(CacheManager):
+    """
+    A cache manager storing each student in a compact binary file.
+
+    Times are fixed-width epoch seconds and names are kept once in a string table.
+    Records are sorted by start time, so `get` maps the file and binary-searches
+    straight to the requested days without decoding the rest of the store.
+
+    Items must be rows as written by `CalenItem.to_row`.
+    """
+
+    FILE_SUFFIX: str = ".bin"
+
+    @staticmethod
+    def _open_view(cache_file: Path) -> tuple[_StoreView, mmap.mmap]:
+        with open(cache_file, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return _StoreView(buffer), buffer
+        except (ValueError, struct.error):
+            buffer.close()
+            raise
+
+    def _read_store(self, cache_file: Path) -> tuple[str, str, dict[date, CachedDay]] | None:
+        """
+        Read and decode a whole store, `None` if it does not exist or can not be read.
+        """
+        if not cache_file.exists():
+            return None
+
+        try:
+            view, buffer = self._open_view(cache_file)
+            try:
+                rows = view.rows(0, view.record_count)
+                api_url, student_id = view.strings[0], view.strings[1]
+                coverage = view.coverage
+            finally:
+                buffer.close()
+        except (ValueError, struct.error, UnicodeDecodeError, OSError):
+            # If there's any issue reading the cache, return None; the next `set` replaces the file
+            return None
+
+        rows_by_day: dict[date, list] = {}
+        for row in rows:
+            rows_by_day.setdefault(_day_of(row[0]), []).append(row)
+
+        days: dict[date, CachedDay] = {}
+        for first_ordinal, last_ordinal, fetched_at in coverage:
+            fetched = datetime.fromtimestamp(fetched_at)
+            for ordinal in range(first_ordinal, last_ordinal + 1):
+                day = date.fromordinal(ordinal)
+                days[day] = CachedDay(rows_by_day.get(day, []), fetched)
+        return api_url, student_id, days
+
+    def _write_store(self, cache_file: Path, api_url: str, student_id: str, days: dict[date, CachedDay]) -> None:
+        # Coverage as runs of consecutive days sharing a fetch time
+        coverage: list[tuple[int, int, float]] = []
+        for day in sorted(days):
+            fetched_at = days[day].fetched_at.timestamp()
+            ordinal = day.toordinal()
+            if coverage and coverage[-1][1] == ordinal - 1 and coverage[-1][2] == fetched_at:
+                coverage[-1] = (coverage[-1][0], ordinal, fetched_at)
+            else:
+                coverage.append((ordinal, ordinal, fetched_at))
+
+        string_list: list[str] = [api_url, student_id]
+        strings: dict[str, int] = {}
+
+        def intern(value: str) -> int:
+            index = strings.get(value)
+            if index is None:
+                index = strings[value] = len(string_list)
+                string_list.append(value)
+            return index
+
+        rows = sorted((row for cached_day in days.values() for row in cached_day.items), key=lambda row: row[0])
+        records = bytearray(_RECORD.size * len(rows))
+        for i, (start, end, room_name, subject_name, facility_name, is_cancelled) in enumerate(rows):
+            _RECORD.pack_into(
+                records, i * _RECORD.size,
+                start, end, intern(room_name), intern(subject_name), intern(facility_name),
+                _FLAG_CANCELLED if is_cancelled else 0
+            )
+
+        encoded = [value.encode("utf-8") for value in string_list]
+        offsets = bytearray()
+        end_offset = 0
+        for value in encoded:
+            end_offset += len(value)
+            offsets += _OFFSET.pack(end_offset)
+
+        data = b"".join([
+            _HEADER.pack(_MAGIC, _VERSION, len(coverage), len(rows), len(encoded)),
+            b"".join(_COVERAGE.pack(*entry) for entry in coverage),
+            bytes(records),
+            bytes(offsets),
+            *encoded,
+        ])
+
+        try:
+            # Readers never see a partly written store, mapped readers keep the old file
+            atomic_write(cache_file, data)
+        except OSError:
+            # If we can't write to cache, just ignore (don't break the app)
+            pass
+
+    def get(
+            self,
+            api_url: str,
+            student_id: str,
+            first_day: date,
+            last_day: date,
+            max_age: timedelta | None = None
+        ) -> dict[date, CachedDay]:
+        """
+        Retrieve the cached days between `first_day` and `last_day` (inclusive) that haven't expired.
+
+        Only the records of those days are read from the mapped file.
+        """
+        if max_age is None:
+            max_age = self.ttl
+
+        cache_key = self._get_cache_key(api_url, student_id)
+        cache_file = self._get_cache_file_path(cache_key)
+        if not cache_file.exists():
+            self._manifest.record_access(cache_key, hit=False)
+            return {}
+
+        min_fetched_at = (datetime.now() - max_age).timestamp()
+        first_ordinal = first_day.toordinal()
+        last_ordinal = last_day.toordinal()
+        try:
+            view, buffer = self._open_view(cache_file)
+            try:
+                fetched_by_day: dict[date, datetime] = {}
+                for covered_first, covered_last, fetched_at in view.coverage:
+                    if fetched_at < min_fetched_at:
+                        continue
+                    for ordinal in range(max(covered_first, first_ordinal), min(covered_last, last_ordinal) + 1):
+                        fetched_by_day[date.fromordinal(ordinal)] = datetime.fromtimestamp(fetched_at)
+                if not fetched_by_day:
+                    self._manifest.record_access(cache_key, hit=False)
+                    return {}
+
+                window_first = view.find(_day_start(min(fetched_by_day)))
+                window_last = view.find(_day_start(max(fetched_by_day) + timedelta(days=1)))
+                rows = view.rows(window_first, window_last)
+            finally:
+                buffer.close()
+        except (ValueError, struct.error, UnicodeDecodeError, OSError):
+            self._manifest.record_access(cache_key, hit=False)
+            return {}
+
+        self._manifest.record_access(cache_key, hit=len(fetched_by_day) == last_ordinal - first_ordinal + 1)
+        days = {day: CachedDay([], fetched_at) for day, fetched_at in fetched_by_day.items()}
+        # Rows are sorted, so consecutive rows mostly fall on the same day
+        current_day_number: int | None = None
+        current_items: list | None = None
+        for row in rows:
+            day_number = row[0] // _SECONDS_PER_DAY
+            if day_number != current_day_number:
+                current_day_number = day_number
+                cached_day = days.get(date.fromordinal(_EPOCH_ORDINAL + day_number))
+                current_items = cached_day.items if cached_day is not None else None
+            if current_items is not None:
+                current_items.append(row)
+        return days
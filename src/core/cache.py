@@ -1,128 +1,381 @@
+import atexit
 import json
-from datetime import datetime, timedelta
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from hashlib import md5
+from typing import TYPE_CHECKING
 import platformdirs
+from src.core.manifest import CacheManifest, CacheStats
+from src.utils.files import FileLock, atomic_write
+
+if TYPE_CHECKING:
+    from src.core.circuit_breaker import CircuitBreaker
+    from src.core.room_index import RoomIndex
+
+@dataclass
+class CachedDay:
+    """Schedule items of one calendar day and when they were fetched, items are opaque JSON rows."""
+    items: list[list]
+    fetched_at: datetime
+
+def iter_days(first_day: date, last_day: date) -> list[date]:
+    """All days from `first_day` to `last_day`, both inclusive."""
+    return [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
 
 class CacheManager:
     """
     A simple file-based cache manager for storing API responses.
+
+    Each student has a single store indexed by calendar day. The store records which day
+    intervals are covered and when they were fetched, so any query range can be answered
+    from the days that are already covered.
+
+    A manifest indexes the store files, expiry and LRU eviction run from it alone.
+    Stored sessions are also indexed by room, see `room_index`.
+
+    Several invocations may share the cache: stores are replaced atomically, `set`
+    merges into a store under a file lock, and `single_flight` lets one invocation
+    fetch a student's schedule while the others wait for it.
     """
 
-    def __init__(self, app_name: str, ttl_hours: int = 24):
+    # Extension of the store files, one per student
+    FILE_SUFFIX: str = ".json"
+
+    def __init__(
+            self,
+            app_name: str,
+            ttl_hours: int = 24,
+            stale_grace_hours: int = 0,
+            max_size_mb: float = 0,
+            max_entries: int = 0
+        ):
         """
         Initialize the cache manager.
 
         Args:
             app_name: Name of the application for platform-specific cache directory
             ttl_hours: Time-to-live in hours for cached data
+            stale_grace_hours: How long expired data is kept to be served while it is being refreshed
+            max_size_mb: Least recently used students are evicted above this size, 0 for no limit
+            max_entries: Least recently used students are evicted above this count, 0 for no limit
         """
         self.cache_dir: Path = Path(platformdirs.user_cache_dir(app_name))
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.ttl: timedelta = timedelta(hours=ttl_hours)
-    
-    def _get_cache_key(self, api_url: str, student_id: str, query_time: datetime, day_range: int) -> str:
+        self.stale_grace: timedelta = timedelta(hours=stale_grace_hours)
+        self.max_bytes: int = int(max_size_mb * 1024 * 1024)
+        self.max_entries: int = max_entries
+        # Lock files of the stores, kept apart so the stores' glob never sees them
+        self.lock_dir: Path = self.cache_dir / "locks"
+
+        # The ".idx" extension keeps the manifest out of the store files' glob
+        self._manifest: CacheManifest = CacheManifest(self.cache_dir / f"manifest{self.FILE_SUFFIX}.idx", self.FILE_SUFFIX)
+        atexit.register(self.flush)
+        # Opened on first use, lookups never need them
+        self._lazy_lock: threading.Lock = threading.Lock()
+        self._room_index: "RoomIndex | None" = None
+        self._circuit_breaker: "CircuitBreaker | None" = None
+
+    @property
+    def room_index(self) -> "RoomIndex":
+        """Index of the cached sessions by room, kept up to date by `set`"""
+        with self._lazy_lock:
+            if self._room_index is None:
+                from src.core.room_index import RoomIndex
+                self._room_index = RoomIndex(self.cache_dir / RoomIndex.DB_FILE_NAME)
+            return self._room_index
+
+    @property
+    def circuit_breaker(self) -> "CircuitBreaker":
+        """Circuit breaker of the API requests, its state is kept in the cache directory"""
+        with self._lazy_lock:
+            if self._circuit_breaker is None:
+                from src.core.circuit_breaker import CircuitBreaker
+                from src.core.configurations import TransportConfigs
+                self._circuit_breaker = CircuitBreaker(
+                    self.cache_dir / CircuitBreaker.FILE_NAME,
+                    TransportConfigs.CIRCUIT_FAILURE_THRESHOLD,
+                    TransportConfigs.CIRCUIT_COOLDOWN_SECONDS,
+                    TransportConfigs.CIRCUIT_PROBE_TIMEOUT_SECONDS
+                )
+            return self._circuit_breaker
+
+    @property
+    def retention(self) -> timedelta:
+        """How long data is kept before it is removed, expired data is kept during the stale grace period"""
+        return self.ttl + self.stale_grace
+
+    def _get_cache_key(self, api_url: str, student_id: str) -> str:
         """
-        Generate a unique cache key based on API parameters.
+        Generate a unique cache key for a student's store.
         """
-        # Use only the date part (YYYY-MM-DD) for consistent caching throughout the day
-        date_str = query_time.date().isoformat()
-        key_str = f"{api_url}:{student_id}:{date_str}:{day_range}"
+        key_str = f"{api_url}:{student_id}"
         return md5(key_str.encode()).hexdigest()
-    
+
     def _get_cache_file_path(self, cache_key: str) -> Path:
         """
         Get the file path for a cache key.
         """
-        return self.cache_dir / f"{cache_key}.json"
-    
-    def get(
-            self, 
-            api_url: str, 
-            student_id: str, 
-            query_time: datetime, 
-            day_range: int
-        ) -> list[dict[str, str]] | None:
-        """
-        Retrieve cached data if it exists and hasn't expired.
-        
+        return self.cache_dir / f"{cache_key}{self.FILE_SUFFIX}"
+
+    @staticmethod
+    def _decode_store(raw: dict) -> dict[date, CachedDay]:
+        """
+        Convert the on-disk store into days.
+
+        The coverage is stored as `[first_day, last_day, fetched_at]` runs of consecutive
+        days sharing the same fetch time, the items are stored per day.
+        """
+        days: dict[date, CachedDay] = {}
+        items_by_day: dict[str, list[list]] = raw['days']
+        for first_str, last_str, fetched_str in raw['coverage']:
+            fetched_at = datetime.fromisoformat(fetched_str)
+            for day in iter_days(date.fromisoformat(first_str), date.fromisoformat(last_str)):
+                days[day] = CachedDay(items_by_day.get(day.isoformat(), []), fetched_at)
+        return days
+
+    @staticmethod
+    def _encode_store(api_url: str, student_id: str, days: dict[date, CachedDay]) -> dict:
+        """
+        Convert days into the on-disk store, see `_decode_store`.
+        """
+        coverage: list[list[str]] = []
+        items_by_day: dict[str, list[list]] = {}
+        run_first: date | None = None
+        run_last: date | None = None
+        run_fetched: datetime | None = None
+        for day in sorted(days):
+            cached_day = days[day]
+            if cached_day.items:
+                items_by_day[day.isoformat()] = cached_day.items
+
+            if run_last is not None and day == run_last + timedelta(days=1) and cached_day.fetched_at == run_fetched:
+                run_last = day
+                continue
+            if run_first is not None:
+                coverage.append([run_first.isoformat(), run_last.isoformat(), run_fetched.isoformat()])
+            run_first, run_last, run_fetched = day, day, cached_day.fetched_at
+
+        if run_first is not None:
+            coverage.append([run_first.isoformat(), run_last.isoformat(), run_fetched.isoformat()])
+
+        return {'api_url': api_url, 'student_id': student_id, 'coverage': coverage, 'days': items_by_day}
+
+    def _read_store(self, cache_file: Path) -> tuple[str, str, dict[date, CachedDay]] | None:
+        """
+        Read a student's store, `None` if it does not exist or can not be read.
+
         Returns:
-            Cached data if found and valid, None otherwise
+            The API URL, the student ID and the cached days of the store
         """
-        cache_key = self._get_cache_key(api_url, student_id, query_time, day_range)
-        cache_file = self._get_cache_file_path(cache_key)
-        
         if not cache_file.exists():
             return None
-        
+
         try:
             with open(cache_file, 'r', encoding='utf-8') as f:
-                cached_data = json.load(f)
-            
-            # Check if the cache has expired
-            cache_time = datetime.fromisoformat(cached_data['timestamp'])
-            if datetime.now() - cache_time > self.ttl:
-                # Remove expired cache file
-                cache_file.unlink()
-                return None
-            
-            return cached_data['data']
-        except (json.JSONDecodeError, KeyError, ValueError, OSError):
-            # If there's any issue reading the cache, remove the file and return None
-            if cache_file.exists():
-                cache_file.unlink()
+                raw = json.load(f)
+            return raw['api_url'], raw['student_id'], self._decode_store(raw)
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError, OSError):
+            # If there's any issue reading the cache, return None; the next `set` replaces the file
             return None
-    
+
+    def _write_store(self, cache_file: Path, api_url: str, student_id: str, days: dict[date, CachedDay]) -> None:
+        data = json.dumps(self._encode_store(api_url, student_id, days), ensure_ascii=False, indent=2)
+        try:
+            # Readers never see a partly written store
+            atomic_write(cache_file, data.encode('utf-8'))
+        except OSError:
+            # If we can't write to cache, just ignore (don't break the app)
+            pass
+
+    def get(
+            self,
+            api_url: str,
+            student_id: str,
+            first_day: date,
+            last_day: date,
+            max_age: timedelta | None = None
+        ) -> dict[date, CachedDay]:
+        """
+        Retrieve the cached days between `first_day` and `last_day` (inclusive) that haven't expired.
+
+        Args:
+            max_age: Maximum age of the returned days, the cache TTL if not provided
+
+        Returns:
+            Cached days that are covered and still valid, days that are not covered are absent
+        """
+        if max_age is None:
+            max_age = self.ttl
+
+        cache_key = self._get_cache_key(api_url, student_id)
+        store = self._read_store(self._get_cache_file_path(cache_key))
+        if store is None:
+            self._manifest.record_access(cache_key, hit=False)
+            return {}
+        days = store[2]
+
+        now = datetime.now()
+        requested_days = iter_days(first_day, last_day)
+        result = {
+            day: days[day]
+            for day in requested_days
+            if day in days and now - days[day].fetched_at <= max_age
+        }
+        self._manifest.record_access(cache_key, hit=len(result) == len(requested_days))
+        return result
+
     def set(
-            self, 
-            api_url: str, 
-            student_id: str, 
-            query_time: datetime, 
-            day_range: int, 
-            data: list[dict[str, str]]
+            self,
+            api_url: str,
+            student_id: str,
+            data: dict[date, list[list]]
         ) -> None:
         """
         Store data in the cache.
+
+        Args:
+            data: Items grouped by day, every key is marked as covered (even with an empty list)
         """
-        cache_key = self._get_cache_key(api_url, student_id, query_time, day_range)
+        if not data:
+            return
+
+        cache_key = self._get_cache_key(api_url, student_id)
         cache_file = self._get_cache_file_path(cache_key)
-        
-        cache_data = {
-            'timestamp': datetime.now().isoformat(),
-            'data': data
-        }
-        
+
+        # Read, merge and write under the store's lock, so concurrent writers don't lose each other's days
+        lock = FileLock(self.lock_dir / f"{cache_key}.lock")
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            lock.acquire()
         except OSError:
-            # If we can't write to cache, just ignore (don't break the app)
-            pass
-    
-    def clear_expired(self) -> int:
+            # If we can't lock the cache directory we can't write to it either, just ignore
+            return
+        try:
+            now = datetime.now()
+            store = self._read_store(cache_file)
+            days = store[2] if store is not None else {}
+            # Drop expired days so a store never grows with stale data
+            days = {day: cached_day for day, cached_day in days.items() if now - cached_day.fetched_at <= self.retention}
+            for day, items in data.items():
+                days[day] = CachedDay(items, now)
+
+            self._write_store(cache_file, api_url, student_id, days)
+        finally:
+            lock.release()
+        self.room_index.update(api_url, student_id, data)
+        try:
+            self._manifest.record_set(cache_key, cache_file.stat().st_size)
+        except OSError:
+            return
+        self._evict()
+
+    @contextmanager
+    def single_flight(self, api_url: str, student_id: str, timeout: float | None = None) -> Iterator[bool]:
         """
-        Remove all expired cache files.
+        Let a single invocation at a time fetch a student's schedule.
 
-        Returns:
-            Number of files removed
+        with cache_manager.single_flight(api_url, student_id) as waited:
+            if waited:
+                # Another invocation fetched meanwhile, read the cache again
+                ...
+
+        The lock is released when the block ends. If it is not obtained within `timeout`
+        seconds the block runs anyway, a stuck invocation never blocks the others.
+
+        Yields:
+            Whether another invocation held the lock, and may have filled the cache, before this one got it
         """
+        if timeout is None:
+            from src.core.configurations import CacheConfigs
+            timeout = CacheConfigs.SINGLE_FLIGHT_TIMEOUT_SECONDS
+
+        # Not the store's lock: `set` takes that one inside this block
+        lock = FileLock(self.lock_dir / f"{self._get_cache_key(api_url, student_id)}.fetch.lock")
+        try:
+            waited = not lock.try_acquire()
+            if waited:
+                lock.acquire(timeout)
+        except OSError:
+            # Without a usable lock directory every invocation fetches on its own
+            waited = False
+        try:
+            yield waited
+        finally:
+            lock.release()
+
+    def _remove_files(self, cache_keys: list[str]) -> int:
         count = 0
-        for cache_file in self.cache_dir.glob("*.json"):
+        for cache_key in cache_keys:
             try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cached_data = json.load(f)
-
-                cache_time = datetime.fromisoformat(cached_data['timestamp'])
-                if datetime.now() - cache_time > self.ttl:
-                    cache_file.unlink()
-                    count += 1
-            except (json.JSONDecodeError, KeyError, ValueError, OSError):
-                # If there's any issue reading the cache file, remove it
-                cache_file.unlink()
+                self._get_cache_file_path(cache_key).unlink()
                 count += 1
-
+            except OSError:
+                pass
         return count
 
+    def _evict(self) -> int:
+        """
+        Evict least recently used stores above the size and count limits.
+
+        Returns:
+            Number of files removed
+        """
+        if not self.max_bytes and not self.max_entries:
+            return 0
+        return self._remove_files(self._manifest.evict(self.max_entries, self.max_bytes))
+
+    def stats(self) -> CacheStats:
+        """
+        Usage of the cache: entries, bytes used, hit/miss, eviction and expiration counts.
+        """
+        return self._manifest.stats()
+
+    def flush(self) -> None:
+        """
+        Persist the access times and hit/miss counts recorded by `get`, run at exit.
+        """
+        self._manifest.flush()
+
+    def iter_stores(self) -> Iterator[tuple[str, str, dict[date, CachedDay]]]:
+        """
+        Iterate over every readable store, used to migrate to another cache backend.
+
+        Yields:
+            The API URL, the student ID and the cached days of each store
+        """
+        for cache_file in self.cache_dir.glob(f"*{self.FILE_SUFFIX}"):
+            store = self._read_store(cache_file)
+            if store is not None:
+                yield store
+
+    def remove_store(self, api_url: str, student_id: str) -> bool:
+        """
+        Remove a student's store, the manifest forgets it on its next reconciliation.
+
+        Returns:
+            Whether the store was removed
+        """
+        cache_key = self._get_cache_key(api_url, student_id)
+        with FileLock(self.lock_dir / f"{cache_key}.lock"):
+            return self._remove_files([cache_key]) == 1
+
+    def clear_expired(self) -> int:
+        """
+        Remove the stores whose newest data is past the retention, using the manifest only.
+
+        Days past the retention inside a store that is still in use are dropped on its next `set`.
+
+        Returns:
+            Number of files removed
+        """
+        min_fetched_at = datetime.now() - self.retention
+        self.room_index.prune(min_fetched_at)
+        return self._remove_files(self._manifest.expire(min_fetched_at.timestamp()))
+
     def clear_all(self) -> int:
         """
         Remove all cache files.
@@ -131,11 +384,38 @@ class CacheManager:
             Number of files removed
         """
         count = 0
-        for cache_file in self.cache_dir.glob("*.json"):
+        for cache_file in self.cache_dir.glob(f"*{self.FILE_SUFFIX}"):
             try:
                 cache_file.unlink()
                 count += 1
             except OSError:
                 pass
 
+        self._manifest.clear()
+        self.room_index.clear()
         return count
+
+def create_cache_manager(
+        app_name: str,
+        ttl_hours: int = 24,
+        stale_grace_hours: int = 0,
+        backend: str = "sqlite",
+        max_size_mb: float = 0,
+        max_entries: int = 0
+    ) -> CacheManager:
+    """
+    Create the cache manager of the given backend.
+
+    Args:
+        backend: `sqlite` for a single SQLite database, `json` for one JSON file per student,
+            `binary` for one memory-mapped binary file per student
+    """
+    if backend == "json":
+        return CacheManager(app_name, ttl_hours, stale_grace_hours, max_size_mb, max_entries)
+    if backend == "binary":
+        from src.core.binary_cache import BinaryCacheManager
+        return BinaryCacheManager(app_name, ttl_hours, stale_grace_hours, max_size_mb, max_entries)
+    if backend == "sqlite":
+        from src.core.sqlite_cache import SQLiteCacheManager
+        return SQLiteCacheManager(app_name, ttl_hours, stale_grace_hours, max_size_mb, max_entries)
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -0,0 +1,181 @@
+import json
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from src.utils.files import FileLock, atomic_write
+
+@dataclass
+class CircuitState:
+    """State of the circuit of one API, as shown by `cache stats`."""
+    # "closed" (requests go through), "open" (requests fail fast) or "half_open" (a probe may be sent)
+    state: str
+    # Consecutive failed requests
+    failures: int
+    # When the next probe may be sent, epoch seconds, `None` unless open
+    retry_at: float | None
+
+class CircuitBreaker:
+    """
+    Circuit breaker shared by every invocation through a small JSON file next to the cache.
+
+    After `failure_threshold` consecutive failed requests to an API the circuit opens:
+    requests fail fast for `cooldown_seconds` instead of waiting for timeouts. Then a
+    single probe request is let through (the others keep failing fast); its success
+    closes the circuit, its failure opens it for another cool-down.
+
+    The file is only written when the state changes, so requests to a healthy API
+    never touch it. Changes are read, applied and written under a lock file shared
+    with the other processes, so none of them loses another one's failures and a
+    single one takes the probe.
+    """
+
+    # Not ".json" nor any other store suffix: the file backends take every file with
+    # their suffix in the cache directory for a student's store
+    FILE_NAME: str = "circuit.state"
+
+    def __init__(self, path: Path, failure_threshold: int, cooldown_seconds: float, probe_timeout_seconds: float) -> None:
+        """
+        Args:
+            path: Location of the state file
+            failure_threshold: Consecutive failures that open the circuit
+            cooldown_seconds: How long the circuit stays open before a probe is sent
+            probe_timeout_seconds: How long other callers wait for a probe before sending another one
+        """
+        self._path: Path = path
+        self._failure_threshold: int = max(1, failure_threshold)
+        self._cooldown: float = cooldown_seconds
+        self._probe_timeout: float = probe_timeout_seconds
+        self._lock: threading.Lock = threading.Lock()
+        self._lock_path: Path = path.with_name(f"{path.name}.lock")
+        self._circuits: dict[str, dict] = {}
+        # Identity of the file last read, the state is read again when another process replaced it
+        self._loaded_version: tuple[int, int, int] | None = None
+
+    def _load(self) -> None:
+        """Pick up changes made by other processes"""
+        try:
+            stat = self._path.stat()
+        except OSError:
+            self._circuits, self._loaded_version = {}, None
+            return
+        # Every save replaces the file, a new inode tells it apart even within one mtime tick
+        version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if version == self._loaded_version:
+            return
+        try:
+            with open(self._path, 'r', encoding='utf-8') as f:
+                circuits = json.load(f)
+            self._circuits = circuits if isinstance(circuits, dict) else {}
+        except (json.JSONDecodeError, OSError):
+            self._circuits = {}
+        self._loaded_version = version
+
+    def _save(self) -> None:
+        try:
+            atomic_write(self._path, json.dumps(self._circuits).encode('utf-8'))
+            stat = self._path.stat()
+            self._loaded_version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            # The breaker then only lives in this process
+            pass
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the lock of this instance and the file lock shared with other processes, around a read-modify-write"""
+        with self._lock:
+            file_lock = FileLock(self._lock_path)
+            try:
+                file_lock.acquire()
+            except OSError:
+                # Without a usable cache directory the breaker only lives in this process
+                file_lock = None
+            try:
+                self._load()
+                yield
+            finally:
+                if file_lock is not None:
+                    file_lock.release()
+
+    def check(self, key: str) -> float | None:
+        """
+        Whether a request to `key` may be sent now, call `record_success` or `record_failure` after it.
+
+        Returns:
+            `None` if the request may be sent, otherwise when the next probe may be sent (epoch seconds)
+        """
+        with self._lock:
+            self._load()
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit.get("opened_at") is None:
+                # Closed, the common case needs no file lock
+                return None
+
+        with self._locked():
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit.get("opened_at") is None:
+                return None
+
+            now = time.time()
+            retry_at = circuit["opened_at"] + self._cooldown
+            if now < retry_at:
+                return retry_at
+            probe_until = circuit.get("probe_until")
+            if probe_until is not None and now < probe_until:
+                # Another caller is probing
+                return probe_until
+            circuit["probe_until"] = now + self._probe_timeout
+            self._save()
+            return None
+
+    def record_success(self, key: str) -> None:
+        with self._lock:
+            self._load()
+            if key not in self._circuits:
+                return
+
+        with self._locked():
+            if self._circuits.pop(key, None) is not None:
+                self._save()
+
+    def record_failure(self, key: str) -> None:
+        with self._locked():
+            circuit = self._circuits.setdefault(key, {"failures": 0, "opened_at": None, "probe_until": None})
+            circuit["failures"] = circuit.get("failures", 0) + 1
+            if circuit["failures"] >= self._failure_threshold:
+                # A failed probe opens the circuit for another cool-down
+                circuit["opened_at"] = time.time()
+                circuit["probe_until"] = None
+            self._save()
+
+    def release_probe(self, key: str) -> None:
+        """Give up a probe taken by `check` without an outcome (the request was cancelled), so another caller may probe"""
+        with self._lock:
+            self._load()
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit.get("probe_until") is None:
+                return
+
+        with self._locked():
+            circuit = self._circuits.get(key)
+            if circuit is not None and circuit.get("probe_until") is not None:
+                circuit["probe_until"] = None
+                self._save()
+
+    def states(self) -> dict[str, CircuitState]:
+        """State of every API that failed recently, APIs that are not listed are closed"""
+        with self._lock:
+            self._load()
+            now = time.time()
+            states: dict[str, CircuitState] = {}
+            for key, circuit in self._circuits.items():
+                opened_at = circuit.get("opened_at")
+                if opened_at is None:
+                    states[key] = CircuitState("closed", circuit.get("failures", 0), None)
+                elif now < opened_at + self._cooldown:
+                    states[key] = CircuitState("open", circuit.get("failures", 0), opened_at + self._cooldown)
+                else:
+                    states[key] = CircuitState("half_open", circuit.get("failures", 0), opened_at + self._cooldown)
+            return states
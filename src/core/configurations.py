@@ -5,10 +5,102 @@ class APIConfigs:
     LHU_API_URL: str = "https://tapi.lhu.edu.vn/calen/auth/XemLich_LichSinhVien"
     # Day range is how many days that has schedule to be shown
     DEFAULT_DAY_RANGE: int = 4
+    # Number of sessions requested per page
+    PAGE_SIZE: int = 30
+    # Pages of one schedule requested concurrently when a range spans several pages
+    PAGE_WORKERS: int = 4
+    # Pages requested at most for one range, guards against an API that ignores PageIndex
+    MAX_PAGES: int = 50
 
 class CacheConfigs:
     # Time-to-live for the cache
     TTL_HOURS: int = 24
+    # Expired data younger than TTL + grace is shown right away while it is refreshed in the background
+    STALE_GRACE_HOURS: int = 72
+    # Serve expired data within the grace period instead of waiting for the API
+    STALE_WHILE_REVALIDATE: bool = True
+    # Seconds view keeps stale data on screen waiting for the background refresh to redraw it
+    REVALIDATE_WAIT_SECONDS: float = 5
     # App name is used to create platfrom-specific cache location
     APP_NAME: str = "lhu-calendar"
+    # Storage engine of the cache: "sqlite" (single database), "json" (one file per student)
+    # or "binary" (one memory-mapped file per student)
+    BACKEND: str = "sqlite"
+    # Least recently used students are evicted once the cache grows past this size (0: no limit)
+    MAX_SIZE_MB: float = 100
+    # Least recently used students are evicted once more than this many are cached (0: no limit)
+    MAX_ENTRIES: int = 5000
+    # Rendered schedules kept to be printed again without rendering (0: no render cache)
+    RENDER_CACHE_ENTRIES: int = 200
+    # Seconds an invocation waits for another one fetching the same student before fetching itself
+    SINGLE_FLIGHT_TIMEOUT_SECONDS: float = 60
 
+class BatchConfigs:
+    # Default number of students fetched concurrently in batch mode
+    MAX_WORKERS: int = 16
+    # Days ahead filled by `cache warm`
+    WARM_DAYS: int = 14
+    # Requests per second at most sent by `cache warm`, 0 for no limit
+    WARM_MAX_RATE: float = 5
+
+class TransportConfigs:
+    # Seconds to wait for a connection to the API to be established
+    CONNECT_TIMEOUT: float = 5
+    # Seconds to wait for the API to respond
+    READ_TIMEOUT: float = 10
+    # Retries after the first attempt on network errors and 429/5xx responses
+    MAX_RETRIES: int = 2
+    # Upper bound in seconds of the first retry delay, doubled on every retry
+    BACKOFF_BASE: float = 0.5
+    # Upper bound in seconds of any retry delay
+    BACKOFF_MAX: float = 4
+    # Kept-alive connections per host
+    POOL_SIZE: int = 10
+    # Consecutive failed requests (after retries) that open the circuit, requests then fail fast
+    CIRCUIT_FAILURE_THRESHOLD: int = 3
+    # Seconds the circuit stays open before a single probe request is sent
+    CIRCUIT_COOLDOWN_SECONDS: float = 120
+    # Seconds other callers wait for the probe before sending another one
+    CIRCUIT_PROBE_TIMEOUT_SECONDS: float = 60
+
+class DaemonConfigs:
+    # Name of the Unix domain socket of `serve`, inside the cache directory
+    SOCKET_NAME: str = "daemon.sock"
+    # Seconds `view` waits for the daemon before fetching by itself (covers a cache miss with retries)
+    CLIENT_TIMEOUT: float = 30
+    # Minutes between two refreshes of the most requested students
+    REFRESH_INTERVAL_MINUTES: int = 60
+    # Number of most requested students kept fresh by the daemon
+    POPULAR_COUNT: int = 50
+    # Students whose parsed schedule is kept in memory, least recently used ones are dropped
+    MAX_STUDENTS: int = 1000
+
+class WatchConfigs:
+    # Seconds between polls of `view --watch` when a class starts (or is running) within the next hour
+    NEAR_CLASS_INTERVAL_SECONDS: int = 120
+    # Minutes before a class start from which polls are frequent
+    NEAR_CLASS_MINUTES: int = 60
+    # Seconds between polls during the day otherwise
+    DAY_INTERVAL_SECONDS: int = 900
+    # Seconds between polls at night
+    NIGHT_INTERVAL_SECONDS: int = 3600
+    # Night hours (local time), from NIGHT_START_HOUR to NIGHT_END_HOUR
+    NIGHT_START_HOUR: int = 22
+    NIGHT_END_HOUR: int = 6
+
+class FreeSlotConfigs:
+    # Working hours searched by `free`, local time in HH:MM
+    DAY_START: str = "07:00"
+    DAY_END: str = "17:00"
+    # Free slots shorter than this are not listed
+    MIN_MINUTES: int = 30
+    # Days searched by `free` by default
+    DAY_RANGE: int = 7
+
+class DisplayConfigs:
+    # Days per table when a range is shown page by page
+    PAGE_DAYS: int = 7
+    # Ranges longer than this are shown page by page even without `view --paged` (0: only with --paged)
+    AUTO_PAGE_DAYS: int = 14
+    # Pager of `view --pager` when the PAGER environment variable is not set
+    PAGER: str = "less -R"
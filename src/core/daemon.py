@@ -0,0 +1,328 @@
+import json
+import os
+import socketserver
+import threading
+from collections import Counter, OrderedDict
+from contextlib import AbstractContextManager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from src.core.cache import CacheManager, CachedDay, iter_days
+from src.core.circuit_breaker import CircuitBreaker
+from src.core.configurations import DaemonConfigs
+from src.core.daemon_client import DaemonUnavailable, request_daemon
+from src.core.lhu_calen_api import LHUCalenAPI
+from src.core import lhu_calen_api
+from src.core.transport import HTTPTransport
+
+class DaemonAlreadyRunning(Exception):
+    pass
+
+class _WarmCache:
+    """
+    In-memory layer over a cache manager, used by the daemon in its place.
+
+    The days of the most recently requested students stay in memory, the backing
+    cache is only read for days that are not there yet or too old in memory, as
+    another process may have stored newer data meanwhile. Writes go to both.
+    """
+
+    def __init__(self, backing: CacheManager, max_students: int) -> None:
+        self._backing: CacheManager = backing
+        self._max_students: int = max(1, max_students)
+        self._lock: threading.Lock = threading.Lock()
+        self._students: OrderedDict[tuple[str, str], dict[date, CachedDay]] = OrderedDict()
+
+    @property
+    def ttl(self) -> timedelta:
+        return self._backing.ttl
+
+    @property
+    def retention(self) -> timedelta:
+        return self._backing.retention
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        return self._backing.circuit_breaker
+
+    def single_flight(self, api_url: str, student_id: str) -> AbstractContextManager[bool]:
+        return self._backing.single_flight(api_url, student_id)
+
+    def _remember(self, key: tuple[str, str], days: dict[date, CachedDay]) -> dict[date, CachedDay]:
+        """Merge days into memory, keeping the newest of each, and return a copy of the student's days"""
+        with self._lock:
+            remembered = self._students.setdefault(key, {})
+            for day, cached_day in days.items():
+                if day not in remembered or cached_day.fetched_at >= remembered[day].fetched_at:
+                    remembered[day] = cached_day
+            self._students.move_to_end(key)
+            while len(self._students) > self._max_students:
+                self._students.popitem(last=False)
+            return dict(remembered)
+
+    def get(
+            self,
+            api_url: str,
+            student_id: str,
+            first_day: date,
+            last_day: date,
+            max_age: timedelta | None = None
+        ) -> dict[date, CachedDay]:
+        if max_age is None:
+            max_age = self.ttl
+
+        key = (api_url, student_id)
+        with self._lock:
+            days = self._students.get(key)
+            if days is not None:
+                self._students.move_to_end(key)
+                days = dict(days)
+
+        now = datetime.now()
+        requested_days = iter_days(first_day, last_day)
+        if days is None or any(day not in days or now - days[day].fetched_at > max_age for day in requested_days):
+            # Load everything still within the retention, younger data is filtered below
+            loaded = self._backing.get(api_url, student_id, first_day, last_day, max_age=self._backing.retention)
+            days = self._remember(key, loaded)
+
+        return {
+            day: days[day]
+            for day in requested_days
+            if day in days and now - days[day].fetched_at <= max_age
+        }
+
+    def set(self, api_url: str, student_id: str, data: dict[date, list]) -> None:
+        self._backing.set(api_url, student_id, data)
+        now = datetime.now()
+        self._remember((api_url, student_id), {day: CachedDay(items, now) for day, items in data.items()})
+
+    def clear_expired(self) -> int:
+        min_fetched_at = datetime.now() - self.retention
+        with self._lock:
+            for days in self._students.values():
+                for day in [day for day, cached_day in days.items() if cached_day.fetched_at < min_fetched_at]:
+                    del days[day]
+        return self._backing.clear_expired()
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: "_DaemonServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError()
+            except ValueError:
+                response = {"ok": False, "error": "other", "message": "Invalid request"}
+            else:
+                response = self.server.daemon.handle(request)
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+class _DaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, daemon: "CalenDaemon") -> None:
+        self.daemon: "CalenDaemon" = daemon
+        super().__init__(str(socket_path), _RequestHandler)
+
+class CalenDaemon:
+    """
+    Long-lived server answering `view` over a Unix domain socket.
+
+    Parsed schedules stay in memory, every request goes through one pooled
+    `HTTPTransport` whose connections stay warm, and the most requested students
+    are refreshed periodically so their next `view` never waits for the API.
+
+    The protocol is one JSON object per line in each direction:
+    `{"op": "view", "student_id": ..., "day_range": ..., "time": ISO datetime or null}` is answered
+    by `{"ok": true, "items": [CalenItem.to_row rows]}` or
+    `{"ok": false, "error": "connection" | "timeout" | "circuit_open" | "other", "message": ...}`
+    (with `"retry_at"` when the circuit breaker is open);
+    `{"op": "cached", ...}` (same fields as `view`) by `{"ok": true, "cached": null}` or
+    `{"ok": true, "cached": {"items": [...], "fetched_at": ISO datetime, "is_stale": bool}}`,
+    answered from the cache only like `LHUCalenAPI.get_cached_data`, so the client applies the
+    same stale-while-revalidate policy as without a daemon;
+    `{"op": "revalidate", ...}` (same fields as `view`) starts refreshing the range in the background
+    and is answered by `{"ok": true}` at once;
+    `{"op": "ping"}` and `{"op": "stop"}` by `{"ok": true}`.
+    """
+
+    def __init__(
+            self,
+            api_url: str,
+            cache_manager: CacheManager,
+            socket_path: Path,
+            refresh_interval_minutes: float = DaemonConfigs.REFRESH_INTERVAL_MINUTES,
+            popular_count: int = DaemonConfigs.POPULAR_COUNT,
+            max_students: int = DaemonConfigs.MAX_STUDENTS
+        ) -> None:
+        """
+        Args:
+            refresh_interval_minutes: Minutes between two refreshes of the most requested students
+            popular_count: Number of most requested students that are refreshed
+            max_students: Students whose schedule is kept in memory
+        """
+        self._api_url: str = api_url
+        self._cache_manager: CacheManager = cache_manager
+        self._cache: _WarmCache = _WarmCache(cache_manager, max_students)
+        self._socket_path: Path = socket_path
+        self._refresh_interval: float = refresh_interval_minutes * 60
+        self._popular_count: int = popular_count
+        self._transport: HTTPTransport = HTTPTransport()
+
+        self._lock: threading.Lock = threading.Lock()
+        self._requests: Counter[str] = Counter()
+        self._day_ranges: dict[str, int] = {}
+        self._revalidating: set[str] = set()
+        self._stopped: threading.Event = threading.Event()
+        self._server: _DaemonServer | None = None
+
+    def _api(self, student_id: str) -> LHUCalenAPI:
+        # Expired entries are cleaned by the refresh loop, not on requests
+        return LHUCalenAPI(self._api_url, student_id, self._cache, self._transport, clean_expired=False)
+
+    def handle(self, request: dict) -> dict:
+        """Answer a single request"""
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True}
+        if op == "stop":
+            threading.Thread(target=self.stop, name="calen-daemon-stop").start()
+            return {"ok": True}
+        if op not in ("view", "cached", "revalidate"):
+            return {"ok": False, "error": "other", "message": f"Unknown op: {op}"}
+
+        try:
+            student_id = str(request["student_id"])
+            day_range = int(request["day_range"])
+            dt = datetime.fromisoformat(request["time"]) if request.get("time") else None
+        except (KeyError, TypeError, ValueError):
+            return {"ok": False, "error": "other", "message": "Invalid request"}
+
+        if op == "cached":
+            return self._handle_cached(student_id, day_range, dt)
+        if op == "revalidate":
+            return self._handle_revalidate(student_id, day_range, dt)
+
+        self._count_request(student_id, day_range)
+        try:
+            items = self._api(student_id).get_data(day_range, dt)
+        except lhu_calen_api.CircuitOpenError as e:
+            return {"ok": False, "error": "circuit_open", "message": "", "retry_at": e.retry_at.isoformat()}
+        except lhu_calen_api.ConnectionError:
+            return {"ok": False, "error": "connection", "message": ""}
+        except lhu_calen_api.TimeoutError:
+            return {"ok": False, "error": "timeout", "message": ""}
+        except Exception as e:
+            return {"ok": False, "error": "other", "message": str(e)}
+        return {"ok": True, "items": [item.to_row() for item in items]}
+
+    def _handle_cached(self, student_id: str, day_range: int, dt: datetime | None) -> dict:
+        try:
+            cached = self._api(student_id).get_cached_data(day_range, dt)
+        except Exception as e:
+            return {"ok": False, "error": "other", "message": str(e)}
+        if cached is None:
+            return {"ok": True, "cached": None}
+        # A view answered from the cache, it counts like one answered by `view`
+        self._count_request(student_id, day_range)
+        return {"ok": True, "cached": {
+            "items": [item.to_row() for item in cached.items],
+            "fetched_at": cached.fetched_at.isoformat(),
+            "is_stale": cached.is_stale
+        }}
+
+    def _handle_revalidate(self, student_id: str, day_range: int, dt: datetime | None) -> dict:
+        with self._lock:
+            if student_id in self._revalidating:
+                return {"ok": True}
+            self._revalidating.add(student_id)
+
+        def revalidate():
+            try:
+                self._api(student_id).refresh(day_range, dt)
+            except Exception:
+                # The stale data stays cached, the next view asks again
+                pass
+            finally:
+                with self._lock:
+                    self._revalidating.discard(student_id)
+
+        threading.Thread(target=revalidate, name="calen-daemon-revalidate", daemon=True).start()
+        return {"ok": True}
+
+    def _count_request(self, student_id: str, day_range: int) -> None:
+        with self._lock:
+            self._requests[student_id] += 1
+            self._day_ranges[student_id] = max(day_range, self._day_ranges.get(student_id, 0))
+
+    def refresh_popular(self) -> int:
+        """
+        Refresh the most requested students, then halve the request counts so popularity follows recent use.
+
+        Returns:
+            Number of students refreshed
+        """
+        with self._lock:
+            popular = [
+                (student_id, self._day_ranges[student_id])
+                for student_id, _ in self._requests.most_common(self._popular_count)
+            ]
+            for student_id in list(self._requests):
+                self._requests[student_id] //= 2
+                if not self._requests[student_id]:
+                    del self._requests[student_id]
+                    del self._day_ranges[student_id]
+
+        refreshed = 0
+        for student_id, day_range in popular:
+            if self._stopped.is_set():
+                break
+            try:
+                self._api(student_id).refresh(day_range)
+                refreshed += 1
+            except Exception:
+                # Keep serving the cached data, the student is tried again next time
+                continue
+        return refreshed
+
+    def _refresh_loop(self) -> None:
+        while not self._stopped.wait(self._refresh_interval):
+            self.refresh_popular()
+            self._cache.clear_expired()
+            self._cache_manager.flush()
+
+    def serve_forever(self) -> None:
+        """
+        Listen on the socket until `stop` is called.
+
+        Raises:
+            `DaemonAlreadyRunning` : When another daemon answers on the socket
+        """
+        if self._socket_path.exists():
+            try:
+                request_daemon(self._socket_path, {"op": "ping"}, timeout=1)
+                raise DaemonAlreadyRunning()
+            except DaemonUnavailable:
+                # Left behind by a daemon that did not exit cleanly
+                self._socket_path.unlink(missing_ok=True)
+
+        self._server = _DaemonServer(self._socket_path, self)
+        os.chmod(self._socket_path, 0o600)
+        refresh_thread = threading.Thread(target=self._refresh_loop, name="calen-daemon-refresh", daemon=True)
+        refresh_thread.start()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._stopped.set()
+            self._server.server_close()
+            self._socket_path.unlink(missing_ok=True)
+            self._transport.close()
+            self._cache_manager.flush()
+
+    def stop(self) -> None:
+        """Stop serving, from another thread or a signal handler"""
+        self._stopped.set()
+        if self._server is not None:
+            self._server.shutdown()
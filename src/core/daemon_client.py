@@ -0,0 +1,123 @@
+import json
+import socket
+from datetime import datetime
+from pathlib import Path
+
+import platformdirs
+from src.core.configurations import CacheConfigs, DaemonConfigs
+from src.core.lhu_calen_api import CachedSchedule, CalenItem
+from src.core import lhu_calen_api
+
+class DaemonUnavailable(Exception):
+    """No daemon is listening on the socket, or it stopped answering"""
+    pass
+
+def daemon_socket_path() -> Path:
+    """Socket of the daemon, inside the cache directory"""
+    return Path(platformdirs.user_cache_dir(CacheConfigs.APP_NAME)) / DaemonConfigs.SOCKET_NAME
+
+def request_daemon(socket_path: Path, request: dict, timeout: float = DaemonConfigs.CLIENT_TIMEOUT) -> dict:
+    """Send one request to the daemon and return its response
+
+    Raises:
+        `DaemonUnavailable` : When no daemon answers
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise DaemonUnavailable()
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(socket_path))
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+        response = json.loads(line)
+    except (OSError, ValueError) as e:
+        raise DaemonUnavailable() from e
+
+    if not isinstance(response, dict):
+        raise DaemonUnavailable()
+    return response
+
+class DaemonClient:
+    """
+    Ask a running `serve` daemon for a student's schedule.
+
+    Only the standard library and modules `view` imports anyway are used, so asking
+    the daemon costs no more than a socket round trip.
+    """
+
+    def __init__(self, student_id: str, socket_path: Path | None = None, timeout: float = DaemonConfigs.CLIENT_TIMEOUT) -> None:
+        self._student_id: str = student_id
+        self._socket_path: Path = socket_path if socket_path is not None else daemon_socket_path()
+        self._timeout: float = timeout
+
+    def _request(self, op: str, day_range: int, dt: datetime | None) -> dict:
+        return request_daemon(
+            self._socket_path,
+            {
+                "op": op,
+                "student_id": self._student_id,
+                "day_range": day_range,
+                "time": dt.isoformat() if dt is not None else None
+            },
+            self._timeout
+        )
+
+    def get_cached_data(self, day_range: int, dt: datetime | None = None) -> CachedSchedule | None:
+        """Same as `LHUCalenAPI.get_cached_data`, answered by the daemon from its cache
+
+        Raises:
+            `DaemonUnavailable` : When no daemon answers
+        """
+        response = self._request("cached", day_range, dt)
+        if not response.get("ok"):
+            raise DaemonUnavailable()
+        cached = response.get("cached")
+        if cached is None:
+            return None
+        try:
+            return CachedSchedule(
+                items=CalenItem.from_rows(cached["items"]),
+                fetched_at=datetime.fromisoformat(cached["fetched_at"]),
+                is_stale=bool(cached["is_stale"])
+            )
+        except (KeyError, TypeError, ValueError, OverflowError) as e:
+            raise DaemonUnavailable() from e
+
+    def revalidate(self, day_range: int, dt: datetime | None = None) -> None:
+        """Have the daemon refresh the range in the background, returns without waiting for it
+
+        Raises:
+            `DaemonUnavailable` : When no daemon answers
+        """
+        if not self._request("revalidate", day_range, dt).get("ok"):
+            raise DaemonUnavailable()
+
+    def get_data(self, day_range: int, dt: datetime | None = None) -> list[CalenItem]:
+        """Same as `LHUCalenAPI.get_data`, answered by the daemon
+
+        Raises:
+            `DaemonUnavailable` : When no daemon answers, the caller should fetch by itself
+            `ConnectionError` : When the daemon could not reach the API
+            `TimeoutError` : When the API did not respond to the daemon in time
+        """
+        response = self._request("view", day_range, dt)
+        if response.get("ok"):
+            try:
+                return CalenItem.from_rows(response["items"])
+            except (KeyError, TypeError, ValueError, OverflowError) as e:
+                raise DaemonUnavailable() from e
+
+        error = response.get("error")
+        if error == "circuit_open":
+            try:
+                raise lhu_calen_api.CircuitOpenError(datetime.fromisoformat(response["retry_at"]))
+            except (KeyError, TypeError, ValueError):
+                raise lhu_calen_api.ConnectionError()
+        if error == "connection":
+            raise lhu_calen_api.ConnectionError()
+        if error == "timeout":
+            raise lhu_calen_api.TimeoutError()
+        raise Exception(response.get("message", ""))
@@ -0,0 +1,185 @@
+import csv
+import hashlib
+import io
+import json
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from src.core.cache import CacheManager
+from src.core.lhu_calen_api import LHUCalenAPI, CalenItem
+from src.core.transport import HTTPTransport
+
+EXPORT_FORMATS: tuple[str, ...] = ("ics", "csv", "ndjson")
+
+# Session times are Vietnamese wall-clock times (stored as UTC without conversion)
+_TZID = "Asia/Ho_Chi_Minh"
+_CSV_HEADER = ["student_id", "date", "start_time", "end_time", "subject_name", "room_name", "facility_name", "is_cancelled"]
+
+def iter_student_items(
+        api_url: str,
+        student_ids: Iterable[str],
+        day_range: int,
+        dt: datetime | None = None,
+        cache_manager: CacheManager | None = None,
+        transport: HTTPTransport | None = None,
+        lookahead: int = 4
+    ) -> Iterator[tuple[str, CalenItem | Exception]]:
+    """Items of every student in input order, with an error in place of the items of a student that failed
+
+    The next `lookahead` students are fetched in the background while the current one is
+    consumed, so at most `lookahead + 1` schedules are in memory whatever the number of students.
+    Memory is bounded per student, not streamed: a student's whole range is collected before
+    its first item is yielded (a year of 4 daily sessions is about 1,500 items).
+    """
+    if dt is None:
+        dt = datetime.now(timezone.utc)
+    transport = transport if transport is not None else HTTPTransport(pool_size=max(1, lookahead))
+
+    def fetch(student_id: str) -> list[CalenItem]:
+        api = LHUCalenAPI(api_url, student_id, cache_manager, transport, clean_expired=False)
+        # Collected in the worker, so that the next students are fetched while this one is written
+        return list(api.iter_data(day_range, dt))
+
+    pending: deque[tuple[str, Future]] = deque()
+    student_ids = iter(student_ids)
+    with ThreadPoolExecutor(max_workers=max(1, lookahead)) as executor:
+        try:
+            for student_id in student_ids:
+                pending.append((student_id, executor.submit(fetch, student_id)))
+                if len(pending) > lookahead:
+                    yield from _drain_one(pending)
+            while pending:
+                yield from _drain_one(pending)
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+def _drain_one(pending: deque[tuple[str, Future]]) -> Iterator[tuple[str, CalenItem | Exception]]:
+    student_id, future = pending.popleft()
+    try:
+        items = future.result()
+    except Exception as e:
+        yield student_id, e
+        return
+    for item in items:
+        yield student_id, item
+
+def _local_time(dt: datetime) -> str:
+    """Wall-clock time of a session, without the (meaningless) UTC offset"""
+    return dt.replace(tzinfo=None).isoformat()
+
+def to_ndjson(records: Iterable[tuple[str, CalenItem]]) -> Iterator[str]:
+    for student_id, item in records:
+        yield json.dumps({
+            "student_id": student_id,
+            "start_time": _local_time(item.start_time),
+            "end_time": _local_time(item.end_time),
+            "subject_name": item.subject_name,
+            "room_name": item.room_name,
+            "facility_name": item.facility_name,
+            "is_cancelled": item.is_cancelled,
+        }, ensure_ascii=False) + "\n"
+
+def to_csv(records: Iterable[tuple[str, CalenItem]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def row(values: list) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield row(_CSV_HEADER)
+    for student_id, item in records:
+        yield row([
+            student_id,
+            item.start_time.date().isoformat(),
+            _local_time(item.start_time),
+            _local_time(item.end_time),
+            item.subject_name,
+            item.room_name,
+            item.facility_name,
+            int(item.is_cancelled),
+        ])
+
+def _ics_text(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def _ics_line(line: str) -> str:
+    """A content line folded at 75 octets, as RFC 5545 requires"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts: list[str] = []
+    start = 0
+    limit = 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never split a UTF-8 sequence
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode("utf-8"))
+        start = end
+        # Continuation lines start with a space
+        limit = 74
+    return "\r\n ".join(parts) + "\r\n"
+
+def _ics_time(dt: datetime) -> str:
+    return dt.strftime("%Y%m%dT%H%M%S")
+
+def _ics_uid(student_id: str, item: CalenItem) -> str:
+    """Identity of a session across exports, only from what does not change when it is moved to another room"""
+    return hashlib.sha1(f"{student_id}|{item.start_time.isoformat()}|{item.subject_name}".encode("utf-8")).hexdigest()
+
+def to_ics(records: Iterable[tuple[str, CalenItem]]) -> Iterator[str]:
+    now = datetime.now(timezone.utc)
+    stamp = now.strftime("%Y%m%dT%H%M%SZ")
+    # Minutes since the epoch: grows with every export, so calendar apps importing a newer
+    # export replace their copy of a session (e.g. with its new room) instead of keeping it
+    sequence = int(now.timestamp()) // 60
+    for line in (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//lhu-terminal-calendar//calen export//VI",
+        "CALSCALE:GREGORIAN",
+        "BEGIN:VTIMEZONE",
+        f"TZID:{_TZID}",
+        "BEGIN:STANDARD",
+        "DTSTART:19700101T000000",
+        "TZOFFSETFROM:+0700",
+        "TZOFFSETTO:+0700",
+        "TZNAME:ICT",
+        "END:STANDARD",
+        "END:VTIMEZONE",
+    ):
+        yield _ics_line(line)
+
+    for student_id, item in records:
+        yield "".join(_ics_line(line) for line in (
+            "BEGIN:VEVENT",
+            f"UID:{_ics_uid(student_id, item)}@lhu-calendar",
+            f"DTSTAMP:{stamp}",
+            f"LAST-MODIFIED:{stamp}",
+            f"SEQUENCE:{sequence}",
+            f"DTSTART;TZID={_TZID}:{_ics_time(item.start_time)}",
+            f"DTEND;TZID={_TZID}:{_ics_time(item.end_time)}",
+            f"SUMMARY:{_ics_text(item.subject_name)}",
+            f"LOCATION:{_ics_text(f'{item.room_name} ({item.facility_name})')}",
+            f"DESCRIPTION:{_ics_text(f'MSSV {student_id}')}",
+            f"STATUS:{'CANCELLED' if item.is_cancelled else 'CONFIRMED'}",
+            "END:VEVENT",
+        ))
+    yield _ics_line("END:VCALENDAR")
+
+def serialize(records: Iterable[tuple[str, CalenItem]], export_format: str) -> Iterator[str]:
+    """Lines of `records` in the given format, see `EXPORT_FORMATS`"""
+    if export_format == "ics":
+        return to_ics(records)
+    if export_format == "csv":
+        return to_csv(records)
+    if export_format == "ndjson":
+        return to_ndjson(records)
+    raise ValueError(f"Unknown export format: {export_format}")
@@ -0,0 +1,74 @@
+from collections.abc import Iterable
+from datetime import date, datetime, time, timedelta
+
+from src.core.cache import iter_days
+from src.core.lhu_calen_api import CalenItem
+
+Interval = tuple[datetime, datetime]
+
+def busy_intervals(items: Iterable[CalenItem]) -> list[Interval]:
+    """Local (naive) start and end of every session that takes place, cancelled sessions leave the time free"""
+    return [
+        (item.start_time.replace(tzinfo=None), item.end_time.replace(tzinfo=None))
+        for item in items
+        if not item.is_cancelled
+    ]
+
+def merge_intervals(intervals: Iterable[Interval]) -> list[Interval]:
+    """Union of `intervals` as sorted, disjoint intervals (sweep over the intervals sorted by start)"""
+    merged: list[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def free_slots(
+        busy: Iterable[Interval],
+        first_day: date,
+        last_day: date,
+        day_start: time,
+        day_end: time,
+        min_duration: timedelta = timedelta(0),
+        not_before: datetime | None = None
+    ) -> list[Interval]:
+    """
+    Slots within working hours of every day from `first_day` to `last_day` (inclusive) not covered by any busy interval.
+
+    The busy intervals of all students are merged once, then each day's working hours are
+    walked along the merged list, so the cost is O(n log n) in the number of sessions.
+
+    Args:
+        day_start: Start of the working hours of every day
+        day_end: End of the working hours of every day
+        min_duration: Shorter slots are left out
+        not_before: Slots are cut to start at this time at the earliest (e.g. now)
+    """
+    merged = merge_intervals(busy)
+    slots: list[Interval] = []
+    index = 0
+    for day in iter_days(first_day, last_day):
+        window_start = datetime.combine(day, day_start)
+        window_end = datetime.combine(day, day_end)
+        if not_before is not None and not_before > window_start:
+            window_start = not_before
+        if window_start >= window_end:
+            continue
+
+        # Intervals ending before this day's window can not matter for any later day either
+        while index < len(merged) and merged[index][1] <= window_start:
+            index += 1
+
+        cursor = window_start
+        position = index
+        while position < len(merged) and merged[position][0] < window_end:
+            start, end = merged[position]
+            if start > cursor and start - cursor >= min_duration:
+                slots.append((cursor, start))
+            cursor = max(cursor, end)
+            position += 1
+        if cursor < window_end and window_end - cursor >= min_duration:
+            slots.append((cursor, window_end))
+    return slots
@@ -1,14 +1,35 @@
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, time, timezone, timedelta
 import random
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, nullcontext
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from functools import cache
+from typing import TYPE_CHECKING, Any, Literal
 
-import requests
-from requests import Response
-from pydantic import BaseModel
-from src.core.configurations import CacheConfigs
+from src.core.configurations import APIConfigs
+from src.utils import profiling
 from src.utils.datetime import parse_string_datetime
-from src.core.cache import CacheManager
+from src.core.cache import CacheManager, iter_days
 
-class CalenItem(BaseModel):
+if TYPE_CHECKING:
+    # The network stack is only imported on a cache miss, see `LHUCalenAPI.transport`
+    from src.core.circuit_breaker import CircuitBreaker
+    from src.core.schedule_table import ScheduleTable
+    from src.core.transport import HTTPTransport
+
+@dataclass(slots=True)
+class CalenItem:
+    """
+    A single class session.
+
+    Instances are built without validation, from parsed API data or from cache rows
+    written by `to_row`. Untrusted data goes through `model_validate`, which (like
+    `model_dump`) uses pydantic, imported only when it is first needed.
+
+    The dataclass is not frozen: a frozen `__init__` sets every field through
+    `object.__setattr__`, which makes decoding several times slower.
+    """
     start_time: datetime 
     end_time: datetime
     room_name: str
@@ -16,99 +37,496 @@ class CalenItem(BaseModel):
     facility_name: str 
     is_cancelled: bool 
 
+    def to_row(self) -> tuple[int, int, str, str, str, bool]:
+        """Compact cache representation, epoch seconds instead of datetimes"""
+        return (
+            int(self.start_time.timestamp()),
+            int(self.end_time.timestamp()),
+            self.room_name,
+            self.subject_name,
+            self.facility_name,
+            self.is_cancelled
+        )
+
+    @classmethod
+    def from_row(cls, row: tuple[int, int, str, str, str, bool] | list[Any]) -> "CalenItem":
+        """Decode a trusted row written by `to_row`, without validation"""
+        start, end, room_name, subject_name, facility_name, is_cancelled = row
+        return cls(
+            datetime.fromtimestamp(start, timezone.utc),
+            datetime.fromtimestamp(end, timezone.utc),
+            room_name,
+            subject_name,
+            facility_name,
+            is_cancelled
+        )
+
+    @classmethod
+    def from_rows(cls, rows: list[list[Any]]) -> list["CalenItem"]:
+        """Decode many trusted rows, see `from_row`"""
+        fromtimestamp = datetime.fromtimestamp
+        utc = timezone.utc
+        return [
+            cls(fromtimestamp(start, utc), fromtimestamp(end, utc), room_name, subject_name, facility_name, is_cancelled)
+            for start, end, room_name, subject_name, facility_name, is_cancelled in rows
+        ]
+
+    @classmethod
+    def model_validate(cls, obj: Any) -> "CalenItem":
+        """Validate and convert `obj` with pydantic, like `BaseModel.model_validate`"""
+        return _calen_item_adapter().validate_python(obj)
+
+    def model_dump(self, mode: Literal['python', 'json'] = 'python') -> dict[str, Any]:
+        """Convert to a dict with pydantic, like `BaseModel.model_dump`"""
+        return _calen_item_adapter().dump_python(self, mode=mode)
+
+@cache
+def _calen_item_adapter():
+    from pydantic import TypeAdapter
+    return TypeAdapter(CalenItem)
+
+@dataclass
+class CachedSchedule:
+    """Items answered from the cache only."""
+    items: list[CalenItem]
+    # Fetch time of the oldest day in the range
+    fetched_at: datetime
+    # Whether some day is past the cache TTL (but still within the stale grace period)
+    is_stale: bool
+
 class ConnectionError(Exception):
     pass
 
 class TimeoutError(Exception):
     pass
 
+class CircuitOpenError(ConnectionError):
+    """The API failed repeatedly, no request is sent to it before `retry_at`"""
+
+    def __init__(self, retry_at: datetime) -> None:
+        super().__init__()
+        self.retry_at: datetime = retry_at
+
+def page_payload(student_id: str, first_day: date, page_index: int) -> dict[str, Any]:
+    """Form data requesting one page of a student's schedule from `first_day`"""
+    return {
+        "StudentID": student_id,
+        "Ngay": datetime.combine(first_day, time.min, tzinfo=timezone.utc),
+        "PageIndex": page_index,
+        "PageSize": APIConfigs.PAGE_SIZE
+    }
+
+def parse_page(body: Any) -> tuple[list[CalenItem], int | None]:
+    """Items of a decoded API response, and the total number of items if the response reports it"""
+    items = [
+        CalenItem(
+            start_time    = parse_string_datetime(d["ThoiGianBD"]),
+            end_time      = parse_string_datetime(d["ThoiGianKT"]),
+            room_name     = d["TenPhong"],
+            subject_name  = d["TenMonHoc"],
+            facility_name = d["TenCoSo"],
+            is_cancelled  = d["TinhTrang"] == 1 or d["TinhTrang"] == 6 # 1 là hủy, 6 là nghỉ lễ
+        )
+        for d in body["data"][2]
+    ]
+    return items, _total_records(body["data"][:2])
+
+def _total_records(parts: list[Any]) -> int | None:
+    """Total item count from the metadata parts of a response (a `TotalRecord`-like field), if any"""
+    for part in parts:
+        for row in part if isinstance(part, list) else []:
+            if not isinstance(row, dict):
+                continue
+            for key, value in row.items():
+                lowered = key.lower()
+                if "total" in lowered and "record" in lowered and isinstance(value, int):
+                    return value
+    return None
+
+class PagedDays:
+    """
+    Items of the pages of one request, from `first_day` to `last_day`, grouped by day.
+
+    Pages are consumed in order; days are handed out once no later page can add to them.
+    Shared by the page loops of `LHUCalenAPI` and `AsyncLHUCalenAPI`.
+    """
+
+    def __init__(self, first_day: date, last_day: date) -> None:
+        self.first_day: date = first_day
+        self.last_day: date = last_day
+        self._items_by_day: dict[date, list[CalenItem]] = {day: [] for day in iter_days(first_day, last_day)}
+        # First day whose items have not been handed out yet
+        self._pending_day: date = first_day
+
+    def take_until(self, until: date) -> dict[date, list[CalenItem]]:
+        """Days from the first pending day to `until` (inclusive), removed from the pending ones"""
+        taken = {
+            day: self._items_by_day.pop(day)
+            for day in iter_days(self._pending_day, until)
+            if day in self._items_by_day
+        }
+        self._pending_day = max(self._pending_day, until + timedelta(days=1))
+        return taken
+
+    def consume(self, page: list[CalenItem]) -> bool:
+        """Add the items of the next page, `True` when no later page can hold days of the range"""
+        for item in sorted(page, key=lambda item: item.start_time):
+            day = item.start_time.date()
+            if day in self._items_by_day:
+                self._items_by_day[day].append(item)
+        return len(page) < APIConfigs.PAGE_SIZE or max(item.start_time.date() for item in page) > self.last_day
+
+    def complete_days(self, page: list[CalenItem]) -> dict[date, list[CalenItem]]:
+        """Days known to be complete after consuming the full `page`"""
+        # A full page may have been cut off in the middle of its last day,
+        # so only the days before that one are known to be complete
+        return self.take_until(min(self.last_day, max(item.start_time.date() for item in page) - timedelta(days=1)))
+
+    def plan(self, first_page: list[CalenItem], total: int | None) -> tuple[int | None, int, int]:
+        """
+        Pages to request after a full first page.
+
+        Returns:
+            The number of pages of the whole schedule (`None` if unknown), the last page that
+            may be requested, and a guess of the page holding `last_day`
+        """
+        page_size = APIConfigs.PAGE_SIZE
+        # Without a total, pages are requested until a short one (or the page limit)
+        total_pages = -(-total // page_size) if total is not None else None
+        last_page = min(total_pages, APIConfigs.MAX_PAGES) if total_pages is not None else APIConfigs.MAX_PAGES
+        # Days covered by a page, to guess how many pages the range needs
+        days_per_page = max(1, (max(item.start_time.date() for item in first_page) - self.first_day).days)
+        needed_page = min(last_page, -(-((self.last_day - self.first_day).days + 1) // days_per_page))
+        return total_pages, last_page, needed_page
+
 class LHUCalenAPI:
-    def __init__(self, api_url: str, student_id: str, cache_manager: CacheManager | None = None) -> None:
+    def __init__(
+            self,
+            api_url: str,
+            student_id: str,
+            cache_manager: CacheManager | None = None,
+            transport: "HTTPTransport | None" = None,
+            clean_expired: bool = True
+        ) -> None:
+        """
+        Args:
+            transport: Shared HTTP transport, a new one is created on the first request if not provided
+            clean_expired: Whether `get_data` should periodically clean expired cache entries itself
+        """
         self._api_url: str = api_url
         self._student_id: str = student_id
         self._cache_manager: CacheManager | None  = cache_manager 
+        self._transport: "HTTPTransport | None" = transport
+        self._clean_expired: bool = clean_expired
+
+    @property
+    def student_id(self) -> str:
+        return self._student_id
+
+    @property
+    def transport(self) -> "HTTPTransport":
+        if self._transport is None:
+            with profiling.span("transport.open"):
+                from src.core.transport import HTTPTransport
+                self._transport = HTTPTransport()
+        return self._transport
     
+    @staticmethod
+    def _normalize_dt(dt: datetime | None) -> datetime:
+        if dt is None:
+            return datetime.now(timezone.utc)
+        if dt.tzinfo is None:
+            return dt.replace(tzinfo=timezone.utc)
+        return dt
+
+    @staticmethod
+    def _select_items(items_by_day: dict[date, list[CalenItem]], dt: datetime, end_date: datetime) -> list[CalenItem]:
+        """Items between `dt` and `end_date`, in day order"""
+        return [
+            item
+            for day in iter_days(dt.date(), end_date.date())
+            for item in items_by_day.get(day, [])
+            if item.end_time <= end_date and item.start_time >= dt
+        ]
+
+    def _single_flight(self) -> AbstractContextManager[bool]:
+        """Held while fetching, so parallel invocations missing the same student send a single request"""
+        if self._cache_manager is None:
+            return nullcontext(False)
+        return self._cache_manager.single_flight(self._api_url, self._student_id)
+
+    def _read_cache(self, first_day: date, last_day: date, max_age: timedelta | None = None) -> dict[date, tuple[list[CalenItem], datetime]]:
+        """Cached items and fetch time of every covered day younger than `max_age`"""
+        if self._cache_manager is None:
+            return {}
+
+        with profiling.span("cache.get"):
+            cached_days = self._cache_manager.get(
+                self._api_url,
+                self._student_id,
+                first_day,
+                last_day,
+                max_age=max_age
+            )
+        result: dict[date, tuple[list[CalenItem], datetime]] = {}
+        with profiling.span("cache.decode"):
+            for day, cached_day in cached_days.items():
+                try:
+                    # Convert cached rows back to CalenItem objects
+                    result[day] = (CalenItem.from_rows(cached_day.items), cached_day.fetched_at)
+                except (TypeError, ValueError, OverflowError):
+                    # Rows of an older cache format, the day is fetched again
+                    continue
+        profiling.count("cache.hit_days", len(result))
+        profiling.count("cache.miss_days", len(iter_days(first_day, last_day)) - len(result))
+        return result
+
+    def _iter_fetch_and_store(self, first_day: date, last_day: date) -> Iterator[dict[date, list[CalenItem]]]:
+        """Request the days from `first_day` to `last_day`, yielding them as they arrive (in day order)
+        after storing the fully covered ones in cache"""
+        for fetched_days, complete in self._fetch_days(first_day, last_day):
+            if self._cache_manager is not None and complete and fetched_days:
+                # Store the result in cache, only for the days the response fully covers
+                with profiling.span("cache.set"):
+                    self._cache_manager.set(
+                        self._api_url,
+                        self._student_id,
+                        {day: [item.to_row() for item in items] for day, items in fetched_days.items()}
+                    )
+            yield fetched_days
+
+    def _fetch_and_store(self, first_day: date, last_day: date) -> dict[date, list[CalenItem]]:
+        """Request the days from `first_day` to `last_day` and store the fully covered ones in cache"""
+        items_by_day: dict[date, list[CalenItem]] = {}
+        for fetched_days in self._iter_fetch_and_store(first_day, last_day):
+            items_by_day.update(fetched_days)
+        return items_by_day
+
     def get_data(self, day_range: int, dt: datetime | None = None) -> list[CalenItem]:
         """Fetch data from the API, use current time if `dt` is not provided
+
+        Days already covered by the cache are answered from it, only the missing days are requested.
         
         Raises:
             `ConnectionError` : When having network errors
             `TimeoutError` : When the request have not responsed within 10s 
         """
+        with profiling.span("get_data"):
+            return list(self.iter_data(day_range, dt))
 
-        if dt is None:
-            dt = datetime.now(timezone.utc)
-        elif dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
+    def iter_data(self, day_range: int, dt: datetime | None = None) -> Iterator[CalenItem]:
+        """Same as `get_data`, but items are yielded in order as soon as their day is known,
+        so a long range is never held in memory at once
+
+        Raises:
+            `ConnectionError` : When having network errors
+            `TimeoutError` : When the request have not responsed within 10s 
+        """
+        dt = self._normalize_dt(dt)
+        end_date = dt + timedelta(days=day_range)
+        first_day = dt.date()
+        last_day = end_date.date()
 
         # Periodically clean expired cache entries (about 10% of the time)
-        if self._cache_manager is not None:
-            if random.random() < 0.1:  # 10% chance to clean expired cache files
+        if self._cache_manager is not None and self._clean_expired and random.random() < 0.1:
+            with profiling.span("cache.clear_expired"):
                 self._cache_manager.clear_expired()
 
-            # Check cache first
-            cached_result = self._cache_manager.get(
-                self._api_url,
-                self._student_id,
-                dt,
-                day_range
-            )
-
-            if cached_result is not None:
-                # Convert cached data back to CalenItem objects
-                return [
-                    CalenItem.model_validate(item_dict)
-                    for item_dict in cached_result
-                ]
-
-        # Prepare payload and make API request
-        payload = {
-            "StudentID": self._student_id,
-            "Ngay": dt,
-            "PageIndex": 1,
-            "PageSize": 30
+        # Check cache first
+        cached: dict[date, list[CalenItem]] = {
+            day: items
+            for day, (items, _) in self._read_cache(first_day, last_day).items()
         }
 
+        def in_range(items: list[CalenItem]) -> list[CalenItem]:
+            return [item for item in items if item.end_time <= end_date and item.start_time >= dt]
+
+        missing_days = [day for day in iter_days(first_day, last_day) if day not in cached]
+        if not missing_days:
+            for day in iter_days(first_day, last_day):
+                yield from in_range(cached[day])
+            return
+
+        with self._single_flight() as waited:
+            if waited:
+                # Another invocation fetched this student meanwhile, only fetch what it did not store
+                cached.update(
+                    (day, items)
+                    for day, (items, _) in self._read_cache(missing_days[0], missing_days[-1]).items()
+                )
+                missing_days = [day for day in missing_days if day not in cached]
+                if not missing_days:
+                    for day in iter_days(first_day, last_day):
+                        yield from in_range(cached[day])
+                    return
+
+            for day in iter_days(first_day, missing_days[0] - timedelta(days=1)):
+                yield from in_range(cached[day])
+            # One request covering the span of missing days, page by page
+            with profiling.span("fetch"):
+                for fetched_days in self._iter_fetch_and_store(missing_days[0], missing_days[-1]):
+                    for day in sorted(fetched_days):
+                        yield from in_range(fetched_days[day])
+        for day in iter_days(missing_days[-1] + timedelta(days=1), last_day):
+            yield from in_range(cached[day])
+
+    def get_table(self, day_range: int, dt: datetime | None = None) -> "ScheduleTable":
+        """Like `get_data`, collected into a columnar `ScheduleTable`"""
+        from src.core.schedule_table import ScheduleTable
+        with profiling.span("get_data"):
+            return ScheduleTable.from_items(self.iter_data(day_range, dt), self._student_id)
+
+    def get_cached_data(self, day_range: int, dt: datetime | None = None) -> CachedSchedule | None:
+        """Answer from the cache only, accepting days that expired less than the stale grace period ago
+
+        Returns:
+            The cached schedule, `None` if some day of the range is not cached
+        """
+        if self._cache_manager is None:
+            return None
+
+        dt = self._normalize_dt(dt)
+        end_date = dt + timedelta(days=day_range)
+        first_day = dt.date()
+        last_day = end_date.date()
+
+        with profiling.span("get_cached_data"):
+            cached = self._read_cache(first_day, last_day, self._cache_manager.retention)
+        if len(cached) < len(iter_days(first_day, last_day)):
+            return None
+
+        fetched_at = min(fetched_at for _, fetched_at in cached.values())
+        return CachedSchedule(
+            items=self._select_items({day: items for day, (items, _) in cached.items()}, dt, end_date),
+            fetched_at=fetched_at,
+            is_stale=datetime.now() - fetched_at > self._cache_manager.ttl
+        )
+
+    def refresh(self, day_range: int, dt: datetime | None = None) -> list[CalenItem]:
+        """Fetch the whole range from the API, ignoring and then updating the cache
+
+        Raises:
+            `ConnectionError` : When having network errors
+            `TimeoutError` : When the request have not responsed within 10s 
+        """
+        dt = self._normalize_dt(dt)
+        end_date = dt + timedelta(days=day_range)
+        items_by_day = self._fetch_and_store(dt.date(), end_date.date())
+        return self._select_items(items_by_day, dt, end_date)
+
+    def _fetch_page(self, first_day: date, page_index: int) -> tuple[list[CalenItem], int | None]:
+        """Request one page of the schedule starting at `first_day`
+
+        Returns:
+            The items of the page, and the total number of items if the response reports it
+        """
+        with profiling.span("imports"):
+            import requests
+
+        breaker = self._cache_manager.circuit_breaker if self._cache_manager is not None else None
+        if breaker is not None:
+            retry_at = breaker.check(self._api_url)
+            if retry_at is not None:
+                profiling.count("circuit.rejected")
+                raise CircuitOpenError(datetime.fromtimestamp(retry_at))
+
+        payload = page_payload(self._student_id, first_day, page_index)
+
         try:
-            res: Response = requests.post(self._api_url, payload, timeout=10)
-            res.raise_for_status()
+            # Concurrent callers asking for the same student, date and page share one request
+            with profiling.span("http"):
+                body = self.transport.post_json(
+                    self._api_url,
+                    payload,
+                    coalesce_key=(self._api_url, self._student_id, first_day, page_index)
+                )
         except requests.exceptions.ConnectionError:
+            self._record_failure(breaker)
             raise ConnectionError()
         except requests.exceptions.Timeout:
+            self._record_failure(breaker)
             raise TimeoutError()
-         
-        raw_data = res.json()["data"][2]
-        parsed_data = [
-            CalenItem(
-                start_time    = parse_string_datetime(d["ThoiGianBD"]),
-                end_time      = parse_string_datetime(d["ThoiGianKT"]),
-                room_name     = d["TenPhong"],
-                subject_name  = d["TenMonHoc"],
-                facility_name = d["TenCoSo"],
-                is_cancelled  = d["TinhTrang"] == 1 or d["TinhTrang"] == 6 # 1 là hủy, 6 là nghỉ lễ
-            )
-            for d in raw_data
-        ]
-        end_date = dt + timedelta(days=day_range)
-        filtered_data = [
-            item
-            for item in parsed_data
-            if item.end_time <= end_date and item.start_time >= dt
-        ]
+        except requests.exceptions.HTTPError as e:
+            # Server errors (still failing after the retries) mean the API is down, client errors do not
+            if e.response is not None and e.response.status_code >= 500:
+                self._record_failure(breaker)
+            elif breaker is not None:
+                breaker.record_success(self._api_url)
+            raise
+        except requests.exceptions.JSONDecodeError:
+            # The API answered, only not with JSON
+            if breaker is not None:
+                breaker.record_success(self._api_url)
+            raise
+        except Exception:
+            self._record_failure(breaker)
+            raise
+        except BaseException:
+            # Interrupted, there is no outcome but a probe must not stay taken
+            if breaker is not None:
+                breaker.release_probe(self._api_url)
+            raise
+        if breaker is not None:
+            breaker.record_success(self._api_url)
 
-        if self._cache_manager is not None:
-            # Store the result in cache
-            cacheable_data = [
-                item.model_dump(mode='json')
-                for item in filtered_data
-            ]
-            
-            self._cache_manager.set(
-                self._api_url,
-                self._student_id,
-                dt,
-                day_range,
-                cacheable_data
-            )
+        with profiling.span("parse"):
+            return parse_page(body)
+
+    def _record_failure(self, breaker: "CircuitBreaker | None") -> None:
+        profiling.count("circuit.failures")
+        if breaker is not None:
+            breaker.record_failure(self._api_url)
+
+    def _fetch_days(self, first_day: date, last_day: date) -> Iterator[tuple[dict[date, list[CalenItem]], bool]]:
+        """Request the schedule starting at `first_day` page by page and group the items by day
+
+        Page 1 tells how many items there are (or is a short last page). The following pages
+        are requested concurrently, at most `APIConfigs.PAGE_WORKERS` at a time and no further
+        than the page holding `last_day`. Pages are consumed in order as they arrive.
+
+        Yields:
+            Items of consecutive days from `first_day` to `last_day` as soon as they are complete,
+            and whether they are (`False` only for the days left when `APIConfigs.MAX_PAGES` is reached)
+        """
+        days = PagedDays(first_day, last_day)
+        first_page, total = self._fetch_page(first_day, 1)
+        if days.consume(first_page):
+            yield days.take_until(last_day), True
+            return
+        yield days.complete_days(first_page), True
+
+        total_pages, last_page, needed_page = days.plan(first_page, total)
+
+        next_page = 2
+        consumed_page = 1
+        fetch_page = profiling.propagate(self._fetch_page)
+        arrived: dict[int, list[CalenItem]] = {}
+        in_flight: dict[Future, int] = {}
+        with ThreadPoolExecutor(max_workers=APIConfigs.PAGE_WORKERS) as executor:
+            try:
+                while consumed_page < last_page:
+                    if next_page > needed_page and not in_flight:
+                        # The guess was short, keep going
+                        needed_page = min(last_page, needed_page + APIConfigs.PAGE_WORKERS)
+                    while next_page <= needed_page and len(in_flight) < APIConfigs.PAGE_WORKERS:
+                        in_flight[executor.submit(fetch_page, first_day, next_page)] = next_page
+                        next_page += 1
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        arrived[in_flight.pop(future)] = future.result()[0]
+
+                    # Pages are consumed in order, a page that arrives early waits for the previous ones
+                    while consumed_page + 1 in arrived:
+                        consumed_page += 1
+                        page = arrived.pop(consumed_page)
+                        if days.consume(page):
+                            yield days.take_until(last_day), True
+                            return
+                        yield days.complete_days(page), True
+            finally:
+                for future in in_flight:
+                    future.cancel()
 
-        return filtered_data
+        # Every page was read (the total was a multiple of the page size), unless the page limit was hit first
+        yield days.take_until(last_day), total_pages is not None and total_pages <= APIConfigs.MAX_PAGES
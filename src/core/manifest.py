@@ -0,0 +1,186 @@
+import json
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from src.utils.files import FileLock, atomic_write
+
+@dataclass
+class CacheStats:
+    """Usage of a cache, as shown by `cache stats`."""
+    entries: int
+    bytes_used: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+
+class CacheManifest:
+    """
+    Index of the store files of a cache directory.
+
+    For every entry (store file) it records the fetch time of its newest data, the last
+    access time and its size, together with hit/miss/eviction counters. Expiry and
+    eviction run from the manifest alone, without opening the store files.
+
+    Reads are recorded in memory and merged into the file by `flush`, so a cache hit
+    never writes to disk on its way to the screen.
+    """
+
+    def __init__(self, path: Path, data_suffix: str) -> None:
+        """
+        Args:
+            path: Location of the manifest file
+            data_suffix: Extension of the store files it indexes
+        """
+        self._path: Path = path
+        self._data_suffix: str = data_suffix
+        self._lock: threading.Lock = threading.Lock()
+        self._lock_path: Path = path.with_name(f"{path.name}.lock")
+        self._pending_access: dict[str, float] = {}
+        self._pending_counters: Counter[str] = Counter()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the lock of this instance and the file lock shared with other processes, around a read-modify-write"""
+        with self._lock, FileLock(self._lock_path):
+            yield
+
+    def _load(self) -> dict:
+        try:
+            with open(self._path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+            if isinstance(raw.get('entries'), dict) and isinstance(raw.get('counters'), dict):
+                return raw
+        except (json.JSONDecodeError, AttributeError, OSError):
+            pass
+        return {'entries': {}, 'counters': {}}
+
+    def _save(self, raw: dict) -> None:
+        try:
+            atomic_write(self._path, json.dumps(raw, separators=(',', ':')).encode('utf-8'))
+        except OSError:
+            pass
+
+    def _apply_pending(self, raw: dict) -> None:
+        entries: dict[str, dict] = raw['entries']
+        for key, accessed_at in self._pending_access.items():
+            if key in entries:
+                entries[key]['accessed_at'] = max(entries[key]['accessed_at'], accessed_at)
+        for name, value in self._pending_counters.items():
+            raw['counters'][name] = raw['counters'].get(name, 0) + value
+        self._pending_access.clear()
+        self._pending_counters.clear()
+
+    def _reconcile(self, raw: dict) -> None:
+        """Drop entries whose file is gone and index files the manifest does not know (using `stat` only)"""
+        entries: dict[str, dict] = raw['entries']
+        on_disk = {path.stem: path for path in self._path.parent.glob(f"*{self._data_suffix}")}
+        for key in list(entries):
+            if key not in on_disk:
+                del entries[key]
+        for key, path in on_disk.items():
+            if key not in entries:
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries[key] = {'fetched_at': stat.st_mtime, 'accessed_at': stat.st_mtime, 'size': stat.st_size}
+
+    def record_access(self, key: str, hit: bool) -> None:
+        with self._lock:
+            self._pending_access[key] = time.time()
+            self._pending_counters['hits' if hit else 'misses'] += 1
+
+    def record_set(self, key: str, size: int) -> None:
+        """Record that the store `key` was just written with fresh data"""
+        now = time.time()
+        with self._locked():
+            raw = self._load()
+            self._apply_pending(raw)
+            raw['entries'][key] = {'fetched_at': now, 'accessed_at': now, 'size': size}
+            self._save(raw)
+
+    def _remove(self, raw: dict, keys: list[str], counter: str) -> None:
+        for key in keys:
+            del raw['entries'][key]
+        if keys:
+            raw['counters'][counter] = raw['counters'].get(counter, 0) + len(keys)
+
+    def expire(self, min_fetched_at: float) -> list[str]:
+        """Remove the entries whose newest data was fetched before `min_fetched_at`
+
+        Returns:
+            Keys of the removed entries, the caller removes their files
+        """
+        with self._locked():
+            raw = self._load()
+            self._apply_pending(raw)
+            self._reconcile(raw)
+            entries: dict[str, dict] = raw['entries']
+            expired = [key for key, entry in entries.items() if entry['fetched_at'] < min_fetched_at]
+            self._remove(raw, expired, 'expirations')
+            self._save(raw)
+            return expired
+
+    def evict(self, max_entries: int, max_bytes: int) -> list[str]:
+        """Remove the least recently used entries until there are at most `max_entries` entries
+        using at most `max_bytes` bytes, a limit of 0 means no limit
+
+        Returns:
+            Keys of the removed entries, the caller removes their files
+        """
+        with self._locked():
+            raw = self._load()
+            self._apply_pending(raw)
+            self._reconcile(raw)
+            entries: dict[str, dict] = raw['entries']
+            count = len(entries)
+            total_size = sum(entry['size'] for entry in entries.values())
+            evicted: list[str] = []
+            for key in sorted(entries, key=lambda key: entries[key]['accessed_at']):
+                if (not max_entries or count <= max_entries) and (not max_bytes or total_size <= max_bytes):
+                    break
+                evicted.append(key)
+                count -= 1
+                total_size -= entries[key]['size']
+            self._remove(raw, evicted, 'evictions')
+            self._save(raw)
+            return evicted
+
+    def clear(self) -> None:
+        """Forget every entry, counters are kept"""
+        with self._locked():
+            raw = self._load()
+            self._apply_pending(raw)
+            raw['entries'] = {}
+            self._save(raw)
+
+    def stats(self) -> CacheStats:
+        with self._locked():
+            raw = self._load()
+            self._apply_pending(raw)
+            self._reconcile(raw)
+            self._save(raw)
+        entries: dict[str, dict] = raw['entries']
+        counters: dict[str, int] = raw['counters']
+        return CacheStats(
+            entries=len(entries),
+            bytes_used=sum(entry['size'] for entry in entries.values()),
+            hits=counters.get('hits', 0),
+            misses=counters.get('misses', 0),
+            evictions=counters.get('evictions', 0),
+            expirations=counters.get('expirations', 0)
+        )
+
+    def flush(self) -> None:
+        """Merge the recorded reads into the manifest file"""
+        with self._locked():
+            if not self._pending_access and not self._pending_counters:
+                return
+            raw = self._load()
+            self._apply_pending(raw)
+            self._save(raw)
@@ -0,0 +1,230 @@
+import sqlite3
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS occupancy (
+    facility    TEXT NOT NULL,
+    room        TEXT NOT NULL,
+    start       INTEGER NOT NULL,
+    end         INTEGER NOT NULL,
+    subject     TEXT NOT NULL,
+    api_url     TEXT NOT NULL,
+    student_id  TEXT NOT NULL,
+    day         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_occupancy_start ON occupancy (start);
+CREATE INDEX IF NOT EXISTS idx_occupancy_room ON occupancy (facility, room, start);
+CREATE INDEX IF NOT EXISTS idx_occupancy_student ON occupancy (api_url, student_id, day);
+CREATE TABLE IF NOT EXISTS rooms (
+    facility  TEXT NOT NULL,
+    room      TEXT NOT NULL,
+    PRIMARY KEY (facility, room)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    name   TEXT PRIMARY KEY,
+    value  INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+def _epoch(dt: datetime) -> int:
+    """Epoch seconds of a local (naive) time, the way session times are stored: local times labelled as UTC"""
+    return int(dt.replace(tzinfo=timezone.utc).timestamp())
+
+def _local(epoch: int) -> datetime:
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None)
+
+@dataclass
+class RoomOccupancy:
+    """A session taking place in a room, shared by `students` cached students."""
+    subject: str
+    start: datetime
+    end: datetime
+    students: int
+
+@dataclass
+class RoomStatus:
+    """Whether a room is busy at a given time, and the next session of the room when it is free."""
+    facility: str
+    room: str
+    occupancy: RoomOccupancy | None
+    # Start of the next known session when the room is free, `None` if there is none
+    free_until: datetime | None
+
+    @property
+    def busy(self) -> bool:
+        return self.occupancy is not None
+
+class RoomIndex:
+    """
+    Inverted index from room to the sessions held in it, built from cached schedules.
+
+    Every `CacheManager.set` replaces the indexed sessions of the stored student days, so
+    the index follows the cache without rescanning it. Sessions are indexed by start
+    time, and the longest session seen bounds how far back a lookup has to look, so
+    "which rooms are busy at T" is a range scan of the sessions starting shortly before T.
+    Cancelled sessions are not indexed, their room is free.
+
+    Sessions stay indexed when their student is evicted from the cache, they are dropped
+    once they ended more than the cache retention ago (see `prune`).
+    """
+
+    DB_FILE_NAME: str = "rooms.sqlite3"
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path: Path = db_path
+        # sqlite3 connections can not be shared between threads, keep one per thread
+        self._local: threading.local = threading.local()
+        try:
+            self._create_schema()
+        except sqlite3.DatabaseError:
+            # If the index is corrupted, start over, `rebuild` fills it again
+            conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+            if conn is not None:
+                conn.close()
+            self._local.conn = None
+            for path in (self.db_path, Path(f"{self.db_path}-wal"), Path(f"{self.db_path}-shm")):
+                path.unlink(missing_ok=True)
+            self._create_schema()
+
+    def _create_schema(self) -> None:
+        conn = self._connect()
+        with conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, api_url: str, student_id: str, data: dict[date, list[list]]) -> None:
+        conn.executemany(
+            "DELETE FROM occupancy WHERE api_url = ? AND student_id = ? AND day = ?",
+            [(api_url, student_id, day.isoformat()) for day in data]
+        )
+        # Rows are `CalenItem.to_row`: start, end, room, subject, facility, cancelled
+        rows = [
+            (row[4], row[2], row[0], row[1], row[3], api_url, student_id, day.isoformat())
+            for day, items in data.items()
+            for row in items
+            if not row[5]
+        ]
+        if not rows:
+            return
+        conn.executemany("INSERT INTO occupancy VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany("INSERT OR IGNORE INTO rooms VALUES (?, ?)", {(row[0], row[1]) for row in rows})
+        conn.execute(
+            "INSERT INTO meta VALUES ('max_duration', ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = MAX(value, excluded.value)",
+            (max(row[3] - row[2] for row in rows),)
+        )
+
+    def update(self, api_url: str, student_id: str, data: dict[date, list[list]]) -> None:
+        """Replace the indexed sessions of the given days of a student, called by `CacheManager.set`"""
+        try:
+            conn = self._connect()
+            with conn:
+                self._write(conn, api_url, student_id, data)
+        except sqlite3.Error:
+            # The index is a convenience, never break caching because of it
+            pass
+
+    def rebuild(self, stores: Iterable[tuple[str, str, dict]]) -> int:
+        """
+        Index every store from scratch, for caches filled before the index existed.
+
+        Args:
+            stores: API URL, student ID and cached days of each store, see `CacheManager.iter_stores`
+
+        Returns:
+            Number of students indexed
+        """
+        conn = self._connect()
+        count = 0
+        with conn:
+            conn.execute("DELETE FROM occupancy")
+            conn.execute("DELETE FROM rooms")
+            conn.execute("DELETE FROM meta")
+            for api_url, student_id, days in stores:
+                self._write(conn, api_url, student_id, {day: cached_day.items for day, cached_day in days.items()})
+                count += 1
+        return count
+
+    def prune(self, before: datetime) -> int:
+        """
+        Drop the sessions that ended before `before` (local time).
+
+        Returns:
+            Number of sessions removed
+        """
+        try:
+            conn = self._connect()
+            with conn:
+                return conn.execute("DELETE FROM occupancy WHERE end < ?", (_epoch(before),)).rowcount
+        except sqlite3.Error:
+            return 0
+
+    def clear(self) -> None:
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM occupancy")
+                conn.execute("DELETE FROM rooms")
+                conn.execute("DELETE FROM meta")
+        except sqlite3.Error:
+            pass
+
+    def facilities(self) -> list[str]:
+        return [facility for facility, in self._connect().execute("SELECT DISTINCT facility FROM rooms ORDER BY facility")]
+
+    def status_at(self, at: datetime, facility: str | None = None) -> list[RoomStatus]:
+        """
+        Every known room (of `facility`, or of all facilities) with the session held in it at `at` (local time).
+
+        Busy rooms are found with one range scan of the start time index, the next session
+        of each free room with one lookup of the room index.
+        """
+        conn = self._connect()
+        moment = _epoch(at)
+        max_duration = conn.execute("SELECT value FROM meta WHERE name = 'max_duration'").fetchone()
+        if max_duration is None:
+            return []
+
+        query = (
+            "SELECT facility, room, subject, start, end, COUNT(*) FROM occupancy "
+            "WHERE start > ? AND start <= ? AND end > ?"
+        )
+        params: list = [moment - max_duration[0] - 1, moment, moment]
+        if facility is not None:
+            query += " AND facility = ?"
+            params.append(facility)
+        query += " GROUP BY facility, room, subject, start, end"
+        busy: dict[tuple[str, str], RoomOccupancy] = {}
+        for room_facility, room, subject, start, end, students in conn.execute(query, params):
+            busy[(room_facility, room)] = RoomOccupancy(subject, _local(start), _local(end), students)
+
+        if facility is None:
+            rooms = conn.execute("SELECT facility, room FROM rooms ORDER BY facility, room").fetchall()
+        else:
+            rooms = conn.execute("SELECT facility, room FROM rooms WHERE facility = ? ORDER BY room", (facility,)).fetchall()
+
+        statuses: list[RoomStatus] = []
+        for room_facility, room in rooms:
+            occupancy = busy.get((room_facility, room))
+            free_until = None
+            if occupancy is None:
+                next_start = conn.execute(
+                    "SELECT MIN(start) FROM occupancy WHERE facility = ? AND room = ? AND start > ?",
+                    (room_facility, room, moment)
+                ).fetchone()[0]
+                free_until = _local(next_start) if next_start is not None else None
+            statuses.append(RoomStatus(room_facility, room, occupancy, free_until))
+        return statuses
@@ -0,0 +1,244 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from datetime import date, datetime, timezone
+from itertools import compress
+from operator import itemgetter
+
+from src.core.lhu_calen_api import CalenItem
+
+_DAY_SECONDS = 86400
+
+# Bytes of eight 0/1 flags for every packed byte (least significant bit first), and back
+_UNPACK: list[bytes] = [bytes((value >> bit) & 1 for bit in range(8)) for value in range(256)]
+_PACK: dict[bytes, int] = {flags: value for value, flags in enumerate(_UNPACK)}
+
+def _pack(flags: bytes) -> bytes:
+    """Pack 0/1 flags, 8 per byte"""
+    padding = -len(flags) % 8
+    if padding:
+        flags += bytes(padding)
+    return bytes(_PACK[flags[i:i + 8]] for i in range(0, len(flags), 8))
+
+def _gather(typecode: str, column: array | bytes, indices: list[int]) -> array:
+    """`column[i]` for every index, in one C-level pass"""
+    if len(indices) < 2:
+        return array(typecode, [column[i] for i in indices])
+    return array(typecode, itemgetter(*indices)(column))
+
+def _unpack(bits: bytes, offset: int, count: int) -> bytes:
+    """0/1 flags of `count` packed bits from bit `offset`"""
+    first, last = offset >> 3, (offset + count + 7) >> 3
+    flags = b"".join(map(_UNPACK.__getitem__, bits[first:last]))
+    start = offset - (first << 3)
+    return flags[start:start + count]
+
+class StringDictionary:
+    """Distinct strings of a column, rows store their index (code) instead of the string."""
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code_of(self, value: str) -> int | None:
+        return self._codes.get(value)
+
+class ScheduleTable:
+    """
+    Sessions of any number of students, stored column by column.
+
+    Start and end are int64 epoch columns (the `CalenItem.to_row` encoding), `is_cancelled`
+    is packed 8 rows per byte, and the student, subject, room and facility columns hold
+    codes into shared `StringDictionary`s, so a session costs about 32 bytes instead of
+    a few hundred for a `CalenItem` with its datetimes and strings.
+
+    Rows are sorted by start time: time ranges and days are found by bisection and cut
+    out as array slices, other filters run through `itertools.compress` without
+    building a Python object per row. Tables returned by operations share the
+    dictionaries of the table they come from.
+
+    Build tables with `ScheduleTableBuilder` (or `from_items`), turn rows back into
+    `CalenItem`s with `items`.
+    """
+
+    __slots__ = ("start", "end", "student", "subject", "room", "facility",
+                 "_cancelled_bits", "_cancelled_offset", "students", "subjects", "rooms", "facilities")
+
+    def __init__(
+            self,
+            start: array,
+            end: array,
+            student: array,
+            subject: array,
+            room: array,
+            facility: array,
+            cancelled_bits: bytes,
+            cancelled_offset: int,
+            dictionaries: tuple[StringDictionary, StringDictionary, StringDictionary, StringDictionary]
+        ) -> None:
+        self.start: array = start
+        self.end: array = end
+        self.student: array = student
+        self.subject: array = subject
+        self.room: array = room
+        self.facility: array = facility
+        self._cancelled_bits: bytes = cancelled_bits
+        self._cancelled_offset: int = cancelled_offset
+        self.students, self.subjects, self.rooms, self.facilities = dictionaries
+
+    @classmethod
+    def from_items(cls, calen_items: Iterable[CalenItem], student_id: str = "") -> "ScheduleTable":
+        builder = ScheduleTableBuilder()
+        builder.extend(student_id, calen_items)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @property
+    def _dictionaries(self) -> tuple[StringDictionary, StringDictionary, StringDictionary, StringDictionary]:
+        return self.students, self.subjects, self.rooms, self.facilities
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the columns, the dictionaries aside"""
+        columns = (self.start, self.end, self.student, self.subject, self.room, self.facility)
+        return sum(column.itemsize * len(column) for column in columns) + (len(self) + 7) // 8
+
+    def cancelled_flags(self) -> bytes:
+        """`is_cancelled` of every row as 0/1 bytes"""
+        return _unpack(self._cancelled_bits, self._cancelled_offset, len(self))
+
+    def is_cancelled(self, index: int) -> bool:
+        bit = self._cancelled_offset + index
+        return bool((self._cancelled_bits[bit >> 3] >> (bit & 7)) & 1)
+
+    def _slice(self, first: int, last: int) -> "ScheduleTable":
+        return ScheduleTable(
+            self.start[first:last], self.end[first:last], self.student[first:last],
+            self.subject[first:last], self.room[first:last], self.facility[first:last],
+            # The packed bits are shared, only the offset moves
+            self._cancelled_bits, self._cancelled_offset + first,
+            self._dictionaries
+        )
+
+    def where(self, mask: Iterable[bool | int]) -> "ScheduleTable":
+        """Rows whose `mask` value is true, in order"""
+        mask = bytes(map(bool, mask))
+        return ScheduleTable(
+            array("q", compress(self.start, mask)), array("q", compress(self.end, mask)),
+            array("I", compress(self.student, mask)), array("I", compress(self.subject, mask)),
+            array("I", compress(self.room, mask)), array("I", compress(self.facility, mask)),
+            _pack(bytes(compress(self.cancelled_flags(), mask))), 0,
+            self._dictionaries
+        )
+
+    def take(self, indices: Iterable[int]) -> "ScheduleTable":
+        """Rows at `indices`, in that order"""
+        indices = list(indices)
+        return ScheduleTable(
+            _gather("q", self.start, indices), _gather("q", self.end, indices),
+            _gather("I", self.student, indices), _gather("I", self.subject, indices),
+            _gather("I", self.room, indices), _gather("I", self.facility, indices),
+            _pack(_gather("B", self.cancelled_flags(), indices).tobytes()), 0,
+            self._dictionaries
+        )
+
+    def between(self, first: datetime, last: datetime) -> "ScheduleTable":
+        """Sessions starting from `first` and before `last`, found by bisection"""
+        lower = bisect_left(self.start, int(first.timestamp()))
+        upper = bisect_left(self.start, int(last.timestamp()), lower)
+        return self._slice(lower, upper)
+
+    def active(self) -> "ScheduleTable":
+        """Sessions that are not cancelled"""
+        return self.where(map((0).__eq__, self.cancelled_flags()))
+
+    def for_students(self, student_ids: Iterable[str]) -> "ScheduleTable":
+        codes = frozenset(code for code in map(self.students.code_of, student_ids) if code is not None)
+        return self.where(map(codes.__contains__, self.student))
+
+    def for_facility(self, facility_name: str) -> "ScheduleTable":
+        code = self.facilities.code_of(facility_name)
+        if code is None:
+            return self._slice(0, 0)
+        return self.where(map(code.__eq__, self.facility))
+
+    def group_by_day(self) -> dict[date, "ScheduleTable"]:
+        """Sessions by day of their start, each day cut out by bisection"""
+        groups: dict[date, ScheduleTable] = {}
+        first = 0
+        while first < len(self):
+            day = self.start[first] // _DAY_SECONDS
+            last = bisect_left(self.start, (day + 1) * _DAY_SECONDS, first)
+            groups[datetime.fromtimestamp(day * _DAY_SECONDS, timezone.utc).date()] = self._slice(first, last)
+            first = last
+        return groups
+
+    def group_by_student(self) -> dict[str, "ScheduleTable"]:
+        """Sessions by student, each still sorted by start"""
+        # A stable sort on the student code keeps the start order within each student
+        order = sorted(range(len(self)), key=self.student.__getitem__)
+        grouped = self.take(order)
+        groups: dict[str, ScheduleTable] = {}
+        first = 0
+        while first < len(grouped):
+            code = grouped.student[first]
+            last = bisect_left(grouped.student, code + 1, first)
+            part = grouped._slice(first, last)
+            groups[self.students.values[code]] = part
+            first = last
+        return groups
+
+    def items(self) -> list[CalenItem]:
+        """The rows as `CalenItem`s"""
+        fromtimestamp = datetime.fromtimestamp
+        utc = timezone.utc
+        subjects, rooms, facilities = self.subjects.values, self.rooms.values, self.facilities.values
+        return [
+            CalenItem(fromtimestamp(start, utc), fromtimestamp(end, utc), rooms[room], subjects[subject], facilities[facility], bool(cancelled))
+            for start, end, room, subject, facility, cancelled
+            in zip(self.start, self.end, self.room, self.subject, self.facility, self.cancelled_flags())
+        ]
+
+class ScheduleTableBuilder:
+    """Collects sessions in any order, `build` sorts them into a `ScheduleTable`."""
+
+    def __init__(self) -> None:
+        self._start: array = array("q")
+        self._end: array = array("q")
+        self._student: array = array("I")
+        self._subject: array = array("I")
+        self._room: array = array("I")
+        self._facility: array = array("I")
+        self._cancelled: bytearray = bytearray()
+        self._dictionaries = (StringDictionary(), StringDictionary(), StringDictionary(), StringDictionary())
+
+    def extend(self, student_id: str, calen_items: Iterable[CalenItem]) -> None:
+        """Add the sessions of one student"""
+        students, subjects, rooms, facilities = self._dictionaries
+        student_code = students.encode(student_id)
+        for item in calen_items:
+            self._start.append(int(item.start_time.timestamp()))
+            self._end.append(int(item.end_time.timestamp()))
+            self._student.append(student_code)
+            self._subject.append(subjects.encode(item.subject_name))
+            self._room.append(rooms.encode(item.room_name))
+            self._facility.append(facilities.encode(item.facility_name))
+            self._cancelled.append(item.is_cancelled)
+
+    def build(self) -> ScheduleTable:
+        unsorted = ScheduleTable(
+            self._start, self._end, self._student, self._subject, self._room, self._facility,
+            _pack(bytes(self._cancelled)), 0, self._dictionaries
+        )
+        if all(map(int.__le__, self._start, self._start[1:])):
+            return unsorted
+        return unsorted.take(sorted(range(len(self._start)), key=self._start.__getitem__))
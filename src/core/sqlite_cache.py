@@ -0,0 +1,425 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from src.core.cache import CacheManager, CachedDay
+from src.core.manifest import CacheStats
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedule_days (
+    api_url     TEXT NOT NULL,
+    student_id  TEXT NOT NULL,
+    day         TEXT NOT NULL,
+    fetched_at  REAL NOT NULL,
+    items       TEXT NOT NULL,
+    PRIMARY KEY (api_url, student_id, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_schedule_days_fetched_at ON schedule_days (fetched_at);
+CREATE TABLE IF NOT EXISTS students (
+    api_url      TEXT NOT NULL,
+    student_id   TEXT NOT NULL,
+    accessed_at  REAL NOT NULL,
+    -- Size of the stored items (LENGTH of the items column) and number of days,
+    -- kept up to date by every write so the limits are checked without a scan
+    bytes        INTEGER NOT NULL DEFAULT 0,
+    days         INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (api_url, student_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS counters (
+    name   TEXT PRIMARY KEY,
+    value  INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+class SQLiteCacheManager(CacheManager):
+    """
+    A cache manager storing every student's days in a single SQLite database.
+
+    Rows are indexed by student and day (primary key) and by fetch time, so lookups
+    and expiry never touch unrelated students. The database runs in WAL mode so
+    parallel invocations can read while another one writes.
+
+    Access times are kept per student for LRU eviction; like the manifest of the
+    file backends they are written at exit, not on every lookup. The size and day
+    count of every student are kept next to them, so a write only checks the totals
+    of the students table and eviction runs once a limit is actually crossed.
+    """
+
+    DB_FILE_NAME: str = "cache.sqlite3"
+
+    def __init__(
+            self,
+            app_name: str,
+            ttl_hours: int = 24,
+            stale_grace_hours: int = 0,
+            max_size_mb: float = 0,
+            max_entries: int = 0
+        ):
+        super().__init__(app_name, ttl_hours, stale_grace_hours, max_size_mb, max_entries)
+        self.db_path: Path = self.cache_dir / self.DB_FILE_NAME
+        # sqlite3 connections can not be shared between threads, keep one per thread
+        self._local: threading.local = threading.local()
+        self._pending_lock: threading.Lock = threading.Lock()
+        self._pending_access: dict[tuple[str, str], float] = {}
+        self._pending_counters: Counter[str] = Counter()
+
+        is_new = not self.db_path.exists()
+        try:
+            self._create_schema()
+        except sqlite3.DatabaseError:
+            # If the database is corrupted, start over with an empty one
+            conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+            if conn is not None:
+                conn.close()
+            self._local.conn = None
+            for path in (self.db_path, Path(f"{self.db_path}-wal"), Path(f"{self.db_path}-shm")):
+                path.unlink(missing_ok=True)
+            self._create_schema()
+
+        # Bring over the JSON stores the first time the database is created
+        if is_new:
+            self.migrate_from(CacheManager(app_name, ttl_hours, stale_grace_hours))
+
+    def _create_schema(self) -> None:
+        conn = self._connect()
+        with conn:
+            conn.executescript(_SCHEMA)
+
+        # Databases created before the per-student sizes were kept
+        if "bytes" not in self._student_columns(conn):
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # Another invocation may have upgraded it meanwhile
+                if "bytes" not in self._student_columns(conn):
+                    conn.execute("ALTER TABLE students ADD COLUMN bytes INTEGER NOT NULL DEFAULT 0")
+                    conn.execute("ALTER TABLE students ADD COLUMN days INTEGER NOT NULL DEFAULT 0")
+                    self._recount(conn)
+
+    @staticmethod
+    def _student_columns(conn: sqlite3.Connection) -> set[str]:
+        return {row[1] for row in conn.execute("PRAGMA table_info(students)")}
+
+    @staticmethod
+    def _recount(conn: sqlite3.Connection) -> None:
+        """Recompute the size and day count of every student from its rows, a full scan"""
+        conn.execute(
+            "INSERT OR IGNORE INTO students (api_url, student_id, accessed_at) "
+            "SELECT DISTINCT api_url, student_id, 0 FROM schedule_days"
+        )
+        conn.execute(
+            "UPDATE students SET (bytes, days) = (SELECT COALESCE(SUM(LENGTH(d.items)), 0), COUNT(*) FROM schedule_days d "
+            "WHERE d.api_url = students.api_url AND d.student_id = students.student_id)"
+        )
+        conn.execute("DELETE FROM students WHERE days = 0")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(
+            self,
+            api_url: str,
+            student_id: str,
+            first_day: date,
+            last_day: date,
+            max_age: timedelta | None = None
+        ) -> dict[date, CachedDay]:
+        """
+        Retrieve the cached days between `first_day` and `last_day` (inclusive) that haven't expired.
+        """
+        if max_age is None:
+            max_age = self.ttl
+        min_fetched_at = (datetime.now() - max_age).timestamp()
+        try:
+            rows = self._connect().execute(
+                "SELECT day, fetched_at, items FROM schedule_days "
+                "WHERE api_url = ? AND student_id = ? AND day BETWEEN ? AND ? AND fetched_at >= ?",
+                (api_url, student_id, first_day.isoformat(), last_day.isoformat(), min_fetched_at)
+            ).fetchall()
+        except sqlite3.Error:
+            return {}
+
+        days: dict[date, CachedDay] = {}
+        for day_str, fetched_at, items in rows:
+            try:
+                days[date.fromisoformat(day_str)] = CachedDay(json.loads(items), datetime.fromtimestamp(fetched_at))
+            except (json.JSONDecodeError, ValueError):
+                # Skip broken rows, they will be fetched and replaced
+                continue
+
+        with self._pending_lock:
+            self._pending_access[(api_url, student_id)] = time.time()
+            self._pending_counters['hits' if len(days) == (last_day - first_day).days + 1 else 'misses'] += 1
+        return days
+
+    def set(
+            self,
+            api_url: str,
+            student_id: str,
+            data: dict[date, list[list]]
+        ) -> None:
+        """
+        Store data in the cache.
+        """
+        if not data:
+            return
+
+        now = datetime.now().timestamp()
+        rows = [
+            (api_url, student_id, day.isoformat(), now, json.dumps(items, ensure_ascii=False, separators=(',', ':')))
+            for day, items in data.items()
+        ]
+        written_days = {row[2] for row in rows}
+        try:
+            conn = self._connect()
+            with conn:
+                # Taken before reading the replaced rows, so concurrent writers never count them twice
+                conn.execute("BEGIN IMMEDIATE")
+                replaced = [
+                    size
+                    for day, size in conn.execute(
+                        "SELECT day, LENGTH(items) FROM schedule_days "
+                        "WHERE api_url = ? AND student_id = ? AND day BETWEEN ? AND ?",
+                        (api_url, student_id, min(written_days), max(written_days))
+                    )
+                    if day in written_days
+                ]
+                conn.executemany("INSERT OR REPLACE INTO schedule_days VALUES (?, ?, ?, ?, ?)", rows)
+                conn.execute(
+                    "INSERT INTO students (api_url, student_id, accessed_at, bytes, days) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (api_url, student_id) DO UPDATE SET accessed_at = excluded.accessed_at, "
+                    "bytes = bytes + excluded.bytes, days = days + excluded.days",
+                    (api_url, student_id, now, sum(len(row[4]) for row in rows) - sum(replaced), len(rows) - len(replaced))
+                )
+                over_limits = self._over_limits(conn)
+        except sqlite3.Error:
+            # If we can't write to cache, just ignore (don't break the app)
+            return
+        self.room_index.update(api_url, student_id, data)
+        if over_limits:
+            self._evict()
+
+    def _over_limits(self, conn: sqlite3.Connection) -> bool:
+        """Whether the students exceed the size or count limit, from the kept totals (one row per student)"""
+        if not self.max_bytes and not self.max_entries:
+            return False
+        count, total_size = conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM students").fetchone()
+        return bool(self.max_entries and count > self.max_entries) or bool(self.max_bytes and total_size > self.max_bytes)
+
+    def _add_counter(self, conn: sqlite3.Connection, name: str, value: int) -> None:
+        if value:
+            conn.execute(
+                "INSERT INTO counters VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+                (name, value)
+            )
+
+    def flush(self) -> None:
+        """
+        Persist the access times and hit/miss counts recorded by `get`, run at exit.
+        """
+        with self._pending_lock:
+            if not self._pending_access and not self._pending_counters:
+                return
+            access = [(accessed_at, api_url, student_id) for (api_url, student_id), accessed_at in self._pending_access.items()]
+            counters = dict(self._pending_counters)
+            self._pending_access.clear()
+            self._pending_counters.clear()
+        try:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "UPDATE students SET accessed_at = MAX(accessed_at, ?) WHERE api_url = ? AND student_id = ?",
+                    access
+                )
+                for name, value in counters.items():
+                    self._add_counter(conn, name, value)
+        except sqlite3.Error:
+            pass
+
+    def _evict(self) -> int:
+        """
+        Evict the least recently used students above the size and count limits,
+        the size of a student being the size of its stored items (as kept by `set`).
+
+        Returns:
+            Number of students removed
+        """
+        if not self.max_bytes and not self.max_entries:
+            return 0
+        self.flush()
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                students = conn.execute(
+                    "SELECT api_url, student_id, bytes FROM students ORDER BY accessed_at"
+                ).fetchall()
+                count = len(students)
+                total_size = sum(size for _, _, size in students)
+                evicted: list[tuple[str, str]] = []
+                for api_url, student_id, size in students:
+                    if (not self.max_entries or count <= self.max_entries) and (not self.max_bytes or total_size <= self.max_bytes):
+                        break
+                    evicted.append((api_url, student_id))
+                    count -= 1
+                    total_size -= size
+                conn.executemany("DELETE FROM schedule_days WHERE api_url = ? AND student_id = ?", evicted)
+                conn.executemany("DELETE FROM students WHERE api_url = ? AND student_id = ?", evicted)
+                self._add_counter(conn, 'evictions', len(evicted))
+                return len(evicted)
+        except sqlite3.Error:
+            return 0
+
+    def stats(self) -> CacheStats:
+        """
+        Usage of the cache: students, bytes of stored items, hit/miss, eviction and expired day counts.
+        """
+        self.flush()
+        try:
+            conn = self._connect()
+            entries, bytes_used = conn.execute(
+                "SELECT COUNT(DISTINCT api_url || char(0) || student_id), COALESCE(SUM(LENGTH(items)), 0) FROM schedule_days"
+            ).fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        except sqlite3.Error:
+            entries, bytes_used, counters = 0, 0, {}
+        return CacheStats(
+            entries=entries,
+            bytes_used=bytes_used,
+            hits=counters.get('hits', 0),
+            misses=counters.get('misses', 0),
+            evictions=counters.get('evictions', 0),
+            expirations=counters.get('expirations', 0)
+        )
+
+    def migrate_from(self, cache_manager: CacheManager) -> int:
+        """
+        Copy every store of a JSON cache into the database, keeping the fetch times, then remove
+        the JSON files that were copied. Stores that could not be read or written are kept.
+
+        Returns:
+            Number of stores migrated
+        """
+        migrated: list[tuple[str, str]] = []
+        conn = self._connect()
+        for api_url, student_id, days in cache_manager.iter_stores():
+            rows = [
+                (api_url, student_id, day.isoformat(), cached_day.fetched_at.timestamp(),
+                 json.dumps(cached_day.items, ensure_ascii=False, separators=(',', ':')))
+                for day, cached_day in days.items()
+            ]
+            if not rows:
+                # Nothing to copy
+                migrated.append((api_url, student_id))
+                continue
+            try:
+                with conn:
+                    # Never overwrite data that is newer than the migrated one
+                    conn.executemany(
+                        "INSERT INTO schedule_days VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (api_url, student_id, day) DO UPDATE SET "
+                        "fetched_at = excluded.fetched_at, items = excluded.items "
+                        "WHERE excluded.fetched_at > schedule_days.fetched_at",
+                        rows
+                    )
+                    conn.execute(
+                        "INSERT OR IGNORE INTO students (api_url, student_id, accessed_at) VALUES (?, ?, ?)",
+                        (api_url, student_id, max(cached_day.fetched_at.timestamp() for cached_day in days.values()))
+                    )
+                migrated.append((api_url, student_id))
+            except sqlite3.Error:
+                # Kept for a later migration
+                continue
+
+        try:
+            with conn:
+                self._recount(conn)
+        except sqlite3.Error:
+            pass
+        for api_url, student_id in migrated:
+            cache_manager.remove_store(api_url, student_id)
+        # The room index is shared with the JSON stores, index the database instead
+        self.room_index.rebuild(self.iter_stores())
+        return len(migrated)
+
+    def iter_stores(self) -> Iterator[tuple[str, str, dict[date, CachedDay]]]:
+        """
+        Iterate over every student in the database.
+
+        Yields:
+            The API URL, the student ID and the cached days of each student
+        """
+        try:
+            rows = self._connect().execute(
+                "SELECT api_url, student_id, day, fetched_at, items FROM schedule_days ORDER BY api_url, student_id"
+            )
+            store: tuple[str, str, dict[date, CachedDay]] | None = None
+            for api_url, student_id, day_str, fetched_at, items in rows:
+                if store is None or store[:2] != (api_url, student_id):
+                    if store is not None:
+                        yield store
+                    store = (api_url, student_id, {})
+                try:
+                    store[2][date.fromisoformat(day_str)] = CachedDay(json.loads(items), datetime.fromtimestamp(fetched_at))
+                except (json.JSONDecodeError, ValueError):
+                    continue
+            if store is not None:
+                yield store
+        except sqlite3.Error:
+            return
+
+    def clear_expired(self) -> int:
+        """
+        Remove all days past the retention with a single indexed DELETE.
+
+        Returns:
+            Number of days removed
+        """
+        min_fetched_at = datetime.now() - self.retention
+        self.room_index.prune(min_fetched_at)
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # Sizes of the expired rows only, read through the fetch time index
+                expired = conn.execute(
+                    "SELECT SUM(LENGTH(items)), COUNT(*), api_url, student_id FROM schedule_days "
+                    "WHERE fetched_at < ? GROUP BY api_url, student_id",
+                    (min_fetched_at.timestamp(),)
+                ).fetchall()
+                removed = conn.execute("DELETE FROM schedule_days WHERE fetched_at < ?", (min_fetched_at.timestamp(),)).rowcount
+                conn.executemany(
+                    "UPDATE students SET bytes = bytes - ?, days = days - ? WHERE api_url = ? AND student_id = ?",
+                    expired
+                )
+                conn.execute("DELETE FROM students WHERE days <= 0")
+                self._add_counter(conn, 'expirations', removed)
+                return removed
+        except sqlite3.Error:
+            return 0
+
+    def clear_all(self) -> int:
+        """
+        Remove all cached days.
+
+        Returns:
+            Number of days removed
+        """
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM students")
+                removed = conn.execute("DELETE FROM schedule_days").rowcount
+        except sqlite3.Error:
+            return 0
+        self.room_index.clear()
+        return removed
@@ -0,0 +1,149 @@
+import random
+import threading
+import time
+from collections.abc import Hashable
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from src.core.configurations import TransportConfigs
+from src.utils import profiling
+
+# Responses worth retrying, anything else is returned (or raised) right away
+RETRYABLE_STATUS_CODES: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+
+class _InFlightCall:
+    """A request shared by every caller asking for the same key."""
+
+    def __init__(self) -> None:
+        self.done: threading.Event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+class _RateLimiter:
+    """Spaces requests at least `1 / rate` seconds apart, across every thread."""
+
+    def __init__(self, rate: float) -> None:
+        self._interval: float = 1 / rate
+        self._lock: threading.Lock = threading.Lock()
+        self._next_slot: float = 0.0
+
+    def acquire(self) -> None:
+        """Block until the next free slot"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class HTTPTransport:
+    """
+    HTTP transport shared by API clients.
+
+    It keeps a pooled keep-alive `requests.Session`, retries transient failures with
+    jittered exponential backoff, and coalesces concurrent identical requests so that
+    only one of them reaches the server. An optional rate limit spaces out every
+    request sent, retries included.
+    """
+
+    def __init__(
+            self,
+            pool_size: int = TransportConfigs.POOL_SIZE,
+            connect_timeout: float = TransportConfigs.CONNECT_TIMEOUT,
+            read_timeout: float = TransportConfigs.READ_TIMEOUT,
+            max_retries: int = TransportConfigs.MAX_RETRIES,
+            backoff_base: float = TransportConfigs.BACKOFF_BASE,
+            backoff_max: float = TransportConfigs.BACKOFF_MAX,
+            max_rate: float = 0
+        ) -> None:
+        """
+        Args:
+            pool_size: Maximum number of kept-alive connections per host
+            connect_timeout: Seconds to wait for the connection to be established
+            read_timeout: Seconds to wait for the server to respond
+            max_retries: Number of retries after the first attempt
+            backoff_base: Upper bound in seconds of the first retry delay, doubled on every retry
+            backoff_max: Upper bound in seconds of any retry delay
+            max_rate: Requests per second at most, 0 for no limit
+        """
+        self._timeout: tuple[float, float] = (connect_timeout, read_timeout)
+        self._max_retries: int = max(0, max_retries)
+        self._backoff_base: float = backoff_base
+        self._backoff_max: float = backoff_max
+        self._rate_limiter: _RateLimiter | None = _RateLimiter(max_rate) if max_rate > 0 else None
+
+        self._session: requests.Session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), max_retries=0)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        self._in_flight: dict[Hashable, _InFlightCall] = {}
+        self._in_flight_lock: threading.Lock = threading.Lock()
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full jitter: a random delay up to the exponential bound of `attempt`"""
+        return random.uniform(0, min(self._backoff_max, self._backoff_base * (2 ** attempt)))
+
+    def _post_with_retries(self, url: str, data: dict[str, Any]) -> Any:
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire()
+            try:
+                res = self._session.post(url, data, timeout=self._timeout)
+                if profiling.is_enabled():
+                    body = res.request.body or b""
+                    profiling.count("http.requests")
+                    profiling.count("http.bytes_sent", len(body.encode("utf-8") if isinstance(body, str) else body))
+                    profiling.count("http.bytes_received", len(res.content))
+                if res.status_code not in RETRYABLE_STATUS_CODES or attempt >= self._max_retries:
+                    res.raise_for_status()
+                    return res.json()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self._max_retries:
+                    raise
+
+            time.sleep(self._backoff_delay(attempt))
+            attempt += 1
+
+    def post_json(self, url: str, data: dict[str, Any], coalesce_key: Hashable | None = None) -> Any:
+        """POST form data and return the decoded JSON body
+
+        Args:
+            coalesce_key: Concurrent calls with the same key share one request and its result
+
+        Raises:
+            `requests.exceptions.ConnectionError` : When the server can not be reached after every retry
+            `requests.exceptions.Timeout` : When the server does not respond in time after every retry
+            `requests.exceptions.HTTPError` : When the server responds with an error status
+        """
+        if coalesce_key is None:
+            return self._post_with_retries(url, data)
+
+        with self._in_flight_lock:
+            call = self._in_flight.get(coalesce_key)
+            is_leader = call is None
+            if is_leader:
+                call = _InFlightCall()
+                self._in_flight[coalesce_key] = call
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._post_with_retries(url, data)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[coalesce_key]
+            call.done.set()
+
+    def close(self) -> None:
+        self._session.close()
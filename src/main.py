@@ -1,11 +1,22 @@
+# Imported first, its start time is the start of the `imports` span of --profile
+from src.utils import profiling
 import argparse
+import atexit
+import json
+import os
 import re
-from datetime import datetime
-from rich_argparse import RichHelpFormatter
+import signal
+import sys
+import threading
+from datetime import datetime, time
+from pathlib import Path
+import platformdirs
 from src.ui.main_ui import MainUI
+from src.ui.render_cache import RenderCache
 from src.core.lhu_calen_api import LHUCalenAPI
-from src.core.cache import CacheManager
-from src.core.configurations import APIConfigs, CacheConfigs
+from src.core.cache import CacheManager, create_cache_manager
+from src.core.configurations import APIConfigs, CacheConfigs, BatchConfigs, DaemonConfigs, FreeSlotConfigs, DisplayConfigs
+from src.core.daemon_client import DaemonClient
 
 
 def validate_student_id(value: str) -> str:
@@ -16,51 +27,415 @@ def validate_student_id(value: str) -> str:
         )
     return value
 
+def parse_query_time(value: str) -> datetime:
+    """Parse a YYYY-MM-DD query time"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError("Invalid date format. Please use YYYY-MM-DD.")
+
+def read_student_ids(path: str) -> list[str]:
+    """Read student IDs, one per line, from a file or stdin (`-`). Blank lines and `#` comments are skipped."""
+    if path == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+    student_ids: list[str] = []
+    for line in lines:
+        value = line.split('#', 1)[0].strip()
+        if not value:
+            continue
+        try:
+            student_ids.append(validate_student_id(value))
+        except argparse.ArgumentTypeError:
+            print(f"Bỏ qua MSSV không hợp lệ: {value}", file=sys.stderr)
+    # Drop duplicates but keep the original order
+    return list(dict.fromkeys(student_ids))
+
+def build_cache_manager(backend: str) -> CacheManager:
+    return create_cache_manager(
+        app_name=CacheConfigs.APP_NAME,
+        ttl_hours=CacheConfigs.TTL_HOURS,
+        stale_grace_hours=CacheConfigs.STALE_GRACE_HOURS,
+        backend=backend,
+        max_size_mb=CacheConfigs.MAX_SIZE_MB,
+        max_entries=CacheConfigs.MAX_ENTRIES
+    )
+
+def build_render_cache() -> RenderCache | None:
+    if not CacheConfigs.RENDER_CACHE_ENTRIES:
+        return None
+    return RenderCache(Path(platformdirs.user_cache_dir(CacheConfigs.APP_NAME)) / "render", CacheConfigs.RENDER_CACHE_ENTRIES)
+
+def detach() -> None:
+    """Continue in a background process detached from the terminal, the foreground process exits"""
+    if os.fork():
+        os._exit(0)
+    os.setsid()
+    with open(os.devnull, 'r+b') as devnull:
+        for stream in (sys.stdin, sys.stdout, sys.stderr):
+            os.dup2(devnull.fileno(), stream.fileno())
+
+def run_daemon(args: argparse.Namespace) -> None:
+    from src.core.daemon import CalenDaemon, DaemonAlreadyRunning
+    from src.core.daemon_client import DaemonUnavailable, daemon_socket_path, request_daemon
+
+    socket_path = daemon_socket_path()
+    if args.stop:
+        try:
+            request_daemon(socket_path, {'op': 'stop'}, timeout=5)
+            print("Đã dừng tiến trình nền")
+        except DaemonUnavailable:
+            print("Không có tiến trình nền nào đang chạy")
+        return
+
+    try:
+        request_daemon(socket_path, {'op': 'ping'}, timeout=1)
+        print(f"Tiến trình nền đang chạy tại {socket_path}")
+        return
+    except DaemonUnavailable:
+        pass
+
+    if args.detach:
+        if not hasattr(os, 'fork'):
+            print("--detach không được hỗ trợ trên hệ điều hành này", file=sys.stderr)
+            sys.exit(2)
+        print(f"Tiến trình nền lắng nghe tại {socket_path}")
+        # Fork before any connection or thread exists, neither survives a fork
+        detach()
+
+    daemon = CalenDaemon(
+        api_url=APIConfigs.LHU_API_URL,
+        cache_manager=build_cache_manager(args.cache_backend),
+        socket_path=socket_path,
+        refresh_interval_minutes=args.refresh_minutes
+    )
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=daemon.stop).start())
+    if not args.detach:
+        print(f"Tiến trình nền lắng nghe tại {socket_path} (Ctrl+C để dừng)")
+    try:
+        daemon.serve_forever()
+    except DaemonAlreadyRunning:
+        print(f"Tiến trình nền đang chạy tại {socket_path}")
+    except KeyboardInterrupt:
+        pass
+
+def collect_student_ids(args: argparse.Namespace) -> list[str]:
+    """Student IDs given as arguments and in the `-i` file, exits when there is none"""
+    student_ids = list(args.student_ids)
+    if args.input:
+        try:
+            student_ids += read_student_ids(args.input)
+        except OSError as e:
+            print(f"Không thể đọc danh sách MSSV: {e}", file=sys.stderr)
+            sys.exit(2)
+    student_ids = list(dict.fromkeys(student_ids))
+    if not student_ids:
+        print("Cần ít nhất một MSSV (tham số hoặc -i)", file=sys.stderr)
+        sys.exit(2)
+    return student_ids
+
+def parse_clock_time(value: str) -> time:
+    """Parse a HH:MM time of day"""
+    try:
+        return datetime.strptime(value, '%H:%M').time()
+    except ValueError:
+        raise argparse.ArgumentTypeError("Invalid time format. Please use HH:MM.")
+
+def parse_moment(value: str) -> datetime:
+    """Parse a "YYYY-MM-DD HH:MM" time, or a HH:MM time of today"""
+    for fmt in ('%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M'):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    return datetime.combine(datetime.now().date(), parse_clock_time(value))
+
+def run_export(args: argparse.Namespace, cache_manager: CacheManager) -> None:
+    from src.core.export import iter_student_items, serialize
+    from src.ui.batch_ui import describe_error
+
+    student_ids = collect_student_ids(args)
+
+    failed: list[str] = []
+
+    def skip_failed(records):
+        for student_id, item in records:
+            if isinstance(item, Exception):
+                failed.append(student_id)
+                print(f"{student_id}: {describe_error(item)}", file=sys.stderr)
+                continue
+            yield student_id, item
+
+    records = iter_student_items(
+        APIConfigs.LHU_API_URL, student_ids, args.range, args.time,
+        cache_manager=cache_manager, lookahead=args.workers
+    )
+    # The ICS and CSV serializers write their own CRLF line endings, keep them as they are
+    if args.output == '-':
+        sys.stdout.reconfigure(newline='')
+        output = sys.stdout
+    else:
+        output = open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        output.writelines(serialize(skip_failed(records), args.format))
+        output.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`), stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    if failed:
+        sys.exit(1)
+
+def print_profile(output_format: str) -> None:
+    data = profiling.report()
+    print(json.dumps(data) if output_format == 'json' else profiling.format_report(data), file=sys.stderr)
+
+def help_formatter_class() -> type[argparse.HelpFormatter]:
+    """Rich help formatting is only worth its import time when help is actually requested"""
+    if '-h' in sys.argv or '--help' in sys.argv:
+        from rich_argparse import RichHelpFormatter
+        return RichHelpFormatter
+    return argparse.HelpFormatter
+
 def main():
-    parser = argparse.ArgumentParser(description='LHU Calendar Viewer', formatter_class=RichHelpFormatter)
+    formatter_class = help_formatter_class()
+    parser = argparse.ArgumentParser(description='LHU Calendar Viewer', formatter_class=formatter_class)
+    parser.add_argument('--cache-backend', choices=['sqlite', 'json', 'binary'], default=CacheConfigs.BACKEND, help='Cache storage engine')
     subparsers = parser.add_subparsers(dest='command', required=True)
 
     # --- Subcommand 1: View (The main calendar functionality) ---
-    view_parser = subparsers.add_parser('view', help='View calendar', formatter_class=RichHelpFormatter)
+    view_parser = subparsers.add_parser('view', help='View calendar', formatter_class=formatter_class)
     view_parser.add_argument('student_id', type=validate_student_id, help='Student ID')
     view_parser.add_argument('-r', '--range', type=int, default=APIConfigs.DEFAULT_DAY_RANGE)
     view_parser.add_argument('-t', '--time', type=str)
+    view_parser.add_argument('--no-daemon', action='store_true', help='Do not ask a running serve daemon, fetch in this process')
+    view_parser.add_argument('--watch', action='store_true', help='Keep the calendar on screen and redraw it when the schedule changes')
+    view_parser.add_argument('--paged', action='store_true', help=f'Print one table per {DisplayConfigs.PAGE_DAYS} days, each as soon as its days are fetched')
+    view_parser.add_argument('--pager', action='store_true', help='Show the pages in a pager ($PAGER or less)')
+    view_parser.add_argument('--profile', nargs='?', const='text', choices=['text', 'json'], help='Print a timing breakdown to stderr (text or json)')
+
+    # --- Subcommand 2: Batch (many students at once) ---
+    batch_parser = subparsers.add_parser('batch', help='Fetch calendars of many students concurrently', formatter_class=formatter_class)
+    batch_parser.add_argument('input', nargs='?', default='-', help='File with one student ID per line ("-" for stdin)')
+    batch_parser.add_argument('-r', '--range', type=int, default=APIConfigs.DEFAULT_DAY_RANGE)
+    batch_parser.add_argument('-t', '--time', type=parse_query_time)
+    batch_parser.add_argument('-w', '--workers', type=int, default=BatchConfigs.MAX_WORKERS, help='Maximum concurrent requests')
+    batch_parser.add_argument('--json', action='store_true', help='Print one JSON line per student')
+
+    # --- Subcommand 3: Cache ---
+    cache_parser = subparsers.add_parser('cache', help='Cache management', formatter_class=formatter_class)
+    cache_parser.add_argument('action', choices=['dir', 'clean', 'migrate', 'stats', 'warm'])
+    cache_parser.add_argument('-i', '--input', default='-', help='warm: file with one student ID per line ("-" for stdin)')
+    cache_parser.add_argument('--days', type=int, default=BatchConfigs.WARM_DAYS, help='warm: days ahead to fill')
+    cache_parser.add_argument('-t', '--time', type=parse_query_time, help='warm: first day to fill (default: today)')
+    cache_parser.add_argument('-w', '--workers', type=int, default=BatchConfigs.MAX_WORKERS, help='warm: maximum concurrent requests')
+    cache_parser.add_argument('--rate', type=float, default=BatchConfigs.WARM_MAX_RATE, help='warm: requests per second at most (0: no limit)')
 
-    # --- Subcommand 2: Cache ---
-    cache_parser = subparsers.add_parser('cache', help='Cache management', formatter_class=RichHelpFormatter)
-    cache_parser.add_argument('action', choices=['dir', 'clean'])
+    # --- Subcommand 4: Serve (background daemon answering view) ---
+    serve_parser = subparsers.add_parser('serve', help='Run a daemon that answers view from memory', formatter_class=formatter_class)
+    serve_parser.add_argument('--detach', action='store_true', help='Run in the background')
+    serve_parser.add_argument('--stop', action='store_true', help='Stop the running daemon')
+    serve_parser.add_argument('--refresh-minutes', type=float, default=DaemonConfigs.REFRESH_INTERVAL_MINUTES, help='Minutes between refreshes of the most viewed students')
+
+    # --- Subcommand 5: Free (common free slots of several students) ---
+    free_parser = subparsers.add_parser('free', help='Find the slots where all the given students are free', formatter_class=formatter_class)
+    free_parser.add_argument('student_ids', nargs='*', type=validate_student_id, help='Student IDs')
+    free_parser.add_argument('-i', '--input', help='File with one student ID per line ("-" for stdin)')
+    free_parser.add_argument('-r', '--range', type=int, default=FreeSlotConfigs.DAY_RANGE)
+    free_parser.add_argument('-t', '--time', type=parse_query_time)
+    free_parser.add_argument('--from', dest='day_start', type=parse_clock_time, default=FreeSlotConfigs.DAY_START, help='Start of working hours (HH:MM)')
+    free_parser.add_argument('--to', dest='day_end', type=parse_clock_time, default=FreeSlotConfigs.DAY_END, help='End of working hours (HH:MM)')
+    free_parser.add_argument('-m', '--min-minutes', type=int, default=FreeSlotConfigs.MIN_MINUTES, help='Shortest slot listed')
+    free_parser.add_argument('-w', '--workers', type=int, default=BatchConfigs.MAX_WORKERS, help='Maximum concurrent requests')
+    free_parser.add_argument('--json', action='store_true', help='Print the slots as JSON')
+
+    # --- Subcommand 6: Export (stream schedules to other systems) ---
+    export_parser = subparsers.add_parser('export', help='Export schedules as iCalendar, CSV or NDJSON', formatter_class=formatter_class)
+    export_parser.add_argument('student_ids', nargs='*', type=validate_student_id, help='Student IDs')
+    export_parser.add_argument('-i', '--input', help='File with one student ID per line ("-" for stdin)')
+    export_parser.add_argument('-f', '--format', choices=['ics', 'csv', 'ndjson'], default='ics')
+    export_parser.add_argument('-o', '--output', default='-', help='Output file ("-" for stdout)')
+    export_parser.add_argument('-r', '--range', type=int, default=APIConfigs.DEFAULT_DAY_RANGE)
+    export_parser.add_argument('-t', '--time', type=parse_query_time)
+    export_parser.add_argument('-w', '--workers', type=int, default=4, help='Students fetched ahead while writing, each held in memory with its whole range (default: 4)')
+
+    # --- Subcommand 7: Rooms (busy and free rooms from the cache) ---
+    rooms_parser = subparsers.add_parser('rooms', help='Show which rooms are busy or free, from the cached schedules', formatter_class=formatter_class)
+    rooms_parser.add_argument('-f', '--facility', help='Facility name, as shown in the schedule (default: all)')
+    rooms_parser.add_argument('-t', '--time', type=parse_moment, help='"YYYY-MM-DD HH:MM" or HH:MM today (default: now)')
+    rooms_parser.add_argument('--show', choices=['all', 'busy', 'free'], default='all')
+    rooms_parser.add_argument('--rebuild', action='store_true', help='Index the whole cache again, e.g. for data cached before the index existed')
+    rooms_parser.add_argument('--json', action='store_true', help='Print one JSON line per room')
 
     args = parser.parse_args()
-    
-    cache_manager = CacheManager(
-        app_name=CacheConfigs.APP_NAME,
-        ttl_hours=CacheConfigs.TTL_HOURS
-    )
+
+    if args.command == 'serve':
+        run_daemon(args)
+        return
+
+    if args.command == 'view':
+        if args.profile:
+            profiling.enable()
+            atexit.register(print_profile, args.profile)
+
+        # Parse the time argument if provided
+        query_time = None
+        if args.time:
+            try:
+                query_time = datetime.strptime(args.time, '%Y-%m-%d')
+            except ValueError:
+                print("Invalid date format. Please use YYYY-MM-DD.")
+                return
+
+        # Long ranges would make one huge table, show them page by page
+        paged = args.paged or 0 < DisplayConfigs.AUTO_PAGE_DAYS < args.range
+        ui = MainUI(render_cache=build_render_cache(), paged=paged, use_pager=args.pager)
+        # A running daemon answers from memory, otherwise fetch in this process
+        if not args.watch and not args.no_daemon and ui.run_daemon(DaemonClient(args.student_id), query_time=query_time, day_range=args.range):
+            return
+
+    with profiling.span("cache.open"):
+        cache_manager = build_cache_manager(args.cache_backend)
 
     if args.command == 'cache':
         if args.action == "dir":
             print(cache_manager.cache_dir)
+        elif args.action == "migrate":
+            from src.core.sqlite_cache import SQLiteCacheManager
+
+            if not isinstance(cache_manager, SQLiteCacheManager):
+                print("Chỉ có thể chuyển cache JSON sang SQLite (--cache-backend sqlite)")
+                return
+            json_cache = CacheManager(CacheConfigs.APP_NAME, CacheConfigs.TTL_HOURS, CacheConfigs.STALE_GRACE_HOURS)
+            migrated = cache_manager.migrate_from(json_cache)
+            print(f"Đã chuyển {migrated} tệp cache JSON sang SQLite")
+            remaining = sum(1 for _ in json_cache.cache_dir.glob(f"*{json_cache.FILE_SUFFIX}"))
+            if remaining:
+                print(f"{remaining} tệp cache JSON không chuyển được, vẫn được giữ lại trong {json_cache.cache_dir}")
+        elif args.action == "stats":
+            stats = cache_manager.stats()
+            lookups = stats.hits + stats.misses
+            hit_rate = f"{stats.hits / lookups:.0%}" if lookups else "-"
+            print(f"Số sinh viên trong cache: {stats.entries}")
+            print(f"Dung lượng: {stats.bytes_used / 1024:.1f} KB")
+            print(f"Truy vấn trúng/trượt: {stats.hits}/{stats.misses} (tỉ lệ trúng {hit_rate})")
+            print(f"Đã loại bỏ (LRU): {stats.evictions}")
+            print(f"Đã xóa do hết hạn: {stats.expirations}")
+            circuits = cache_manager.circuit_breaker.states()
+            if not circuits:
+                print("Kết nối API: bình thường")
+            for api_url, circuit in circuits.items():
+                if circuit.state == "closed":
+                    state = f"bình thường, {circuit.failures} lần lỗi liên tiếp"
+                elif circuit.state == "open":
+                    state = f"tạm ngắt sau {circuit.failures} lần lỗi, thử lại lúc {datetime.fromtimestamp(circuit.retry_at).strftime('%H:%M:%S')}"
+                else:
+                    state = "đang thử kết nối lại"
+                print(f"Kết nối API ({api_url}): {state}")
+        elif args.action == "warm":
+            from src.core.batch import LHUCalenBatchAPI
+            from src.ui.batch_ui import BatchUI
+
+            try:
+                student_ids = read_student_ids(args.input)
+            except OSError as e:
+                print(f"Không thể đọc danh sách MSSV: {e}", file=sys.stderr)
+                sys.exit(2)
+
+            batch_api = LHUCalenBatchAPI(
+                api_url=APIConfigs.LHU_API_URL,
+                cache_manager=cache_manager,
+                max_workers=args.workers,
+                max_rate=args.rate
+            )
+            try:
+                ok = BatchUI().warm(batch_api, student_ids, query_time=args.time, day_range=args.days)
+            finally:
+                batch_api.close()
+            if not ok:
+                sys.exit(1)
         else:
             removed = cache_manager.clear_all()
-            print(f"Đã xóa {removed} tệp cache")
+            render_cache = build_render_cache()
+            if render_cache is not None:
+                render_cache.clear()
+            print(f"Đã xóa {removed} mục cache")
+        return
+
+    if args.command == 'export':
+        run_export(args, cache_manager)
         return
-    # Parse the time argument if provided
-    day_range = args.range
-    query_time = None
-    if args.time:
+
+    if args.command == 'rooms':
+        from src.ui.rooms_ui import RoomsUI
+
+        if args.rebuild:
+            count = cache_manager.room_index.rebuild(cache_manager.iter_stores())
+            print(f"Đã lập chỉ mục phòng từ lịch của {count} sinh viên")
+        if not RoomsUI().run(cache_manager.room_index, args.time or datetime.now(), args.facility, args.show, args.json):
+            sys.exit(1)
+        return
+
+    if args.command == 'free':
+        from src.core.batch import LHUCalenBatchAPI
+        from src.ui.free_ui import FreeUI
+
+        student_ids = collect_student_ids(args)
+        batch_api = LHUCalenBatchAPI(
+            api_url=APIConfigs.LHU_API_URL,
+            cache_manager=cache_manager,
+            max_workers=args.workers
+        )
         try:
-            query_time = datetime.strptime(args.time, '%Y-%m-%d')
-        except ValueError:
-            print("Invalid date format. Please use YYYY-MM-DD.")
-            return
+            ok = FreeUI().run(
+                batch_api, student_ids, query_time=args.time, day_range=args.range,
+                day_start=args.day_start, day_end=args.day_end, min_minutes=args.min_minutes, as_json=args.json
+            )
+        finally:
+            batch_api.close()
+        if not ok:
+            sys.exit(1)
+        return
+
+    if args.command == 'batch':
+        from src.core.batch import LHUCalenBatchAPI
+        from src.ui.batch_ui import BatchUI
+
+        try:
+            student_ids = read_student_ids(args.input)
+        except OSError as e:
+            print(f"Không thể đọc danh sách MSSV: {e}", file=sys.stderr)
+            sys.exit(2)
+
+        batch_api = LHUCalenBatchAPI(
+            api_url=APIConfigs.LHU_API_URL,
+            cache_manager=cache_manager,
+            max_workers=args.workers
+        )
+        try:
+            ok = BatchUI().run(batch_api, student_ids, query_time=args.time, day_range=args.range, as_json=args.json)
+        finally:
+            batch_api.close()
+        if not ok:
+            sys.exit(1)
+        return
 
     api = LHUCalenAPI(
         api_url=APIConfigs.LHU_API_URL,
         student_id=args.student_id,
         cache_manager=cache_manager
     )
-    ui = MainUI()
-    ui.run(api, query_time=query_time, day_range=day_range)
+    if args.watch:
+        from src.ui.watch_ui import WatchUI
+        WatchUI().watch(api, query_time=query_time, day_range=args.range)
+        return
+    ui.run(api, query_time=query_time, day_range=args.range)
 
 if __name__ == "__main__":
     main()
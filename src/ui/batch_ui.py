@@ -0,0 +1,112 @@
+import json
+import sys
+import time
+from datetime import datetime
+from rich.console import Console
+from rich.table import Table
+from src.core.batch import LHUCalenBatchAPI, BatchResult
+from src.core import lhu_calen_api
+
+def describe_error(error: Exception) -> str:
+    """Short Vietnamese description of a fetch error."""
+    if isinstance(error, lhu_calen_api.CircuitOpenError):
+        return f"API đang gián đoạn, thử lại sau {error.retry_at.strftime('%H:%M')}"
+    if isinstance(error, lhu_calen_api.ConnectionError):
+        return "Không thể kết nối"
+    if isinstance(error, lhu_calen_api.TimeoutError):
+        return "Hết thời gian chờ"
+    return str(error) or type(error).__name__
+
+class BatchUI:
+    def __init__(self):
+        self._console: Console = Console()
+
+    def run(self, batch_api: LHUCalenBatchAPI, student_ids: list[str], query_time: datetime | None, day_range: int, as_json: bool = False) -> bool:
+        """Fetch every student and report per-student results.
+
+        Returns:
+            `True` if every student was fetched successfully
+        """
+        started = time.perf_counter()
+        if as_json:
+            # Stream one JSON line per student as soon as it completes
+            results: list[BatchResult] = []
+            for result in batch_api.iter_data(student_ids, day_range, query_time):
+                results.append(result)
+                sys.stdout.write(json.dumps(self._to_json(result), ensure_ascii=False) + "\n")
+                sys.stdout.flush()
+        else:
+            with self._console.status(f"Đang tải lịch của {len(student_ids)} sinh viên..."):
+                results = batch_api.get_data(student_ids, day_range, query_time)
+            self._print_table(results)
+
+        elapsed = time.perf_counter() - started
+        failed = sum(1 for result in results if not result.ok)
+        if not as_json:
+            self._console.print(
+                f"Hoàn tất {len(results) - failed}/{len(results)} sinh viên trong {elapsed:.2f}s",
+                style="bold red" if failed else "bold green"
+            )
+        return failed == 0
+
+    def warm(self, batch_api: LHUCalenBatchAPI, student_ids: list[str], query_time: datetime | None, day_range: int) -> bool:
+        """Fill the cache ahead of time and report the throughput, failures are listed.
+
+        Returns:
+            `True` if every student is cached
+        """
+        started = time.perf_counter()
+        results: list[BatchResult] = []
+        interrupted = False
+        try:
+            with self._console.status(f"Đang làm ấm cache của {len(student_ids)} sinh viên...") as status:
+                for result in batch_api.warm(student_ids, day_range, query_time):
+                    results.append(result)
+                    status.update(f"Đang làm ấm cache: {len(results)}/{len(student_ids)} sinh viên...")
+        except KeyboardInterrupt:
+            interrupted = True
+
+        elapsed = time.perf_counter() - started
+        failed = [result for result in results if not result.ok]
+        skipped = sum(1 for result in results if result.skipped)
+        fetched = len(results) - len(failed) - skipped
+        if failed:
+            self._print_table(failed)
+
+        rate = fetched / elapsed if elapsed > 0 else 0.0
+        self._console.print(
+            f"Đã tải {fetched}, bỏ qua {skipped} (còn mới), lỗi {len(failed)} / {len(student_ids)} sinh viên "
+            f"trong {elapsed:.2f}s ({rate:.1f} sinh viên/s)",
+            style="bold red" if failed or interrupted else "bold green"
+        )
+        if interrupted:
+            self._console.print("Đã dừng giữa chừng, chạy lại lệnh để tiếp tục từ các sinh viên còn lại", style="yellow")
+        return not failed and not interrupted
+
+    @staticmethod
+    def _to_json(result: BatchResult) -> dict:
+        return {
+            "student_id": result.student_id,
+            "ok": result.ok,
+            "elapsed_ms": round(result.elapsed * 1000, 1),
+            "error": None if result.ok else describe_error(result.error),
+            "items": [item.model_dump(mode='json') for item in result.items],
+        }
+
+    def _print_table(self, results: list[BatchResult]) -> None:
+        table = Table(show_header=True, header_style="bold magenta")
+        table.add_column("MSSV")
+        table.add_column("Trạng thái")
+        table.add_column("Số buổi học", justify="right")
+        table.add_column("Thời gian (ms)", justify="right")
+
+        for result in results:
+            status = "[green]OK[/green]" if result.ok else f"[red]{describe_error(result.error)}[/red]"
+            table.add_row(
+                result.student_id,
+                status,
+                str(len(result.items)) if result.ok else "-",
+                f"{result.elapsed * 1000:.0f}"
+            )
+
+        self._console.print(table)
@@ -1,8 +1,25 @@
-from datetime import datetime, date, timedelta
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime, date, timedelta, timezone
+from typing import TYPE_CHECKING
 from rich.console import Console
 from rich.table import Table
 from src.core.lhu_calen_api import CalenItem
-
+from src.utils import profiling
+
+if TYPE_CHECKING:
+    # Only needed when a table is passed in, see `_build_schedule`
+    from src.core.schedule_table import ScheduleTable
+
+# Vietnamese weekday names, indexed by `date.weekday()`
+VIETNAMESE_DAYS: dict[int, str] = {
+    0: "Thứ Hai",
+    1: "Thứ Ba",
+    2: "Thứ Tư",
+    3: "Thứ Năm",
+    4: "Thứ Sáu",
+    5: "Thứ Bảy",
+    6: "Chủ Nhật"
+}
 
 def format_date_with_countdown(date_obj: datetime) -> str:
     """Format date as '<date> (<how long till that date>)' in Vietnamese."""
@@ -34,8 +51,93 @@ class CalendarDisplay:
     def __init__(self, console: Console):
         self.console: Console = console
 
-    def display_schedule(self, calen_items: list[CalenItem], start_date: datetime | None = None, day_range: int = 4):
-        """Display schedule in a horizontal table format with morning/afternoon separation."""
+    def display_schedule(
+            self,
+            calen_items: "list[CalenItem] | ScheduleTable",
+            start_date: datetime | None = None,
+            day_range: int = 4,
+            highlight: Callable[[CalenItem], bool] | None = None
+        ):
+        """Display schedule in a horizontal table format with morning/afternoon separation.
+
+        Items for which `highlight` returns `True` are marked as changed.
+        """
+        table = self.build_schedule(calen_items, start_date, day_range, highlight)
+        with profiling.span("render.print"):
+            self.console.print(table)
+
+    def display_schedule_paged(
+            self,
+            calen_items: Iterable[CalenItem],
+            start_date: datetime | None = None,
+            day_range: int = 4,
+            page_days: int = 7,
+            highlight: Callable[[CalenItem], bool] | None = None
+        ):
+        """Display the schedule as one table per `page_days` days, each printed as soon as it is complete,
+        see `iter_pages`."""
+        for table in self.iter_pages(calen_items, start_date, day_range, page_days, highlight):
+            with profiling.span("render.print"):
+                self.console.print(table)
+
+    def iter_pages(
+            self,
+            calen_items: Iterable[CalenItem],
+            start_date: datetime | None = None,
+            day_range: int = 4,
+            page_days: int = 7,
+            highlight: Callable[[CalenItem], bool] | None = None
+        ) -> Iterator[Table]:
+        """Build the schedule as one table per `page_days` days.
+
+        `calen_items` must come in start order, like from `LHUCalenAPI.iter_data`: a page is
+        built as soon as an item past its last day arrives, so only one page of items and
+        one narrow table are held at a time, however long the range is.
+        """
+        if start_date is None:
+            start_date = datetime.now()
+        page_days = max(1, page_days)
+        first_day = start_date.date()
+
+        page_start = 0
+        page_items: list[CalenItem] = []
+
+        def build_page() -> Table:
+            return self.build_schedule(
+                page_items, start_date + timedelta(days=page_start), min(page_days, day_range - page_start), highlight
+            )
+
+        for item in calen_items:
+            offset = (item.start_time.date() - first_day).days
+            while page_start < day_range and offset >= page_start + page_days:
+                yield build_page()
+                page_start += page_days
+                page_items = []
+            page_items.append(item)
+
+        while page_start < day_range:
+            yield build_page()
+            page_start += page_days
+            page_items = []
+
+    def build_schedule(
+            self,
+            calen_items: "list[CalenItem] | ScheduleTable",
+            start_date: datetime | None = None,
+            day_range: int = 4,
+            highlight: Callable[[CalenItem], bool] | None = None
+        ) -> Table:
+        """Build the schedule table without printing it, see `display_schedule`."""
+        with profiling.span("render.build"):
+            return self._build_schedule(calen_items, start_date, day_range, highlight)
+
+    def _build_schedule(
+            self,
+            calen_items: "list[CalenItem] | ScheduleTable",
+            start_date: datetime | None,
+            day_range: int,
+            highlight: Callable[[CalenItem], bool] | None
+        ) -> Table:
         if start_date is None:
             start_date = datetime.now()
 
@@ -46,11 +148,26 @@ class CalendarDisplay:
 
         # Group calendar items by date
         items_by_date: dict[date, list[CalenItem]] = {}
-        for item in calen_items:
-            date_key = item.start_time.date()
-            if date_key not in items_by_date:
-                items_by_date[date_key] = []
-            items_by_date[date_key].append(item)
+        # Plain item lists never load the table module
+        is_table = False
+        if not isinstance(calen_items, list):
+            from src.core.schedule_table import ScheduleTable
+            is_table = isinstance(calen_items, ScheduleTable)
+
+        if is_table:
+            # Only the shown days are turned into items
+            shown = calen_items.between(
+                datetime.combine(all_dates[0], datetime.min.time(), tzinfo=timezone.utc),
+                datetime.combine(all_dates[-1] + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+            ) if all_dates else calen_items
+            for date_key, day_table in shown.group_by_day().items():
+                items_by_date[date_key] = day_table.items()
+        else:
+            for item in calen_items:
+                date_key = item.start_time.date()
+                if date_key not in items_by_date:
+                    items_by_date[date_key] = []
+                items_by_date[date_key].append(item)
 
         # Calculate dynamic width based on number of columns
         num_columns = len(all_dates)
@@ -67,17 +184,7 @@ class CalendarDisplay:
         for date_key in all_dates:
             date_obj = datetime.combine(date_key, datetime.min.time())
 
-            vietnamese_days = {
-                0: "Thứ Hai",
-                1: "Thứ Ba",
-                2: "Thứ Tư",
-                3: "Thứ Năm",
-                4: "Thứ Sáu",
-                5: "Thứ Bảy",
-                6: "Chủ Nhật"
-            }
-
-            day_name = vietnamese_days[date_obj.weekday()]
+            day_name = VIETNAMESE_DAYS[date_obj.weekday()]
             formatted_date = format_date_with_countdown(date_obj)
             table.add_column(f"{day_name}\n{formatted_date}", justify="left", width=calculated_width)
 
@@ -107,14 +214,17 @@ class CalendarDisplay:
 
         def format_item(item: CalenItem) -> str:
             if item.is_cancelled:
-                return (f"[dim strikethrough bold green]{item.subject_name}[/dim strikethrough bold green]\n"
+                text = (f"[dim strikethrough bold green]{item.subject_name}[/dim strikethrough bold green]\n"
                         f"[dim cyan]{item.start_time.strftime('%H:%M')}-{item.end_time.strftime('%H:%M')}[/dim cyan]\n"
                         f"[dim]{item.room_name} ({item.facility_name})[/dim]\n"
                         f"[red bold][HUỶ][/red bold]")
             else:
-                return (f"[bold green]{item.subject_name}[/bold green]\n"
+                text = (f"[bold green]{item.subject_name}[/bold green]\n"
                         f"[cyan]{item.start_time.strftime('%H:%M')}-{item.end_time.strftime('%H:%M')}[/cyan]\n"
                         f"{item.room_name} ({item.facility_name})")
+            if highlight is not None and highlight(item):
+                text += "\n[black on yellow] VỪA THAY ĐỔI [/black on yellow]"
+            return text
 
         # Morning rows
         for i in range(max_morning):
@@ -141,4 +251,4 @@ class CalendarDisplay:
                     row.append(" ")
             table.add_row(*row)
 
-        self.console.print(table)
+        return table
@@ -0,0 +1,94 @@
+import json
+import sys
+from datetime import datetime, time, timedelta
+from rich.console import Console
+from rich.table import Table
+from src.core.batch import LHUCalenBatchAPI, BatchResult
+from src.core.free_slots import busy_intervals, free_slots
+from src.ui.batch_ui import describe_error
+from src.ui.calendar_display import VIETNAMESE_DAYS
+from src.utils import profiling
+
+class FreeUI:
+    def __init__(self):
+        self._console: Console = Console()
+
+    def run(
+            self,
+            batch_api: LHUCalenBatchAPI,
+            student_ids: list[str],
+            query_time: datetime | None,
+            day_range: int,
+            day_start: time,
+            day_end: time,
+            min_minutes: int,
+            as_json: bool = False
+        ) -> bool:
+        """Fetch every student and list the slots within working hours where all of them are free.
+
+        Returns:
+            `True` if every student was fetched, otherwise the slots ignore the students that failed
+        """
+        now = datetime.now()
+        first_day = (query_time or now).date()
+        start = datetime.combine(first_day, time.min)
+
+        busy = []
+        failed: list[BatchResult] = []
+        with self._console.status(f"Đang tải lịch của {len(student_ids)} sinh viên...") as status:
+            for done, result in enumerate(batch_api.iter_data(student_ids, day_range, start), 1):
+                if result.ok:
+                    busy += busy_intervals(result.items)
+                else:
+                    failed.append(result)
+                status.update(f"Đang tải lịch: {done}/{len(student_ids)} sinh viên...")
+
+        with profiling.span("free.sweep"):
+            slots = free_slots(
+                busy, first_day, first_day + timedelta(days=day_range - 1), day_start, day_end,
+                min_duration=timedelta(minutes=min_minutes),
+                # Past slots of today are of no use
+                not_before=now if query_time is None else None
+            )
+
+        for result in failed:
+            print(f"{result.student_id}: {describe_error(result.error)}", file=sys.stderr)
+
+        if as_json:
+            sys.stdout.write(json.dumps({
+                "students": len(student_ids) - len(failed),
+                "failed": [result.student_id for result in failed],
+                "slots": [{"start": slot_start.isoformat(), "end": slot_end.isoformat()} for slot_start, slot_end in slots],
+            }, ensure_ascii=False) + "\n")
+            return not failed
+
+        if slots:
+            self._print_table(slots)
+        else:
+            self._console.print(f"Không có khoảng trống chung nào trong {day_range} ngày tới", style="italic")
+        self._console.print(
+            f"{len(slots)} khoảng trống chung của {len(student_ids) - len(failed)}/{len(student_ids)} sinh viên "
+            f"({day_start.strftime('%H:%M')}-{day_end.strftime('%H:%M')}, từ {min_minutes} phút)",
+            style="bold red" if failed else "bold green"
+        )
+        if failed:
+            self._console.print("Lịch của các sinh viên lỗi không được tính", style="yellow")
+        return not failed
+
+    def _print_table(self, slots: list[tuple[datetime, datetime]]) -> None:
+        table = Table(show_header=True, header_style="bold magenta")
+        table.add_column("Ngày")
+        table.add_column("Từ", justify="center")
+        table.add_column("Đến", justify="center")
+        table.add_column("Thời lượng", justify="right")
+
+        for slot_start, slot_end in slots:
+            minutes = int((slot_end - slot_start).total_seconds() // 60)
+            table.add_row(
+                f"{VIETNAMESE_DAYS[slot_start.weekday()]} {slot_start.strftime('%d/%m')}",
+                slot_start.strftime('%H:%M'),
+                slot_end.strftime('%H:%M'),
+                f"{minutes // 60}h{minutes % 60:02d}"
+            )
+
+        self._console.print(table)
@@ -1,28 +1,248 @@
+import os
+import shlex
+import subprocess
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
 from datetime import datetime
-from rich.console import Console
-from src.core.lhu_calen_api import LHUCalenAPI
+from rich.console import Console, Group, RenderableType
+from rich.text import Text
+from src.core.lhu_calen_api import LHUCalenAPI, CalenItem
 from src.core import lhu_calen_api
+from src.core.configurations import CacheConfigs, DisplayConfigs
+from src.core.daemon_client import DaemonClient, DaemonUnavailable
 from src.ui.calendar_display import CalendarDisplay
+from src.ui.render_cache import RenderCache
+from src.utils import profiling
+
+class _PagerConsole(Console):
+    """Console writing into a pager, closing the pager ends the output instead of the process"""
+
+    def on_broken_pipe(self) -> None:
+        raise BrokenPipeError()
 
 class MainUI:
-    def __init__(self):
+    def __init__(
+            self,
+            stale_while_revalidate: bool = CacheConfigs.STALE_WHILE_REVALIDATE,
+            render_cache: RenderCache | None = None,
+            paged: bool = False,
+            use_pager: bool = False
+        ):
+        """
+        Args:
+            render_cache: Where finished schedules are kept, to print them again without rendering
+            paged: Print the schedule page by page (`DisplayConfigs.PAGE_DAYS` days each) as items arrive
+            use_pager: Send the pages to a pager (`$PAGER` or `DisplayConfigs.PAGER`) when output is a terminal
+        """
         self._console: Console = Console()
         self._calendar_display: CalendarDisplay = CalendarDisplay(self._console)
-     
+        self._stale_while_revalidate: bool = stale_while_revalidate
+        self._render_cache: RenderCache | None = render_cache
+        self._paged: bool = paged or use_pager
+        self._use_pager: bool = use_pager
+
     def run(self, api: LHUCalenAPI, query_time: datetime, day_range: int):
         """Main UI function."""
+        if self._paged:
+            self._run_paged(api.iter_data(day_range, query_time), query_time, day_range)
+            return
+
         try:
-            calen_items = api.get_data(day_range, query_time)
-            
-            if not calen_items:
-                self._console.print(f"Không có lịch học trong {day_range} ngày tới", style="italic")
+            if self._stale_while_revalidate:
+                cached = api.get_cached_data(day_range, query_time)
+                if cached is not None and cached.is_stale:
+                    self._run_revalidating(api, cached.items, cached.fetched_at, query_time, day_range)
+                    return
+                calen_items = cached.items if cached is not None else api.get_data(day_range, query_time)
             else:
-                # Display the schedule in a horizontal format
-                self._calendar_display.display_schedule(calen_items, start_date=query_time, day_range=day_range)
+                calen_items = api.get_data(day_range, query_time)
+
+            self._print_schedule(calen_items, query_time, day_range)
+
+        except lhu_calen_api.CircuitOpenError as e:
+            self._print_circuit_open(api, e, query_time, day_range)
+        except Exception as e:
+            self._print_error(e)
+
+    def run_daemon(self, client: DaemonClient, query_time: datetime, day_range: int) -> bool:
+        """Show the schedule answered by a running `serve` daemon.
+
+        Returns:
+            `False` if no daemon answered, the caller should then fetch by itself
+        """
+        try:
+            if self._paged:
+                with profiling.span("daemon"):
+                    calen_items = client.get_data(day_range, query_time)
+                self._run_paged(calen_items, query_time, day_range)
+                return True
+
+            # Same policy as `run`, the daemon reports how old its cached data is
+            with profiling.span("daemon"):
+                cached = client.get_cached_data(day_range, query_time) if self._stale_while_revalidate else None
+                calen_items = cached.items if cached is not None else client.get_data(day_range, query_time)
+            if cached is not None and cached.is_stale:
+                self._print_stale(cached.items, cached.fetched_at, query_time, day_range)
+                try:
+                    # The daemon refreshes it for the next view
+                    client.revalidate(day_range, query_time)
+                except DaemonUnavailable:
+                    pass
+            else:
+                self._print_schedule(calen_items, query_time, day_range)
+        except DaemonUnavailable:
+            return False
+        except lhu_calen_api.CircuitOpenError as e:
+            self._print_circuit_open(client, e, query_time, day_range)
+        except Exception as e:
+            self._print_error(e)
+        return True
+
+    def _print_circuit_open(self, source: LHUCalenAPI | DaemonClient, error: lhu_calen_api.CircuitOpenError, query_time: datetime, day_range: int):
+        """Show the last known schedule rather than nothing while the API is down"""
+        try:
+            cached = source.get_cached_data(day_range, query_time)
+        except DaemonUnavailable:
+            cached = None
+        if cached is None:
+            self._print_error(error)
+            return
+        self._print(Group(
+            self._render(cached.items, query_time, day_range),
+            Text.from_markup(
+                f"[yellow]Dữ liệu cũ (cập nhật lúc {cached.fetched_at.strftime('%H:%M %d/%m')})[/yellow], "
+                f"[red]API đang gián đoạn, thử lại sau {error.retry_at.strftime('%H:%M')}[/red]"
+            )
+        ))
+
+    def _print(self, renderable: RenderableType):
+        with profiling.span("render.print"):
+            self._console.print(renderable)
+
+    def _print_schedule(self, calen_items: list[CalenItem], query_time: datetime, day_range: int):
+        """Print the schedule, from the render cache when this exact rendering was printed before"""
+        if self._render_cache is None or not calen_items:
+            self._print(self._render(calen_items, query_time, day_range))
+            return
+
+        with profiling.span("render.cache"):
+            key = RenderCache.key(calen_items, query_time, day_range, self._console.width, self._console.color_system)
+            output = self._render_cache.get(key)
+        if output is None:
+            with self._console.capture() as capture:
+                self._print(self._render(calen_items, query_time, day_range))
+            output = capture.get()
+            self._render_cache.set(key, output)
+
+        with profiling.span("render.print"):
+            self._console.file.write(output)
+            self._console.file.flush()
 
-        except lhu_calen_api.ConnectionError:
+    @contextmanager
+    def _pager_console(self) -> Iterator[Console]:
+        """Console writing into a pager as output is produced, or the normal console when there is no pager"""
+        command = shlex.split(os.environ.get("PAGER") or DisplayConfigs.PAGER)
+        if not self._use_pager or not self._console.is_terminal or not command:
+            yield self._console
+            return
+        try:
+            pager = subprocess.Popen(command, stdin=subprocess.PIPE, encoding="utf-8", errors="replace")
+        except OSError:
+            yield self._console
+            return
+
+        try:
+            # Same look as on the terminal, the pager passes the escape codes through
+            yield _PagerConsole(
+                file=pager.stdin,
+                force_terminal=True,
+                color_system=self._console.color_system,
+                width=self._console.width
+            )
+        finally:
+            try:
+                pager.stdin.close()
+            except BrokenPipeError:
+                pass
+            pager.wait()
+
+    def _run_paged(self, calen_items: Iterable[CalenItem], query_time: datetime, day_range: int):
+        """Print the schedule page by page, each page as soon as its items have arrived
+
+        `calen_items` is consumed lazily, errors of a fetch behind it are reported here.
+        """
+        try:
+            with self._pager_console() as console:
+                CalendarDisplay(console).display_schedule_paged(
+                    calen_items, start_date=query_time, day_range=day_range, page_days=DisplayConfigs.PAGE_DAYS
+                )
+        except BrokenPipeError:
+            # The pager was closed before the end, nothing left to show
+            pass
+        except Exception as e:
+            self._print_error(e)
+
+    def _print_error(self, error: Exception):
+        if isinstance(error, lhu_calen_api.CircuitOpenError):
+            self._console.print(f"[red]API LHU đang gián đoạn, sẽ thử lại sau {error.retry_at.strftime('%H:%M')}[/red]")
+        elif isinstance(error, lhu_calen_api.ConnectionError):
             self._console.print(f"[red]Không thể kết nối, hãy kiểm tra lại mạng[/red]")
-        except lhu_calen_api.TimeoutError:
+        elif isinstance(error, lhu_calen_api.TimeoutError):
             self._console.print(f"[red]Kết nối hết thời gian chờ, hãy kiểm tra lại đường truyền mạng[/red]")
-        except Exception as e:
-            self._console.print(f"[red]Lỗi khi lấy hoặc hiển thị lịch: {str(e)}[/red]")
+        else:
+            self._console.print(f"[red]Lỗi khi lấy hoặc hiển thị lịch: {str(error)}[/red]")
+
+    def _render(self, calen_items: list[CalenItem], query_time: datetime, day_range: int) -> RenderableType:
+        if not calen_items:
+            return Text(f"Không có lịch học trong {day_range} ngày tới", style="italic")
+        # Display the schedule in a horizontal format
+        return self._calendar_display.build_schedule(calen_items, start_date=query_time, day_range=day_range)
+
+    def _run_revalidating(self, api: LHUCalenAPI, stale_items: list[CalenItem], fetched_at: datetime, query_time: datetime, day_range: int):
+        """Show the stale schedule right away and redraw it in place if the background refresh finishes in time.
+
+        The wait is bounded by `CacheConfigs.REVALIDATE_WAIT_SECONDS`; a refresh still running
+        then is abandoned at exit, the stale data stays cached and the next run tries again.
+        """
+        result: dict[str, list[CalenItem] | Exception] = {}
+
+        def refresh():
+            try:
+                result["items"] = api.refresh(day_range, query_time)
+            except Exception as e:
+                result["error"] = e
+
+        # Days refreshed before the wait ends are cached even if the rest is abandoned
+        refresh_thread = threading.Thread(target=refresh, name="calen-revalidate", daemon=True)
+        refresh_thread.start()
+
+        stale_note = f"[yellow]Dữ liệu cũ (cập nhật lúc {fetched_at.strftime('%H:%M %d/%m')})[/yellow]"
+
+        def final_render() -> RenderableType:
+            if "items" in result:
+                return self._render(result["items"], query_time, day_range)
+            if "error" in result:
+                return Group(self._render(stale_items, query_time, day_range), Text.from_markup(f"{stale_note}, [red]không thể làm mới[/red]"))
+            return Group(self._render(stale_items, query_time, day_range), Text.from_markup(f"{stale_note}, [dim]chưa làm mới được, thử lại ở lần sau[/dim]"))
+
+        # Output that is not a terminal can not be redrawn, print only the final result
+        if not self._console.is_terminal:
+            refresh_thread.join(CacheConfigs.REVALIDATE_WAIT_SECONDS)
+            self._print(final_render())
+            return
+
+        from rich.live import Live
+        with Live(
+            Group(self._render(stale_items, query_time, day_range), Text.from_markup(f"{stale_note}, [dim]đang làm mới...[/dim]")),
+            console=self._console,
+            auto_refresh=False
+        ) as live:
+            refresh_thread.join(CacheConfigs.REVALIDATE_WAIT_SECONDS)
+            live.update(final_render(), refresh=True)
+
+    def _print_stale(self, stale_items: list[CalenItem], fetched_at: datetime, query_time: datetime, day_range: int):
+        self._print(Group(
+            self._render(stale_items, query_time, day_range),
+            Text.from_markup(f"[yellow]Dữ liệu cũ (cập nhật lúc {fetched_at.strftime('%H:%M %d/%m')})[/yellow], [dim]đang làm mới ở nền[/dim]")
+        ))
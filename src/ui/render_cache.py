@@ -0,0 +1,90 @@
+import hashlib
+from datetime import date, datetime
+from pathlib import Path
+from src.core.lhu_calen_api import CalenItem
+from src.utils.files import atomic_write
+
+class RenderCache:
+    """
+    Final terminal output of rendered schedules, one file per rendering.
+
+    A rendering depends on the items, the range shown, the console (width and color
+    system) and the current date (countdown labels), so all of them make up the key.
+    A repeated `view` on the same day writes the stored output instead of building
+    the table again.
+    """
+
+    FILE_SUFFIX: str = ".ansi"
+
+    def __init__(self, directory: Path, max_entries: int) -> None:
+        """
+        Args:
+            directory: Where the renderings are stored
+            max_entries: Oldest renderings are removed above this count
+        """
+        self.directory: Path = directory
+        self.max_entries: int = max_entries
+
+    @staticmethod
+    def key(
+            calen_items: list[CalenItem],
+            start_date: datetime | None,
+            day_range: int,
+            width: int,
+            color_system: str | None,
+            today: date | None = None
+        ) -> str:
+        digest = hashlib.sha1()
+        today = today or date.today()
+        # The table starts today when no start date is given
+        start_day = start_date.date() if start_date is not None else today
+        digest.update(f"{start_day.isoformat()}|{day_range}|{width}|{color_system}|{today.isoformat()}".encode())
+        for item in calen_items:
+            digest.update(repr(item.to_row()).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.FILE_SUFFIX}"
+
+    def get(self, key: str) -> str | None:
+        try:
+            return self._path(key).read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def set(self, key: str, output: str) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Readers never see a partly written file
+            atomic_write(self._path(key), output.encode("utf-8"))
+        except OSError:
+            # If we can't write to cache, just ignore (don't break the app)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        try:
+            entries = [(entry.stat().st_mtime, entry) for entry in self.directory.glob(f"*{self.FILE_SUFFIX}")]
+        except OSError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, entry in entries[:len(entries) - self.max_entries]:
+            entry.unlink(missing_ok=True)
+
+    def clear(self) -> int:
+        """
+        Remove every stored rendering.
+
+        Returns:
+            Number of files removed
+        """
+        count = 0
+        for entry in self.directory.glob(f"*{self.FILE_SUFFIX}"):
+            try:
+                entry.unlink()
+                count += 1
+            except OSError:
+                pass
+        return count
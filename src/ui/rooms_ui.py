@@ -0,0 +1,80 @@
+import json
+import sys
+from datetime import datetime
+from rich.console import Console
+from rich.table import Table
+from src.core.room_index import RoomIndex, RoomStatus
+
+class RoomsUI:
+    def __init__(self):
+        self._console: Console = Console()
+
+    def run(self, room_index: RoomIndex, at: datetime, facility: str | None, show: str = "all", as_json: bool = False) -> bool:
+        """Show which rooms are busy or free at `at`.
+
+        Args:
+            show: `all`, `busy` or `free`
+
+        Returns:
+            `False` if no room is known, e.g. the facility is wrong or nothing is cached yet
+        """
+        statuses = room_index.status_at(at, facility)
+        if not statuses:
+            known = ", ".join(room_index.facilities())
+            self._console.print(
+                f"[yellow]Không có phòng nào trong dữ liệu đã lưu"
+                + (f" của cơ sở {facility}" if facility else "")
+                + "[/yellow]"
+                + (f"\nCác cơ sở đã biết: {known}" if known else "\nHãy xem lịch (view, batch, cache warm) để thu thập dữ liệu phòng")
+            )
+            return False
+
+        if show != "all":
+            statuses = [status for status in statuses if status.busy == (show == "busy")]
+
+        if as_json:
+            for status in statuses:
+                sys.stdout.write(json.dumps(self._to_json(status), ensure_ascii=False) + "\n")
+            return True
+
+        self._print_table(statuses, at)
+        busy = sum(1 for status in statuses if status.busy)
+        self._console.print(f"{busy} phòng đang dùng, {len(statuses) - busy} phòng trống lúc {at.strftime('%H:%M %d/%m/%Y')}")
+        self._console.print("[dim]Chỉ gồm các phòng có trong lịch đã lưu[/dim]")
+        return True
+
+    @staticmethod
+    def _to_json(status: RoomStatus) -> dict:
+        return {
+            "facility": status.facility,
+            "room": status.room,
+            "busy": status.busy,
+            "subject": status.occupancy.subject if status.occupancy else None,
+            "start": status.occupancy.start.isoformat() if status.occupancy else None,
+            "end": status.occupancy.end.isoformat() if status.occupancy else None,
+            "free_until": status.free_until.isoformat() if status.free_until else None,
+        }
+
+    def _print_table(self, statuses: list[RoomStatus], at: datetime) -> None:
+        table = Table(show_header=True, header_style="bold magenta")
+        table.add_column("Cơ sở")
+        table.add_column("Phòng")
+        table.add_column("Trạng thái")
+        table.add_column("Chi tiết")
+
+        for status in statuses:
+            if status.occupancy is not None:
+                state = "[red]Đang dùng[/red]"
+                detail = (f"{status.occupancy.subject} "
+                          f"[cyan]{status.occupancy.start.strftime('%H:%M')}-{status.occupancy.end.strftime('%H:%M')}[/cyan]")
+            else:
+                state = "[green]Trống[/green]"
+                if status.free_until is None:
+                    detail = "[dim]Không có lịch sắp tới[/dim]"
+                elif status.free_until.date() == at.date():
+                    detail = f"Trống đến {status.free_until.strftime('%H:%M')}"
+                else:
+                    detail = f"Trống đến {status.free_until.strftime('%H:%M %d/%m')}"
+            table.add_row(status.facility, status.room, state, detail)
+
+        self._console.print(table)
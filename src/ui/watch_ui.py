@@ -0,0 +1,147 @@
+import time
+from datetime import datetime, timedelta
+from rich.console import Group, RenderableType
+from rich.text import Text
+from src.core.lhu_calen_api import LHUCalenAPI, CalenItem
+from src.core.configurations import WatchConfigs
+from src.ui.main_ui import MainUI
+
+ItemKey = tuple[datetime, str]
+
+def item_key(item: CalenItem) -> ItemKey:
+    """What identifies a session across polls, its other fields may change"""
+    return (item.start_time, item.subject_name)
+
+def diff_items(old: list[CalenItem], new: list[CalenItem]) -> tuple[set[ItemKey], int]:
+    """Sessions of `new` that were added or changed since `old`
+
+    Returns:
+        Keys of the added or changed sessions, and the number of removed sessions
+    """
+    previous = {item_key(item): item for item in old}
+    changed: set[ItemKey] = set()
+    for item in new:
+        key = item_key(item)
+        before = previous.pop(key, None)
+        if before is None or (
+            before.end_time != item.end_time
+            or before.room_name != item.room_name
+            or before.facility_name != item.facility_name
+            or before.is_cancelled != item.is_cancelled
+        ):
+            changed.add(key)
+    return changed, len(previous)
+
+def next_poll_interval(items: list[CalenItem], now: datetime) -> float:
+    """Seconds until the next poll, short around classes and long at night
+
+    `now` is a naive local time, session times are local times labelled as UTC.
+    """
+    near = timedelta(minutes=WatchConfigs.NEAR_CLASS_MINUTES)
+    for item in items:
+        if item.is_cancelled:
+            continue
+        start = item.start_time.replace(tzinfo=None)
+        end = item.end_time.replace(tzinfo=None)
+        if start - near <= now <= end:
+            return WatchConfigs.NEAR_CLASS_INTERVAL_SECONDS
+
+    if now.hour >= WatchConfigs.NIGHT_START_HOUR or now.hour < WatchConfigs.NIGHT_END_HOUR:
+        interval = WatchConfigs.NIGHT_INTERVAL_SECONDS
+    else:
+        interval = WatchConfigs.DAY_INTERVAL_SECONDS
+
+    # Wake up in time for the next class
+    upcoming = [
+        (item.start_time.replace(tzinfo=None) - near - now).total_seconds()
+        for item in items
+        if not item.is_cancelled and item.start_time.replace(tzinfo=None) - near > now
+    ]
+    if upcoming:
+        interval = min(interval, max(min(upcoming), WatchConfigs.NEAR_CLASS_INTERVAL_SECONDS))
+    return interval
+
+class WatchUI(MainUI):
+    """Keep the schedule on screen and poll the API, redrawing only when the schedule changed"""
+
+    def __init__(self):
+        super().__init__(stale_while_revalidate=False)
+
+    def watch(self, api: LHUCalenAPI, query_time: datetime | None, day_range: int):
+        """Poll until interrupted with Ctrl+C.
+
+        Without `query_time` the schedule starts at the beginning of the current day, and
+        follows the day when it changes.
+        """
+        def start_of(now: datetime) -> datetime:
+            return query_time if query_time is not None else now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        try:
+            shown_start = start_of(datetime.now())
+            try:
+                items = api.get_data(day_range, shown_start)
+            except Exception as e:
+                self._print_error(e)
+                return
+
+            changed: set[ItemKey] = set()
+            error: Exception | None = None
+            updated_at = datetime.now()
+
+            def render() -> RenderableType:
+                table = self._calendar_display.build_schedule(
+                    items, start_date=shown_start, day_range=day_range,
+                    highlight=(lambda item: item_key(item) in changed) if changed else None
+                ) if items else Text(f"Không có lịch học trong {day_range} ngày tới", style="italic")
+                status = f"[dim]Đang theo dõi, cập nhật lúc {updated_at.strftime('%H:%M')} (Ctrl+C để thoát)[/dim]"
+                if changed:
+                    status += f", [yellow]{len(changed)} buổi vừa thay đổi[/yellow]"
+                if error is not None:
+                    status += ", [red]không thể làm mới[/red]"
+                return Group(table, Text.from_markup(status))
+
+            live = None
+            if self._console.is_terminal:
+                from rich.live import Live
+                live = Live(render(), console=self._console, auto_refresh=False)
+                live.start()
+            else:
+                self._print(render())
+
+            try:
+                while True:
+                    time.sleep(next_poll_interval(items, datetime.now()))
+                    now = datetime.now()
+                    start = start_of(now)
+                    try:
+                        new_items = api.refresh(day_range, start)
+                    except Exception as e:
+                        # Keep showing the last schedule, only the status line changes
+                        if error is None:
+                            error = e
+                            self._show(live, render())
+                        continue
+
+                    new_changed, removed = diff_items(items, new_items)
+                    if start != shown_start:
+                        # A new day, nothing to highlight
+                        new_changed, removed = set(), 1
+                    if not new_changed and not removed and error is None:
+                        continue
+
+                    items, shown_start, error, updated_at = new_items, start, None, now
+                    if new_changed or removed:
+                        changed = new_changed
+                    self._show(live, render())
+            finally:
+                if live:
+                    live.stop()
+        except KeyboardInterrupt:
+            pass
+
+    def _show(self, live, renderable: RenderableType):
+        # Output that is not a terminal can not be redrawn, every change is printed after the previous one
+        if live is not None:
+            live.update(renderable, refresh=True)
+        else:
+            self._print(renderable)
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """
+    Replace the content of `path` with `data` through a temporary file renamed over it,
+    so readers see either the old or the new content, never a part of it.
+
+    Raises:
+        `OSError` : When the file can not be written
+    """
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+class FileLock:
+    """
+    Advisory exclusive lock on a file, held against other processes and other threads
+    (every `FileLock` opens the file on its own).
+
+    with FileLock(path):
+        ...
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path: Path = path
+        self._fd: int | None = None
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def try_acquire(self) -> bool:
+        """Take the lock if nobody holds it, without waiting"""
+        return self.acquire(timeout=0)
+
+    def acquire(self, timeout: float | None = None, poll_interval: float = 0.02) -> bool:
+        """
+        Wait for the lock.
+
+        Args:
+            timeout: Seconds to wait at most, `None` to wait as long as it takes
+
+        Returns:
+            Whether the lock was taken, `False` when the timeout expired
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if timeout is None and fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            self._fd = fd
+            return True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._try_lock(fd):
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                return False
+            time.sleep(poll_interval)
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            # Closing the file releases the lock anyway
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from typing import ParamSpec, TypeVar
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Taken when this module is first imported, `src.main` imports it before anything else
+_STARTED: float = time.perf_counter()
+
+_enabled: bool = False
+_lock: threading.Lock = threading.Lock()
+_local: threading.local = threading.local()
+# Total seconds and number of calls of every span path, in order of first use
+_spans: dict[str, list[float]] = {}
+_counters: Counter[str] = Counter()
+
+class _NullSpan:
+    """What `span` returns while profiling is disabled, entering and leaving it does nothing"""
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("_name", "_path", "_started")
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    def __enter__(self) -> None:
+        stack: list[str] = getattr(_local, "stack", None) or []
+        _local.stack = stack
+        self._path = f"{stack[-1]}/{self._name}" if stack else self._name
+        stack.append(self._path)
+        with _lock:
+            # Registered on entry so a parent is listed before its children
+            _spans.setdefault(self._path, [0.0, 0])
+        self._started = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self._started
+        _local.stack.pop()
+        _add(self._path, elapsed)
+
+def _add(path: str, elapsed: float) -> None:
+    with _lock:
+        entry = _spans.setdefault(path, [0.0, 0])
+        entry[0] += elapsed
+        entry[1] += 1
+
+def enable() -> None:
+    """Start recording, the imports done so far are recorded as the `imports` span"""
+    global _enabled
+    _enabled = True
+    _add("imports", time.perf_counter() - _STARTED)
+
+def is_enabled() -> bool:
+    return _enabled
+
+def span(name: str) -> _Span | _NullSpan:
+    """Time a block, nested spans are reported under their parent:
+
+        with profiling.span("cache.get"):
+            ...
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+def propagate(fn: Callable[P, R]) -> Callable[P, R]:
+    """`fn` running under the current span, for work handed over to another thread"""
+    if not _enabled:
+        return fn
+    parent = list(getattr(_local, "stack", None) or [])
+
+    def run(*args: P.args, **kwargs: P.kwargs) -> R:
+        _local.stack = list(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.stack = []
+    return run
+
+def count(name: str, value: int = 1) -> None:
+    """Add `value` to a counter (hits, misses, bytes...)"""
+    if _enabled:
+        with _lock:
+            _counters[name] += value
+
+def report() -> dict:
+    """Recorded spans and counters, times in milliseconds"""
+    with _lock:
+        return {
+            "total_ms": round((time.perf_counter() - _STARTED) * 1000, 3),
+            "spans": [
+                {"name": path, "calls": int(calls), "total_ms": round(total * 1000, 3)}
+                for path, (total, calls) in _spans.items()
+            ],
+            "counters": dict(_counters),
+        }
+
+def format_report(data: dict) -> str:
+    """`report` as an indented breakdown"""
+    lines = ["Profile", f"  {'total':<34} {data['total_ms']:>10.2f} ms"]
+    for entry in data["spans"]:
+        depth = entry["name"].count("/")
+        name = "  " * depth + entry["name"].rsplit("/", 1)[-1]
+        calls = f"  x{entry['calls']}" if entry["calls"] > 1 else ""
+        lines.append(f"  {name:<34} {entry['total_ms']:>10.2f} ms{calls}")
+    for name, value in data["counters"].items():
+        lines.append(f"  {name:<34} {value:>10}")
+    return "\n".join(lines)
@@ -0,0 +1,24 @@
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+# The local stub of the LHU API lives with the benchmarks
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from stub_server import StubServer
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    """Every test gets its own cache directory"""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+@pytest.fixture(scope="session")
+def stub() -> Iterator[StubServer]:
+    """Shared by all tests, compare `requests` before and after instead of to a fixed count"""
+    with StubServer(latency_ms=0) as stub:
+        yield stub
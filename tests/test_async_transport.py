@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+
+from src.core.async_transport import AsyncHTTPTransport, HTTPConnectionError, HTTPStatusError
+
+
+async def serve(replies: list[bytes], callback):
+    """Answer every request with the next raw reply (the last one once they run out), count the requests"""
+    requests = 0
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        nonlocal requests
+        await reader.readuntil(b"\r\n\r\n")
+        reply = replies[min(requests, len(replies) - 1)]
+        requests += 1
+        writer.write(reply)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    transport = AsyncHTTPTransport(max_retries=2, backoff_base=0, backoff_max=0)
+    try:
+        return await callback(transport, f"http://127.0.0.1:{port}/"), requests
+    finally:
+        await transport.aclose()
+        server.close()
+
+
+def response(status: str, body: dict) -> bytes:
+    encoded = json.dumps(body).encode()
+    return f"HTTP/1.1 {status}\r\nContent-Length: {len(encoded)}\r\nConnection: close\r\n\r\n".encode() + encoded
+
+
+@pytest.mark.parametrize("reply", [
+    b"HTTP/1.1 abc OK\r\n\r\n",
+    b"HTTP/1.1\r\n\r\n",
+    b"HTTP/1.1 20",
+    b"HTTP/1.1 200 OK\r\nContent-Length: x\r\n\r\n",
+    b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n",
+    b"HTTP/1.1 200 OK\r\nContent-Encoding: deflate\r\nContent-Length: 3\r\n\r\nabc",
+])
+def test_malformed_responses_are_retried_as_connection_errors(reply):
+    async def call(transport, url):
+        with pytest.raises(HTTPConnectionError):
+            await transport.post_json(url, {})
+
+    _, requests = asyncio.run(serve([reply], call))
+    assert requests == 3
+
+
+def test_malformed_response_then_success():
+    async def call(transport, url):
+        return await transport.post_json(url, {})
+
+    result, requests = asyncio.run(serve([b"HTTP/1.1 20", response("200 OK", {"ok": 1})], call))
+    assert result == {"ok": 1}
+    assert requests == 2
+
+
+def test_transient_status_is_retried():
+    async def call(transport, url):
+        return await transport.post_json(url, {})
+
+    result, requests = asyncio.run(serve([response("503 Service Unavailable", {}), response("200 OK", {"ok": 1})], call))
+    assert result == {"ok": 1}
+    assert requests == 2
+
+
+def test_client_error_is_not_retried():
+    async def call(transport, url):
+        with pytest.raises(HTTPStatusError) as error:
+            await transport.post_json(url, {})
+        return error.value.status_code
+
+    status, requests = asyncio.run(serve([response("404 Not Found", {})], call))
+    assert status == 404
+    assert requests == 1
@@ -0,0 +1,111 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from src.core.binary_cache import BinaryCacheManager
+from src.core.cache import CacheManager
+from src.core.lhu_calen_api import CalenItem
+
+API_URL = "http://api.test/calendar"
+STUDENT_ID = "200000001"
+FIRST_DAY = date(2026, 1, 5)
+
+
+def session(day: date, hour: int, room: str = "A01", subject: str = "Toán cao cấp", is_cancelled: bool = False) -> tuple:
+    start = datetime(day.year, day.month, day.day, hour, tzinfo=timezone.utc)
+    return CalenItem(start, start + timedelta(hours=2), room, subject, "Cơ sở 1", is_cancelled).to_row()
+
+
+def schedule(days: int) -> dict[date, list]:
+    data: dict[date, list] = {}
+    for offset in range(days):
+        day = FIRST_DAY + timedelta(days=offset)
+        # Sundays are empty, they must still count as cached
+        data[day] = [] if day.weekday() == 6 else [
+            session(day, 7, room=f"A{offset:02d}"),
+            session(day, 13, subject="Lập trình Python", is_cancelled=offset % 3 == 0),
+        ]
+    return data
+
+
+def items(rows: list) -> list[CalenItem]:
+    return CalenItem.from_rows(rows)
+
+
+@pytest.fixture
+def cache() -> BinaryCacheManager:
+    return BinaryCacheManager("lhu-calendar-test", 24)
+
+
+def test_round_trip(cache):
+    data = schedule(14)
+    cache.set(API_URL, STUDENT_ID, data)
+
+    cached = cache.get(API_URL, STUDENT_ID, FIRST_DAY, FIRST_DAY + timedelta(days=13))
+    assert sorted(cached) == sorted(data)
+    for day, rows in data.items():
+        assert items(cached[day].items) == items(rows)
+
+
+def test_round_trip_matches_json_backend(cache):
+    data = schedule(10)
+    json_cache = CacheManager("lhu-calendar-test-json", 24)
+    cache.set(API_URL, STUDENT_ID, data)
+    json_cache.set(API_URL, STUDENT_ID, data)
+
+    last_day = FIRST_DAY + timedelta(days=9)
+    binary_days = cache.get(API_URL, STUDENT_ID, FIRST_DAY, last_day)
+    json_days = json_cache.get(API_URL, STUDENT_ID, FIRST_DAY, last_day)
+    assert {day: items(cached_day.items) for day, cached_day in binary_days.items()} == \
+           {day: items(cached_day.items) for day, cached_day in json_days.items()}
+
+
+def test_get_returns_only_the_requested_days(cache):
+    cache.set(API_URL, STUDENT_ID, schedule(30))
+
+    first_day = FIRST_DAY + timedelta(days=10)
+    last_day = FIRST_DAY + timedelta(days=12)
+    cached = cache.get(API_URL, STUDENT_ID, first_day, last_day)
+    assert sorted(cached) == [first_day, first_day + timedelta(days=1), last_day]
+    assert all(
+        CalenItem.from_row(row).start_time.date() == day
+        for day, cached_day in cached.items()
+        for row in cached_day.items
+    )
+
+
+def test_days_merge_across_writes(cache):
+    data = schedule(10)
+    cache.set(API_URL, STUDENT_ID, {day: rows for day, rows in data.items() if day < FIRST_DAY + timedelta(days=5)})
+    cache.set(API_URL, STUDENT_ID, {day: rows for day, rows in data.items() if day >= FIRST_DAY + timedelta(days=5)})
+
+    cached = cache.get(API_URL, STUDENT_ID, FIRST_DAY, FIRST_DAY + timedelta(days=9))
+    assert {day: items(cached_day.items) for day, cached_day in cached.items()} == \
+           {day: items(rows) for day, rows in data.items()}
+
+
+def test_expired_days_are_left_out(cache):
+    cache.set(API_URL, STUDENT_ID, schedule(3))
+    assert cache.get(API_URL, STUDENT_ID, FIRST_DAY, FIRST_DAY, max_age=timedelta(0)) == {}
+    assert FIRST_DAY in cache.get(API_URL, STUDENT_ID, FIRST_DAY, FIRST_DAY)
+
+
+def test_iter_stores_decodes_the_whole_store(cache):
+    data = schedule(7)
+    cache.set(API_URL, STUDENT_ID, data)
+
+    stores = list(cache.iter_stores())
+    assert [(api_url, student_id) for api_url, student_id, _ in stores] == [(API_URL, STUDENT_ID)]
+    days = stores[0][2]
+    assert {day: items(cached_day.items) for day, cached_day in days.items()} == \
+           {day: items(rows) for day, rows in data.items()}
+
+
+def test_corrupt_store_is_a_miss_and_gets_replaced(cache):
+    cache.set(API_URL, STUDENT_ID, schedule(3))
+    cache_file = cache._get_cache_file_path(cache._get_cache_key(API_URL, STUDENT_ID))
+    cache_file.write_bytes(cache_file.read_bytes()[:20])
+
+    assert cache.get(API_URL, STUDENT_ID, FIRST_DAY, FIRST_DAY) == {}
+    cache.set(API_URL, STUDENT_ID, schedule(1))
+    assert FIRST_DAY in cache.get(API_URL, STUDENT_ID, FIRST_DAY, FIRST_DAY)
@@ -0,0 +1,21 @@
+from datetime import date
+
+import pytest
+
+from src.core.binary_cache import BinaryCacheManager
+from src.core.cache import CacheManager
+
+API_URL = "http://api.test/calendar"
+STUDENT_ID = "200000001"
+DAY = date(2026, 1, 5)
+
+
+@pytest.mark.parametrize("manager", [CacheManager, BinaryCacheManager])
+def test_set_without_a_usable_lock_directory_is_ignored(manager):
+    cache = manager("lhu-calendar-test", 24)
+    # A file in place of the lock directory fails like a read-only or full disk
+    cache.lock_dir.parent.mkdir(parents=True, exist_ok=True)
+    cache.lock_dir.write_text("")
+
+    cache.set(API_URL, STUDENT_ID, {DAY: []})
+    assert cache.get(API_URL, STUDENT_ID, DAY, DAY) == {}
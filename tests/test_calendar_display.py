@@ -0,0 +1,49 @@
+import io
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from rich.console import Console
+
+from src.core.lhu_calen_api import CalenItem
+from src.core.schedule_table import ScheduleTable
+from src.ui.calendar_display import CalendarDisplay
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+START = datetime(2026, 1, 5, 7)
+
+
+def items() -> list[CalenItem]:
+    start = datetime(2026, 1, 5, 7, tzinfo=timezone.utc)
+    return [
+        CalenItem(start + timedelta(days=day), start + timedelta(days=day, hours=2), "A01", "Toán", "Cơ sở 1", day == 2)
+        for day in range(4)
+    ]
+
+
+def render(calen_items) -> str:
+    console = Console(file=io.StringIO(), width=120, color_system=None)
+    console.print(CalendarDisplay(console).build_schedule(calen_items, start_date=START, day_range=4))
+    return console.file.getvalue()
+
+
+def test_list_render_does_not_load_the_table_module():
+    # A fresh interpreter, the tests of this process import the module anyway
+    code = (
+        "import sys\n"
+        "from datetime import datetime, timezone\n"
+        "from rich.console import Console\n"
+        "from src.core.lhu_calen_api import CalenItem\n"
+        "from src.ui.calendar_display import CalendarDisplay\n"
+        "start = datetime(2026, 1, 5, 7, tzinfo=timezone.utc)\n"
+        "item = CalenItem(start, start.replace(hour=9), 'A01', 'Toán', 'Cơ sở 1', False)\n"
+        "Console(file=open('/dev/null', 'w')).print(CalendarDisplay(Console()).build_schedule([item], start_date=start, day_range=4))\n"
+        "assert 'src.core.schedule_table' not in sys.modules, 'schedule_table was imported'\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_table_renders_like_its_items():
+    assert render(ScheduleTable.from_items(items(), "200000001")) == render(items())
@@ -0,0 +1,175 @@
+import subprocess
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import pytest
+import requests
+
+from src.core.cache import CacheManager
+from src.core.circuit_breaker import CircuitBreaker
+from src.core.lhu_calen_api import CircuitOpenError, LHUCalenAPI
+
+API_URL = "http://api.test/calendar"
+FIRST_DAY = date(2026, 1, 5)
+COOLDOWN = 0.2
+
+
+@pytest.fixture
+def breaker(tmp_path) -> CircuitBreaker:
+    return CircuitBreaker(tmp_path / CircuitBreaker.FILE_NAME, failure_threshold=3, cooldown_seconds=COOLDOWN, probe_timeout_seconds=60)
+
+
+def open_circuit(breaker: CircuitBreaker) -> None:
+    for _ in range(3):
+        assert breaker.check(API_URL) is None
+        breaker.record_failure(API_URL)
+
+
+def test_opens_after_the_threshold(breaker):
+    for _ in range(2):
+        breaker.record_failure(API_URL)
+    assert breaker.states()[API_URL].state == "closed"
+    assert breaker.check(API_URL) is None
+
+    breaker.record_failure(API_URL)
+    assert breaker.states()[API_URL].state == "open"
+    assert breaker.check(API_URL) is not None
+
+
+def test_success_resets_the_failures(breaker):
+    breaker.record_failure(API_URL)
+    breaker.record_failure(API_URL)
+    breaker.record_success(API_URL)
+    breaker.record_failure(API_URL)
+    assert breaker.states()[API_URL].state == "closed"
+
+
+def test_half_open_lets_a_single_probe_through(breaker):
+    open_circuit(breaker)
+    time.sleep(COOLDOWN)
+    assert breaker.states()[API_URL].state == "half_open"
+
+    assert breaker.check(API_URL) is None
+    # Others keep failing fast while the probe is out
+    assert breaker.check(API_URL) is not None
+
+
+def test_probe_success_closes(breaker):
+    open_circuit(breaker)
+    time.sleep(COOLDOWN)
+    assert breaker.check(API_URL) is None
+    breaker.record_success(API_URL)
+    assert breaker.states() == {}
+    assert breaker.check(API_URL) is None
+
+
+def test_probe_failure_opens_for_another_cooldown(breaker):
+    open_circuit(breaker)
+    time.sleep(COOLDOWN)
+    assert breaker.check(API_URL) is None
+    breaker.record_failure(API_URL)
+    assert breaker.states()[API_URL].state == "open"
+    assert breaker.check(API_URL) is not None
+
+
+def test_released_probe_can_be_taken_again(breaker):
+    open_circuit(breaker)
+    time.sleep(COOLDOWN)
+    assert breaker.check(API_URL) is None
+    breaker.release_probe(API_URL)
+    assert breaker.states()[API_URL].state == "half_open"
+    assert breaker.check(API_URL) is None
+
+
+def test_state_is_shared_across_processes(breaker, tmp_path):
+    child = f"""
+import sys
+from pathlib import Path
+sys.path.insert(0, {str(Path(__file__).parents[1])!r})
+from src.core.circuit_breaker import CircuitBreaker
+breaker = CircuitBreaker(Path(sys.argv[1]), 3, {COOLDOWN}, 60)
+if sys.argv[2] == "fail":
+    breaker.record_failure({API_URL!r})
+else:
+    print(breaker.check({API_URL!r}))
+"""
+
+    def other_process(action: str) -> str:
+        return subprocess.run(
+            [sys.executable, "-c", child, str(tmp_path / CircuitBreaker.FILE_NAME), action],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    # Failures of this process and of another one add up
+    breaker.record_failure(API_URL)
+    other_process("fail")
+    other_process("fail")
+    assert breaker.states()[API_URL].state == "open"
+    assert other_process("check") != "None"
+
+    # A probe taken by this process is seen by the other one
+    time.sleep(COOLDOWN)
+    assert breaker.check(API_URL) is None
+    assert other_process("check") != "None"
+    breaker.record_success(API_URL)
+    assert other_process("check") == "None"
+
+
+class RaisingTransport:
+    def __init__(self, error: BaseException) -> None:
+        self.error: BaseException = error
+
+    def post_json(self, url, data, coalesce_key=None):
+        raise self.error
+
+
+def client_error(status: int) -> requests.exceptions.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(response=response)
+
+
+def probing_api(tmp_path, error: BaseException) -> tuple[LHUCalenAPI, CircuitBreaker]:
+    cache_manager = CacheManager("lhu-calendar-test", 24)
+    breaker = CircuitBreaker(tmp_path / CircuitBreaker.FILE_NAME, failure_threshold=1, cooldown_seconds=0, probe_timeout_seconds=60)
+    cache_manager._circuit_breaker = breaker
+    breaker.record_failure(API_URL)
+    return LHUCalenAPI(API_URL, "200000001", cache_manager, RaisingTransport(error)), breaker
+
+
+@pytest.mark.parametrize("error", [
+    client_error(404),
+    requests.exceptions.JSONDecodeError("Expecting value", "<html>", 0),
+])
+def test_answered_probe_closes(tmp_path, error):
+    api, breaker = probing_api(tmp_path, error)
+    with pytest.raises(type(error)):
+        api._fetch_page(FIRST_DAY, 1)
+    assert breaker.states() == {}
+
+
+@pytest.mark.parametrize("error", [client_error(503), RuntimeError()])
+def test_failed_probe_reopens(tmp_path, error):
+    api, breaker = probing_api(tmp_path, error)
+    with pytest.raises(type(error)):
+        api._fetch_page(FIRST_DAY, 1)
+    assert breaker.states()[API_URL].failures == 2
+
+
+def test_interrupted_probe_is_released(tmp_path):
+    api, breaker = probing_api(tmp_path, KeyboardInterrupt())
+    with pytest.raises(KeyboardInterrupt):
+        api._fetch_page(FIRST_DAY, 1)
+    assert breaker.states()[API_URL].failures == 1
+    # Not stuck until the probe timeout
+    assert breaker.check(API_URL) is None
+
+
+def test_requests_fail_fast_while_the_probe_is_out(tmp_path):
+    api, breaker = probing_api(tmp_path, client_error(404))
+    assert breaker.check(API_URL) is None
+    with pytest.raises(CircuitOpenError):
+        api._fetch_page(FIRST_DAY, 1)
+
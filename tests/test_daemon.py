@@ -0,0 +1,35 @@
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from src.core.cache import CacheManager
+from src.core.daemon import _WarmCache
+from src.core.lhu_calen_api import CalenItem
+
+API_URL = "http://api.test/calendar"
+STUDENT_ID = "200000001"
+DAY = date(2026, 1, 5)
+
+
+def session(room: str) -> list:
+    start = datetime(2026, 1, 5, 7, tzinfo=timezone.utc)
+    return CalenItem(start, start + timedelta(hours=2), room, "Toán cao cấp", "Cơ sở 1", False).to_row()
+
+
+def rooms(days) -> list[str]:
+    return [CalenItem.from_rows(days[DAY].items)[0].room_name]
+
+
+def test_warm_cache_picks_up_newer_data_from_other_processes():
+    warm = _WarmCache(CacheManager("lhu-calendar-test", 24), max_students=10)
+    warm.set(API_URL, STUDENT_ID, {DAY: [session("A01")]})
+    assert rooms(warm.get(API_URL, STUDENT_ID, DAY, DAY)) == ["A01"]
+
+    time.sleep(0.2)
+    # Another invocation refreshed the same store
+    CacheManager("lhu-calendar-test", 24).set(API_URL, STUDENT_ID, {DAY: [session("B07")]})
+
+    # Young enough in memory, the backing store is not read
+    assert rooms(warm.get(API_URL, STUDENT_ID, DAY, DAY)) == ["A01"]
+    # Too old in memory, the newer stored day is loaded
+    assert rooms(warm.get(API_URL, STUDENT_ID, DAY, DAY, max_age=timedelta(seconds=0.1))) == ["B07"]
+    assert rooms(warm.get(API_URL, STUDENT_ID, DAY, DAY)) == ["B07"]
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+from src.core.export import _ics_line, serialize, to_ics
+from src.core.lhu_calen_api import CalenItem
+
+
+def item(room: str = "A01", subject: str = "Toán cao cấp", is_cancelled: bool = False) -> CalenItem:
+    return CalenItem(
+        datetime(2026, 1, 5, 7, tzinfo=timezone.utc),
+        datetime(2026, 1, 5, 9, 30, tzinfo=timezone.utc),
+        room,
+        subject,
+        "Cơ sở 1",
+        is_cancelled
+    )
+
+
+def unfold(text: str) -> list[str]:
+    """Content lines of an iCalendar text, as a reader unfolds them"""
+    assert text.endswith("\r\n")
+    return text.replace("\r\n ", "").split("\r\n")[:-1]
+
+
+def events(text: str) -> list[dict[str, str]]:
+    found: list[dict[str, str]] = []
+    for line in unfold(text):
+        if line == "BEGIN:VEVENT":
+            found.append({})
+        elif found and line != "END:VEVENT" and ":" in line:
+            name, _, value = line.partition(":")
+            found[-1].setdefault(name, value)
+    return found
+
+
+def test_short_lines_are_not_folded():
+    assert _ics_line("SUMMARY:Toán") == "SUMMARY:Toán\r\n"
+
+
+def test_long_lines_fold_at_75_octets_without_splitting_characters():
+    line = "SUMMARY:" + "Lập trình hướng đối tượng " * 10
+    folded = _ics_line(line)
+
+    physical = folded.split("\r\n")[:-1]
+    assert len(physical) > 1
+    assert all(len(part.encode("utf-8")) <= 75 for part in physical)
+    assert all(part.startswith(" ") for part in physical[1:])
+    assert unfold(folded) == [line]
+
+
+def test_text_values_are_escaped():
+    text = "".join(to_ics([("200000001", item(room="A01; tầng 2", subject="Toán, Lý\\Hóa\nThực hành"))]))
+    event = events(text)[0]
+    assert event["SUMMARY"] == "Toán\\, Lý\\\\Hóa\\nThực hành"
+    assert event["LOCATION"] == "A01\\; tầng 2 (Cơ sở 1)"
+
+
+def test_every_line_of_a_calendar_is_folded():
+    records = [("200000001", item(subject="Môn học có tên rất dài " * 8))]
+    text = "".join(to_ics(records))
+    assert all(len(line.encode("utf-8")) <= 75 for line in text.split("\r\n"))
+    assert unfold(text)[0] == "BEGIN:VCALENDAR"
+    assert unfold(text)[-1] == "END:VCALENDAR"
+
+
+def test_event_fields():
+    event = events("".join(to_ics([("200000001", item(is_cancelled=True))])))[0]
+    assert event["DTSTART;TZID=Asia/Ho_Chi_Minh"] == "20260105T070000"
+    assert event["DTEND;TZID=Asia/Ho_Chi_Minh"] == "20260105T093000"
+    assert event["STATUS"] == "CANCELLED"
+    assert event["DESCRIPTION"] == "MSSV 200000001"
+    assert event["LAST-MODIFIED"] == event["DTSTAMP"]
+    assert int(event["SEQUENCE"]) > 0
+
+
+def test_uid_is_stable_across_exports_and_room_changes():
+    first = events("".join(to_ics([("200000001", item(room="A01"))])))[0]
+    moved = events("".join(to_ics([("200000001", item(room="B07"))])))[0]
+    assert first["UID"] == moved["UID"]
+    assert first["LOCATION"] != moved["LOCATION"]
+
+
+def test_uid_differs_per_student_and_session():
+    uids = {
+        events("".join(to_ics([(student_id, calen_item)])))[0]["UID"]
+        for student_id, calen_item in [
+            ("200000001", item()),
+            ("200000002", item()),
+            ("200000001", item(subject="Vật lý")),
+        ]
+    }
+    assert len(uids) == 3
+
+
+def test_csv_and_ndjson_keep_wall_clock_times():
+    records = [("200000001", item())]
+    rows = list(csv.reader(io.StringIO("".join(serialize(records, "csv")))))
+    assert rows[1][:4] == ["200000001", "2026-01-05", "2026-01-05T07:00:00", "2026-01-05T09:30:00"]
+
+    line = json.loads(next(serialize(records, "ndjson")))
+    assert line["start_time"] == "2026-01-05T07:00:00"
+    assert line["subject_name"] == "Toán cao cấp"
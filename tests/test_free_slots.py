@@ -0,0 +1,80 @@
+from datetime import date, datetime, time, timedelta, timezone
+
+from src.core.free_slots import busy_intervals, free_slots, merge_intervals
+from src.core.lhu_calen_api import CalenItem
+
+DAY = date(2026, 1, 5)
+
+
+def at(hour: int, minute: int = 0, day: date = DAY) -> datetime:
+    return datetime.combine(day, time(hour, minute))
+
+
+def test_merge_overlapping_and_contained():
+    merged = merge_intervals([
+        (at(9), at(11)),
+        (at(7), at(8)),
+        (at(10), at(12)),
+        (at(10, 30), at(11)),
+    ])
+    assert merged == [(at(7), at(8)), (at(9), at(12))]
+
+
+def test_merge_touching_intervals():
+    assert merge_intervals([(at(9), at(10)), (at(10), at(11))]) == [(at(9), at(11))]
+
+
+def test_merge_keeps_gaps():
+    intervals = [(at(9), at(10)), (at(10, 1), at(11))]
+    assert merge_intervals(intervals) == intervals
+
+
+def test_busy_intervals_skip_cancelled_and_drop_timezone():
+    items = [
+        CalenItem(at(7).replace(tzinfo=timezone.utc), at(9).replace(tzinfo=timezone.utc), "A01", "Math", "Cơ sở 1", False),
+        CalenItem(at(13), at(15), "A02", "Physics", "Cơ sở 1", True),
+    ]
+    assert busy_intervals(items) == [(at(7), at(9))]
+
+
+def test_free_slots_between_sessions_of_several_students():
+    busy = [(at(8), at(10)), (at(9), at(11)), (at(13), at(14))]
+    slots = free_slots(busy, DAY, DAY, time(7), time(17))
+    assert slots == [(at(7), at(8)), (at(11), at(13)), (at(14), at(17))]
+
+
+def test_free_slots_touching_sessions_leave_no_slot():
+    busy = [(at(7), at(9)), (at(9), at(11))]
+    assert free_slots(busy, DAY, DAY, time(7), time(11)) == []
+
+
+def test_free_slots_clipped_to_working_hours():
+    # Sessions running past both ends of the working hours
+    busy = [(at(6), at(8)), (at(16), at(19))]
+    assert free_slots(busy, DAY, DAY, time(7), time(17)) == [(at(8), at(16))]
+
+
+def test_free_slots_spanning_days():
+    next_day = DAY + timedelta(days=1)
+    busy = [(at(9, day=next_day), at(10, day=next_day))]
+    slots = free_slots(busy, DAY, next_day, time(8), time(12))
+    assert slots == [
+        (at(8), at(12)),
+        (at(8, day=next_day), at(9, day=next_day)),
+        (at(10, day=next_day), at(12, day=next_day)),
+    ]
+
+
+def test_free_slots_min_duration_and_not_before():
+    busy = [(at(9), at(10)), (at(10, 20), at(12))]
+    slots = free_slots(
+        busy, DAY, DAY, time(7), time(17),
+        min_duration=timedelta(minutes=30),
+        not_before=at(8)
+    )
+    # The 20 minute gap is too short, the morning starts at `not_before`
+    assert slots == [(at(8), at(9)), (at(12), at(17))]
+
+
+def test_free_slots_skip_days_already_over():
+    assert free_slots([], DAY, DAY, time(7), time(17), not_before=at(18)) == []
@@ -0,0 +1,64 @@
+import io
+import threading
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+from rich.console import Console
+
+from src.core.configurations import CacheConfigs
+from src.core.lhu_calen_api import CalenItem
+from src.ui.main_ui import MainUI
+
+START = datetime(2026, 1, 5, 9)
+
+
+def items() -> list[CalenItem]:
+    start = datetime(2026, 1, 5, 7, tzinfo=timezone.utc)
+    return [CalenItem(start, start + timedelta(hours=2), "A01", "Toán cao cấp", "Cơ sở 1", False)]
+
+
+class FakeAPI:
+    def __init__(self, refresh):
+        self._refresh = refresh
+
+    def refresh(self, day_range, dt):
+        return self._refresh()
+
+
+def run(refresh, is_terminal: bool) -> str:
+    ui = MainUI()
+    ui._console = Console(file=io.StringIO(), width=120, force_terminal=is_terminal, color_system=None)
+    ui._calendar_display.console = ui._console
+    ui._run_revalidating(FakeAPI(refresh), items(), START - timedelta(days=2), START, 4)
+    return ui._console.file.getvalue()
+
+
+def test_refreshed_schedule_is_redrawn():
+    fresh = [replace(items()[0], room_name="B07")]
+    for is_terminal in (True, False):
+        output = run(lambda: fresh, is_terminal)
+        # The last drawing is the refreshed schedule, without the stale note
+        last = output.rsplit("Dữ liệu cũ", 1)[-1]
+        assert "B07" in last
+        # Only a terminal shows the stale schedule while waiting
+        assert ("Dữ liệu cũ" in output) == is_terminal
+
+
+def test_failed_refresh_keeps_the_stale_schedule():
+    def refresh():
+        raise OSError()
+
+    output = run(refresh, is_terminal=False)
+    assert "A01" in output
+    assert "không thể làm mới" in output
+
+
+def test_slow_refresh_does_not_hold_the_view(monkeypatch):
+    monkeypatch.setattr(CacheConfigs, "REVALIDATE_WAIT_SECONDS", 0.05)
+    release = threading.Event()
+    try:
+        output = run(lambda: release.wait(5) and [], is_terminal=False)
+    finally:
+        release.set()
+    assert "A01" in output
+    assert "thử lại ở lần sau" in output
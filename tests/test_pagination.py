@@ -0,0 +1,124 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from src.core.cache import create_cache_manager
+from src.core.configurations import APIConfigs
+from src.core.lhu_calen_api import CalenItem, LHUCalenAPI, PagedDays
+
+QUERY_TIME = datetime(2026, 1, 5, tzinfo=timezone.utc)
+FIRST_DAY = QUERY_TIME.date()
+PER_DAY = 4
+
+
+def sessions(first_day: date, days: int, per_day: int = PER_DAY) -> list[CalenItem]:
+    return [
+        CalenItem(start, start + timedelta(hours=2), "A01", f"Môn {i}", "Cơ sở 1", False)
+        for day in range(days)
+        for i in range(per_day)
+        for start in [datetime.combine(first_day + timedelta(days=day), datetime.min.time(), timezone.utc) + timedelta(hours=7 + 2 * i)]
+    ]
+
+
+def test_short_page_ends_the_request():
+    days = PagedDays(FIRST_DAY, FIRST_DAY + timedelta(days=30))
+    assert days.consume(sessions(FIRST_DAY, 3))
+    taken = days.take_until(days.last_day)
+    assert len(taken) == 31
+    assert [len(taken[FIRST_DAY + timedelta(days=i)]) for i in range(4)] == [PER_DAY, PER_DAY, PER_DAY, 0]
+
+
+def test_full_page_keeps_its_last_day_pending():
+    page = sessions(FIRST_DAY, 10)[:APIConfigs.PAGE_SIZE]
+    last_day_of_page = page[-1].start_time.date()
+    days = PagedDays(FIRST_DAY, FIRST_DAY + timedelta(days=30))
+
+    assert not days.consume(page)
+    complete = days.complete_days(page)
+    # The page may have been cut off in the middle of its last day
+    assert max(complete) == last_day_of_page - timedelta(days=1)
+    assert all(len(items) == PER_DAY for items in complete.values())
+
+    rest = sessions(FIRST_DAY, 10)[APIConfigs.PAGE_SIZE:]
+    assert days.consume(rest)
+    remaining = days.take_until(days.last_day)
+    assert len(remaining[last_day_of_page]) == PER_DAY
+
+
+def test_page_past_the_range_ends_the_request():
+    days = PagedDays(FIRST_DAY, FIRST_DAY + timedelta(days=2))
+    assert days.consume(sessions(FIRST_DAY, 10)[:APIConfigs.PAGE_SIZE])
+
+
+def test_plan_from_total():
+    page = sessions(FIRST_DAY, 10)[:APIConfigs.PAGE_SIZE]
+    days = PagedDays(FIRST_DAY, FIRST_DAY + timedelta(days=29))
+    total_pages, last_page, needed_page = days.plan(page, total=480)
+    assert total_pages == 16
+    assert last_page == 16
+    # 30 days at 4 sessions a day are 4 pages of 30
+    assert 4 <= needed_page <= 5
+
+    total_pages, last_page, _ = days.plan(page, total=None)
+    assert total_pages is None
+    assert last_page == APIConfigs.MAX_PAGES
+
+
+@pytest.fixture(params=["json", "binary", "sqlite"])
+def cache_manager(request):
+    return create_cache_manager("lhu-calendar-test", 24, backend=request.param)
+
+
+def check_schedule(items: list[CalenItem], first_day: date, days: int):
+    """`PER_DAY` sessions on every day of the range, in order, none twice"""
+    starts = [item.start_time for item in items]
+    assert starts == sorted(starts)
+    assert len(set(starts)) == len(starts)
+    per_day: dict[date, int] = {}
+    for item in items:
+        per_day[item.start_time.date()] = per_day.get(item.start_time.date(), 0) + 1
+    assert per_day == {first_day + timedelta(days=i): PER_DAY for i in range(days)}
+
+
+def test_long_range_reads_every_page(stub, cache_manager):
+    api = LHUCalenAPI(stub.url, "200000001", cache_manager, clean_expired=False)
+    before = stub.requests
+    items = api.get_data(100, QUERY_TIME)
+
+    check_schedule(items, FIRST_DAY, 100)
+    # 400 sessions of the range, the stub holds 120 days
+    assert 400 // APIConfigs.PAGE_SIZE < stub.requests - before < 480 // APIConfigs.PAGE_SIZE + 1
+
+
+def test_short_range_stops_at_the_page_holding_it(stub, cache_manager):
+    api = LHUCalenAPI(stub.url, "200000001", cache_manager, clean_expired=False)
+    before = stub.requests
+    # 5 days of 4 sessions end within the first page of 30
+    check_schedule(api.get_data(5, QUERY_TIME), FIRST_DAY, 5)
+    assert stub.requests == before + 1
+
+
+def test_cached_days_are_reused(stub, cache_manager):
+    api = LHUCalenAPI(stub.url, "200000001", cache_manager, clean_expired=False)
+    items = api.get_data(30, QUERY_TIME)
+    requests = stub.requests
+
+    # Any range within the cached days is answered without a request
+    assert api.get_data(30, QUERY_TIME) == items
+    assert api.get_data(10, QUERY_TIME + timedelta(days=5)) == [
+        item for item in items
+        if QUERY_TIME + timedelta(days=5) <= item.start_time < QUERY_TIME + timedelta(days=15)
+    ]
+    assert stub.requests == requests
+
+
+def test_only_missing_days_are_fetched(stub, cache_manager):
+    api = LHUCalenAPI(stub.url, "200000001", cache_manager, clean_expired=False)
+    first = api.get_data(7, QUERY_TIME)
+    requests = stub.requests
+
+    longer = api.get_data(14, QUERY_TIME)
+    # One request from the first missing day, the first week comes from the cache
+    assert stub.requests == requests + 1
+    assert longer[:len(first)] == first
+    check_schedule(longer, FIRST_DAY, 14)
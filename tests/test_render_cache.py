@@ -0,0 +1,90 @@
+import io
+import os
+from dataclasses import replace
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from rich.console import Console
+
+from src.core.lhu_calen_api import CalenItem
+from src.ui.main_ui import MainUI
+from src.ui.render_cache import RenderCache
+
+TODAY = date(2026, 1, 5)
+START = datetime(2026, 1, 5, 9)
+
+
+def items() -> list[CalenItem]:
+    start = datetime(2026, 1, 5, 7, tzinfo=timezone.utc)
+    return [
+        CalenItem(start, start + timedelta(hours=2), "A01", "Toán cao cấp", "Cơ sở 1", False),
+        CalenItem(start + timedelta(days=1), start + timedelta(days=1, hours=2), "B02", "Vật lý", "Cơ sở 2", False),
+    ]
+
+
+def key(calen_items=None, start_date=START, day_range=4, width=120, color_system="truecolor", today=TODAY) -> str:
+    return RenderCache.key(items() if calen_items is None else calen_items, start_date, day_range, width, color_system, today)
+
+
+def test_key_is_stable():
+    assert key() == key()
+    # Only the day of the start matters
+    assert key(start_date=START.replace(hour=20)) == key()
+
+
+@pytest.mark.parametrize("changed", [
+    {"start_date": START + timedelta(days=1)},
+    {"day_range": 7},
+    {"width": 80},
+    {"color_system": None},
+    {"today": TODAY + timedelta(days=1)},
+    {"calen_items": items()[:1]},
+    {"calen_items": [replace(items()[0], room_name="C03"), items()[1]]},
+    {"calen_items": [replace(items()[0], is_cancelled=True), items()[1]]},
+    {"calen_items": [items()[0], replace(items()[1], start_time=items()[1].start_time + timedelta(hours=1))]},
+])
+def test_key_changes_with_anything_rendered(changed):
+    assert key(**changed) != key()
+
+
+def test_start_defaults_to_today():
+    assert key(start_date=None) == key(start_date=datetime.combine(TODAY, datetime.min.time()))
+    assert key(start_date=None, today=TODAY + timedelta(days=1)) != key(start_date=None)
+
+
+def test_store_and_evict(tmp_path):
+    cache = RenderCache(tmp_path / "render", max_entries=2)
+    assert cache.get("a") is None
+
+    for age, name in enumerate(["a", "b", "c"]):
+        cache.set(name, f"output {name}")
+        # Distinct modification times, oldest first
+        os.utime(cache._path(name), (1000 + age, 1000 + age))
+    cache.set("c", "output c")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "output b"
+    assert cache.get("c") == "output c"
+    assert cache.clear() == 2
+    assert cache.get("c") is None
+
+
+def test_view_reuses_the_stored_rendering(tmp_path, monkeypatch):
+    ui = MainUI(render_cache=RenderCache(tmp_path / "render", max_entries=10))
+    ui._console = Console(file=io.StringIO(), width=120, color_system="truecolor", force_terminal=True)
+    ui._calendar_display.console = ui._console
+
+    renders = []
+    render = ui._render
+    monkeypatch.setattr(ui, "_render", lambda *args: renders.append(args) or render(*args))
+
+    ui._print_schedule(items(), START, 4)
+    ui._print_schedule(items(), START, 4)
+    assert len(renders) == 1
+    # The stored rendering is written as it was printed
+    output = ui._console.file.getvalue()
+    assert output[:len(output) // 2] == output[len(output) // 2:]
+
+    # A room change is rendered again
+    ui._print_schedule([replace(items()[0], room_name="C03"), items()[1]], START, 4)
+    assert len(renders) == 2
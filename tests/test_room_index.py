@@ -0,0 +1,105 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from src.core.cache import CachedDay, create_cache_manager
+from src.core.lhu_calen_api import CalenItem
+from src.core.room_index import RoomIndex
+
+API_URL = "http://api.test/calendar"
+DAY = date(2026, 1, 5)
+
+
+def row(hour: int, room: str, subject: str = "Toán", facility: str = "Cơ sở 1", hours: int = 2, is_cancelled: bool = False, day: date = DAY) -> tuple:
+    # Session times are local times labelled as UTC
+    start = datetime(day.year, day.month, day.day, hour, tzinfo=timezone.utc)
+    return CalenItem(start, start + timedelta(hours=hours), room, subject, facility, is_cancelled).to_row()
+
+
+def at(hour: int, minute: int = 0) -> datetime:
+    return datetime(DAY.year, DAY.month, DAY.day, hour, minute)
+
+
+def by_room(statuses) -> dict:
+    return {(status.facility, status.room): status for status in statuses}
+
+
+@pytest.fixture
+def index(tmp_path) -> RoomIndex:
+    return RoomIndex(tmp_path / RoomIndex.DB_FILE_NAME)
+
+
+def test_empty_index(index):
+    assert index.status_at(at(9)) == []
+
+
+def test_busy_and_free_rooms(index):
+    index.update(API_URL, "1", {DAY: [row(7, "A01"), row(13, "A02", subject="Lý")]})
+
+    rooms = by_room(index.status_at(at(8)))
+    assert rooms[("Cơ sở 1", "A01")].busy
+    assert rooms[("Cơ sở 1", "A01")].occupancy.subject == "Toán"
+    assert rooms[("Cơ sở 1", "A01")].occupancy.end == at(9)
+    assert not rooms[("Cơ sở 1", "A02")].busy
+    assert rooms[("Cơ sở 1", "A02")].free_until == at(13)
+
+    # Sessions end exclusively
+    rooms = by_room(index.status_at(at(9)))
+    assert not rooms[("Cơ sở 1", "A01")].busy
+    assert rooms[("Cơ sở 1", "A01")].free_until is None
+
+
+def test_long_sessions_are_found(index):
+    index.update(API_URL, "1", {DAY: [row(7, "A01", hours=5), row(8, "A02")]})
+    assert by_room(index.status_at(at(11, 30)))[("Cơ sở 1", "A01")].busy
+
+
+def test_students_of_a_shared_session_are_counted(index):
+    index.update(API_URL, "1", {DAY: [row(7, "A01")]})
+    index.update(API_URL, "2", {DAY: [row(7, "A01")]})
+    assert by_room(index.status_at(at(8)))[("Cơ sở 1", "A01")].occupancy.students == 2
+
+
+def test_cancelled_sessions_leave_the_room_free(index):
+    index.update(API_URL, "1", {DAY: [row(7, "A01", is_cancelled=True), row(13, "A02")]})
+    rooms = by_room(index.status_at(at(8)))
+    assert ("Cơ sở 1", "A01") not in rooms
+    assert not rooms[("Cơ sở 1", "A02")].busy
+
+
+def test_update_replaces_the_days_of_a_student(index):
+    index.update(API_URL, "1", {DAY: [row(7, "A01")]})
+    # The session moved to another room
+    index.update(API_URL, "1", {DAY: [row(7, "B01")]})
+    rooms = by_room(index.status_at(at(8)))
+    assert not rooms[("Cơ sở 1", "A01")].busy
+    assert rooms[("Cơ sở 1", "B01")].busy
+
+
+def test_facility_filter(index):
+    index.update(API_URL, "1", {DAY: [row(7, "A01"), row(7, "A01", facility="Cơ sở 2")]})
+    assert index.facilities() == ["Cơ sở 1", "Cơ sở 2"]
+    assert [(status.facility, status.room) for status in index.status_at(at(8), "Cơ sở 2")] == [("Cơ sở 2", "A01")]
+
+
+def test_prune_and_rebuild(index):
+    next_day = DAY + timedelta(days=1)
+    index.update(API_URL, "1", {DAY: [row(7, "A01")], next_day: [row(7, "A01", day=next_day)]})
+    assert index.prune(at(12)) == 1
+    assert not by_room(index.status_at(at(8)))[("Cơ sở 1", "A01")].busy
+
+    fetched_at = datetime.now()
+    assert index.rebuild([(API_URL, "1", {DAY: CachedDay([row(7, "A01")], fetched_at)})]) == 1
+    assert by_room(index.status_at(at(8)))[("Cơ sở 1", "A01")].busy
+
+
+@pytest.mark.parametrize("backend", ["json", "binary", "sqlite"])
+def test_cache_writes_keep_the_index_current(backend):
+    cache_manager = create_cache_manager("lhu-calendar-test", 24, backend=backend)
+    cache_manager.set(API_URL, "1", {DAY: [row(7, "A01")]})
+    cache_manager.set(API_URL, "1", {DAY: [row(7, "B01")]})
+    cache_manager.flush()
+
+    rooms = by_room(cache_manager.room_index.status_at(at(8)))
+    assert rooms[("Cơ sở 1", "B01")].busy
+    assert not rooms[("Cơ sở 1", "A01")].busy
@@ -0,0 +1,61 @@
+import json
+from datetime import date, datetime, timezone
+
+from stub_server import StubServer, recorded_sessions
+
+from src.core.lhu_calen_api import page_payload, parse_page
+from src.core.transport import HTTPTransport
+
+FIRST_DAY = date(2026, 1, 5)
+
+
+def form(page_index: int, page_size: int = 30, first_day: date = FIRST_DAY) -> dict[str, str]:
+    payload = page_payload("200000001", first_day, page_index)
+    return {key: str(value) for key, value in {**payload, "PageSize": page_size}.items()}
+
+
+def test_pages_slice_the_sessions():
+    with StubServer(days=10, per_day=4) as stub:
+        pages = [parse_page(stub.response(form(page_index))) for page_index in (1, 2)]
+        last_page = parse_page(stub.response(form(2, page_size=35)))
+
+    (first, total), (second, _) = pages
+    assert total == 40
+    assert len(first) == 30
+    assert len(second) == 10
+    assert first[-1].start_time < second[0].start_time
+    assert len(last_page[0]) == 5
+
+
+def test_sessions_start_on_the_requested_day():
+    with StubServer(days=3, per_day=2) as stub:
+        items, _ = parse_page(stub.response(form(1, first_day=date(2026, 3, 1))))
+    assert items[0].start_time.replace(tzinfo=None) == datetime(2026, 3, 1, 7)
+    assert {item.start_time.date() for item in items} == {date(2026, 3, d) for d in (1, 2, 3)}
+
+
+def test_recorded_response_is_shifted(tmp_path):
+    record = tmp_path / "response.json"
+    record.write_text(json.dumps({"data": [[], [], [
+        {"ThoiGianBD": "2025-09-08T13:00:00", "ThoiGianKT": "2025-09-08T15:00:00", "TenPhong": "B02",
+         "TenMonHoc": "Lý", "TenCoSo": "Cơ sở 2", "TinhTrang": 0},
+        {"ThoiGianBD": "2025-09-08T07:00:00", "ThoiGianKT": "2025-09-08T09:00:00", "TenPhong": "A01",
+         "TenMonHoc": "Toán", "TenCoSo": "Cơ sở 1", "TinhTrang": 1},
+    ]]}), encoding="utf-8")
+    assert [session["start"] for session in recorded_sessions(str(record))] == [7 * 3600, 13 * 3600]
+
+    with StubServer(record=str(record)) as stub:
+        items, total = parse_page(stub.response(form(1)))
+    assert total == 2
+    assert [(item.room_name, item.is_cancelled) for item in items] == [("A01", True), ("B02", False)]
+    assert items[0].start_time.replace(tzinfo=None) == datetime(2026, 1, 5, 7)
+
+
+def test_serves_over_http(stub):
+    before = stub.requests
+    body = HTTPTransport().post_json(stub.url, page_payload("200000001", FIRST_DAY, 1))
+    items, total = parse_page(body)
+    assert stub.requests == before + 1
+    assert total == 120 * 4
+    assert len(items) == 30
+    assert items[0].start_time == datetime(2026, 1, 5, 7, tzinfo=timezone.utc)
@@ -0,0 +1,145 @@
+import json
+import socket
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.core.transport import HTTPTransport
+
+
+class ScriptedServer:
+    """Answers every POST with the next status of `statuses` (200 once they run out), after `delay` seconds"""
+
+    def __init__(self) -> None:
+        self.statuses: list[int] = []
+        self.delay: float = 0
+        self.requests: int = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with server._lock:
+                    server.requests += 1
+                    status = server.statuses.pop(0) if server.statuses else 200
+                    number = server.requests
+                time.sleep(server.delay)
+                body = json.dumps({"request": number}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/"
+
+    def __enter__(self) -> "ScriptedServer":
+        threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def server() -> Iterator[ScriptedServer]:
+    with ScriptedServer() as server:
+        yield server
+
+
+def transport(**kwargs) -> HTTPTransport:
+    return HTTPTransport(**{"backoff_base": 0, "backoff_max": 0, "max_retries": 2, **kwargs})
+
+
+def test_transient_errors_are_retried(server):
+    server.statuses = [503, 502]
+    assert transport().post_json(server.url, {"a": 1}) == {"request": 3}
+    assert server.requests == 3
+
+
+def test_gives_up_after_the_last_retry(server):
+    server.statuses = [503] * 5
+    with pytest.raises(requests.exceptions.HTTPError) as error:
+        transport().post_json(server.url, {})
+    assert error.value.response.status_code == 503
+    assert server.requests == 3
+
+
+def test_client_errors_are_not_retried(server):
+    server.statuses = [404]
+    with pytest.raises(requests.exceptions.HTTPError):
+        transport().post_json(server.url, {})
+    assert server.requests == 1
+
+
+def test_timeouts_are_retried(server):
+    server.delay = 0.3
+    with pytest.raises(requests.exceptions.Timeout):
+        transport(read_timeout=0.05, max_retries=1).post_json(server.url, {})
+    assert server.requests == 2
+
+
+def test_unreachable_server():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    with pytest.raises(requests.exceptions.ConnectionError):
+        transport().post_json(f"http://127.0.0.1:{port}/", {})
+
+
+def test_concurrent_calls_with_one_key_share_a_request(server):
+    server.delay = 0.2
+    client = transport()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: client.post_json(server.url, {}, coalesce_key="student"), range(8)))
+    assert server.requests == 1
+    assert results == [{"request": 1}] * 8
+
+
+def test_calls_with_different_keys_are_not_shared(server):
+    server.delay = 0.1
+    client = transport()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda key: client.post_json(server.url, {}, coalesce_key=key), range(4)))
+    assert server.requests == 4
+
+
+def test_shared_request_error_reaches_every_caller(server):
+    server.statuses = [404]
+    server.delay = 0.2
+    client = transport()
+
+    def call(_):
+        try:
+            client.post_json(server.url, {}, coalesce_key="student")
+        except requests.exceptions.HTTPError as e:
+            return e.response.status_code
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(call, range(4))) == [404] * 4
+    assert server.requests == 1
+    # The failed call is forgotten, the next one sends a new request
+    assert client.post_json(server.url, {}, coalesce_key="student") == {"request": 2}
+
+
+def test_rate_limit_spaces_requests(server):
+    client = transport(max_rate=20)
+    started = time.monotonic()
+    for _ in range(5):
+        client.post_json(server.url, {})
+    # 5 requests at 20 per second, the first one goes right away
+    assert time.monotonic() - started >= 0.19